@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import numpy as np
+
+from metrics import INFERENCE_BATCH_SIZE, INFERENCE_QUEUE_SECONDS
+
+
+class InferenceBatcher:
+    """
+    Agrupa en lotes las imágenes de solicitudes concurrentes para hacer una sola pasada del modelo.
+
+    Cada worker toma la primera imagen de la cola y espera hasta `max_wait_ms` milisegundos
+    (o hasta juntar `max_batch_size` imágenes); luego ejecuta la predicción del lote en el
+    executor y resuelve el futuro de cada solicitud con su resultado.
+    """
+
+    def __init__(self, name, predict, executor, max_batch_size=32, max_wait_ms=5.0, workers=1):
+        """
+        Args:
+            name (str): Nombre del batcher.
+            predict (callable): Función bloqueante que recibe un arreglo (N, ...) y devuelve N resultados.
+            executor (SourceExecutor): Executor donde se ejecuta `predict`.
+            max_batch_size (int): Imágenes máximas por lote.
+            max_wait_ms (float): Milisegundos máximos que la primera imagen espera a que se llene el lote.
+            workers (int): Lotes que pueden estar en ejecución al mismo tiempo.
+        """
+        self.name = name
+        self.predict = predict
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def submit(self, tensor):
+        """
+        Encola una imagen ya preprocesada y espera su resultado.
+
+        Args:
+            tensor (np.ndarray): Imagen con la forma de entrada del modelo (sin la dimensión del lote).
+
+        Returns:
+            Resultado de `predict` para esta imagen.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((tensor, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Espera la primera imagen y junta las que lleguen antes de `max_wait` o de llenar el lote."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Primero lo que ya está en la cola, sin ceder el control
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._collect()
+            # Las solicitudes canceladas mientras esperaban no ocupan lugar en el lote
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            started_at = time.perf_counter()
+            for _, _, queued_at in batch:
+                INFERENCE_QUEUE_SECONDS.observe(started_at - queued_at)
+            INFERENCE_BATCH_SIZE.observe(len(batch))
+            self.batches += 1
+            self.items += len(batch)
+
+            try:
+                results = await self.executor.run(self.predict, np.stack([tensor for tensor, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'batches': self.batches,
+            'images': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else None
+        }
@@ -0,0 +1,81 @@
+"""
+Arranca la API con sustitutos locales para Earth Engine, el LLM y el modelo de clasificación.
+
+Open-Meteo y OpenWeatherMap se apuntan con variables de entorno a `fake_upstreams.py`
+(lo hace `load_test.py`). Sirve para medir el backend sin red ni credenciales.
+
+Uso (desde Backend/):
+    python benchmarks/bench_server.py --port 8900 --ee-latency 0.3 --llm-latency 0.5
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from fake_ee import create_fake_ee  # noqa: E402
+from fake_llm import create_fake_openai  # noqa: E402
+from tiny_model import save_tiny_model  # noqa: E402
+
+
+def ndvi_payload():
+    acquisition = datetime.datetime.utcnow() - datetime.timedelta(days=370)
+    return {
+        'NDVI': 3639,
+        'time_start': acquisition.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000,
+        'stats': {'NDVI_mean': 3639, 'NDVI_min': 3100, 'NDVI_max': 4200, 'NDVI_stdDev': 210.5, 'NDVI_count': 1}
+    }
+
+
+def soil_moisture_payload():
+    return {
+        'soil_moisture_am_mean': 0.2767, 'soil_moisture_am_min': 0.21, 'soil_moisture_am_max': 0.33,
+        'soil_moisture_am_stdDev': 0.02, 'soil_moisture_am_count': 441
+    }
+
+
+def report_responder(node):
+    """Respuestas de `getInfo()` para las consultas de humedad del suelo, NDVI y la consulta combinada."""
+    name, args, _ = node.ops[0]
+    if name == 'Dictionary' and args and isinstance(args[0], dict) and 'soil_moisture' in args[0]:
+        return {'soil_moisture': soil_moisture_payload(), 'ndvi': ndvi_payload()}
+    if 'sort' in node.op_names():
+        return ndvi_payload()
+    return soil_moisture_payload()
+
+
+def install_fakes(ee_latency, llm_latency, model_path):
+    """Sustituye `ee`, el cliente de OpenAI y la ruta del modelo antes de importar la API."""
+    sys.modules['ee'] = create_fake_ee(report_responder, latency=ee_latency)
+
+    import llm_recommendations
+    llm_recommendations.OpenAI = create_fake_openai(latency=llm_latency)
+
+    import inference
+    inference.MODEL_PATH = model_path or save_tiny_model(
+        os.path.join(tempfile.mkdtemp(prefix='bench-model-'), 'tiny_model.h5')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--ee-latency', type=float, default=0.3, help='Segundos por getInfo() simulado')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Segundos por pregunta al LLM simulado')
+    parser.add_argument('--model-path', default=None, help='Modelo a usar; por defecto se genera uno pequeño')
+    args = parser.parse_args()
+
+    install_fakes(args.ee_latency, args.llm_latency, args.model_path)
+
+    import uvicorn
+    from main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning', access_log=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Microbenchmark de `get_average_et`: implementación original con pandas contra `ETIndex`.
+
+Uso (desde Backend/):
+    python benchmarks/et_average.py --iterations 2000 --batch 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from et_index import ETIndex  # noqa: E402
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'evapotranspiration_forecast_2023-2024.csv')
+
+
+def pandas_average(forecast_df, start_date, end_date):
+    """Implementación anterior de `get_average_et`."""
+    start_date_dt = pd.to_datetime(start_date)
+    end_date_dt = pd.to_datetime(end_date)
+    start_date_adjusted = forecast_df.index[forecast_df.index.get_indexer([start_date_dt], method='nearest')][0]
+    end_date_adjusted = forecast_df.index[forecast_df.index.get_indexer([end_date_dt], method='nearest')][0]
+    return forecast_df.loc[start_date_adjusted:end_date_adjusted]['mean'].mean()
+
+
+def timed(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=10000, help='Rangos por llamada a la API por lotes')
+    args = parser.parse_args()
+
+    forecast_df = pd.read_csv(CSV_PATH, parse_dates=['Unnamed: 0'])
+    forecast_df.rename(columns={'Unnamed: 0': 'date'}, inplace=True)
+    forecast_df.set_index('date', inplace=True)
+    index = ETIndex(forecast_df)
+
+    # Rangos de 4 días distribuidos a lo largo (y fuera) del pronóstico
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(-30, 500, size=args.batch)
+    starts = pd.Timestamp('2023-10-01') + pd.to_timedelta(offsets, unit='D')
+    ends = starts + pd.Timedelta(days=4)
+
+    # Paridad con la implementación anterior
+    mismatches = 0
+    for start, end in zip(starts[:500], ends[:500]):
+        expected = pandas_average(forecast_df, start, end)
+        got = index.average(start, end)
+        if not (np.isclose(expected, got) or (np.isnan(expected) and np.isnan(got))):
+            mismatches += 1
+
+    start, end = '2024-10-13', '2024-10-17'
+    pandas_seconds = timed(lambda: pandas_average(forecast_df, start, end), args.iterations)
+    index_seconds = timed(lambda: index.average(start, end), args.iterations)
+    batch_seconds = timed(lambda: index.averages(starts, ends), max(1, args.iterations // 100))
+
+    print(json.dumps({
+        'parity_mismatches': mismatches,
+        'pandas_us_per_call': round(pandas_seconds * 1e6, 2),
+        'index_us_per_call': round(index_seconds * 1e6, 2),
+        'index_batch_us_per_range': round(batch_seconds / args.batch * 1e6, 4),
+        'speedup': round(pandas_seconds / index_seconds, 1)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Módulo `ee` falso para medir la cantidad de peticiones a Earth Engine sin red.
+
+Cada llamada encadenada (`ImageCollection(...).filter(...).mean()...`) construye un nodo
+perezoso; solo `getInfo()` cuenta como una petición y simula la latencia configurada.
+Las respuestas las decide `responder(node)`, que recibe la cadena de operaciones.
+"""
+import time
+import types
+
+
+class FakeNode:
+    def __init__(self, module, ops):
+        self._module = module
+        self.ops = ops
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            return FakeNode(self._module, self.ops + [(name, args, kwargs)])
+        return method
+
+    def op_names(self):
+        """Nombres de todas las operaciones del nodo, incluidas las de nodos anidados en sus argumentos."""
+        names = []
+        for name, args, kwargs in self.ops:
+            names.append(name)
+            for value in list(args) + list(kwargs.values()):
+                if isinstance(value, FakeNode):
+                    names.extend(value.op_names())
+        return names
+
+    def getInfo(self):
+        self._module.round_trips += 1
+        if self._module.latency:
+            time.sleep(self._module.latency)
+        return self._module.responder(self)
+
+
+def create_fake_ee(responder, latency=0.0):
+    """
+    Crea un módulo que imita la API de `ee` usada por el backend.
+
+    Args:
+        responder (callable): Función que recibe el nodo y devuelve el resultado de `getInfo()`.
+        latency (float): Segundos simulados por cada petición.
+
+    Returns:
+        module: Módulo con el contador `round_trips`.
+    """
+    module = types.ModuleType('ee')
+    module.round_trips = 0
+    module.latency = latency
+    module.responder = responder
+
+    def constructor(name):
+        def build(*args, **kwargs):
+            return FakeNode(module, [(name, args, kwargs)])
+        return build
+
+    def namespace(prefix, names):
+        return types.SimpleNamespace(**{name: constructor(f"{prefix}.{name}") for name in names})
+
+    for name in ['ImageCollection', 'Image', 'FeatureCollection', 'Feature', 'Dictionary', 'Number', 'List']:
+        setattr(module, name, constructor(name))
+    module.Filter = namespace('Filter', ['date', 'notNull', 'bounds'])
+    module.Geometry = namespace('Geometry', ['Point', 'Rectangle'])
+    module.Reducer = namespace('Reducer', ['mean', 'minMax', 'stdDev', 'count'])
+    module.Algorithms = namespace('Algorithms', ['If'])
+    module.Initialize = lambda *args, **kwargs: None
+    module.data = types.SimpleNamespace(setDeadline=lambda *args, **kwargs: None)
+    module.Authenticate = lambda *args, **kwargs: None
+    return module
@@ -0,0 +1,44 @@
+"""
+Cliente de LLM falso con la interfaz de `llama_index.llms.openai.OpenAI` usada por
+`llm_recommendations`, con latencia configurable por pregunta.
+"""
+import random
+import time
+
+
+class FakeChatResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def __str__(self):
+        return f"assistant: {self.content}"
+
+
+def create_fake_openai(latency=1.0, error_rate=0.0, seed=0):
+    """
+    Crea una clase que sustituye a `OpenAI` en `llm_recommendations`.
+
+    Args:
+        latency (float): Segundos simulados por cada pregunta.
+        error_rate (float): Proporción de preguntas que lanzan una excepción.
+        seed (int): Semilla de los errores simulados.
+
+    Returns:
+        type: Clase con el contador `calls`.
+    """
+    rng = random.Random(seed)
+
+    class FakeOpenAI:
+        calls = 0
+
+        def __init__(self, model=None, **kwargs):
+            self.model = model
+
+        def chat(self, messages):
+            FakeOpenAI.calls += 1
+            time.sleep(latency)
+            if rng.random() < error_rate:
+                raise RuntimeError('error simulado del LLM')
+            return FakeChatResponse(f"Recomendación simulada para: {messages[-1].content[:60]}")
+
+    return FakeOpenAI
@@ -0,0 +1,94 @@
+"""
+Servidor HTTP falso que imita Open-Meteo (archivo histórico) y OpenWeatherMap (clima actual),
+con latencia y tasa de errores configurables.
+
+Uso (desde Backend/):
+    python benchmarks/fake_upstreams.py --port 8901 --latency 0.08 --jitter 0.04 --error-rate 0.01
+
+Rutas:
+    /v1/archive        Respuesta de Open-Meteo con 'daily'.
+    /data/2.5/weather  Respuesta de OpenWeatherMap con 'main' y 'rain'.
+    /stats             Solicitudes, errores y conexiones distintas recibidas.
+"""
+import argparse
+import asyncio
+import datetime
+import random
+
+from aiohttp import web
+
+
+def daily_payload(start_date, end_date, rng):
+    start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+    days = max(1, (end - start).days + 1)
+    return {
+        'daily': {
+            'time': [(start + datetime.timedelta(days=day)).strftime('%Y-%m-%d') for day in range(days)],
+            'temperature_2m_max': [round(rng.uniform(18, 26), 1) for _ in range(days)],
+            'temperature_2m_min': [round(rng.uniform(6, 12), 1) for _ in range(days)],
+            'precipitation_sum': [round(rng.uniform(0, 8), 1) for _ in range(days)]
+        }
+    }
+
+
+def create_app(latency, jitter, error_rate, seed):
+    """
+    Args:
+        latency (float): Latencia base por respuesta en segundos.
+        jitter (float): Latencia aleatoria adicional (máximo) en segundos.
+        error_rate (float): Proporción de respuestas con estado 500.
+        seed (int): Semilla para que las corridas sean reproducibles.
+    """
+    rng = random.Random(seed)
+    stats = {'requests': 0, 'errors': 0, 'connections': 0}
+    # Direcciones (host, puerto) de los clientes: cada conexión nueva llega de otro puerto
+    peers = set()
+
+    async def respond(request, payload):
+        stats['requests'] += 1
+        peers.add(request.transport.get_extra_info('peername'))
+        stats['connections'] = len(peers)
+        await asyncio.sleep(latency + rng.uniform(0, jitter))
+        if rng.random() < error_rate:
+            stats['errors'] += 1
+            return web.json_response({'error': True, 'reason': 'error simulado'}, status=500)
+        return web.json_response(payload)
+
+    async def archive(request):
+        return await respond(request, daily_payload(request.query['start_date'], request.query['end_date'], rng))
+
+    async def weather(request):
+        return await respond(request, {
+            'main': {'temp': round(rng.uniform(10, 24), 2)},
+            'rain': {'1h': round(rng.uniform(0, 2), 2)}
+        })
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get('/v1/archive', archive)
+    app.router.add_get('/data/2.5/weather', weather)
+    app.router.add_get('/stats', get_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--latency', type=float, default=0.08)
+    parser.add_argument('--jitter', type=float, default=0.04)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(args.latency, args.jitter, args.error_rate, args.seed),
+        host=args.host, port=args.port, print=None, access_log=None
+    )
+
+
+if __name__ == '__main__':
+    main()
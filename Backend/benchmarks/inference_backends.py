@@ -0,0 +1,109 @@
+"""
+Compara los backends de inferencia (Keras y TensorFlow Lite): tiempo de carga, latencia
+por imagen (p50/p95), imágenes por segundo con varios tamaños de lote y memoria residente.
+
+Cada backend se mide en un proceso aparte para que la memoria de uno no se sume a la del otro.
+
+Uso (desde Backend/):
+    python benchmarks/inference_backends.py
+    python benchmarks/inference_backends.py --tflite-model models/corn_model_int8.tflite --batch-sizes 1 8 32
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from tiny_model import INPUT_SHAPE  # noqa: E402
+
+
+def rss_mb():
+    """Memoria residente actual del proceso en MB (Linux), o la máxima si no hay /proc."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure(backend, keras_model, tflite_model, batch_sizes, iterations):
+    """Mide un backend dentro del proceso actual."""
+    import inference
+    inference.MODEL_PATH = keras_model
+    inference.TFLITE_MODEL_PATH = tflite_model
+
+    rng = np.random.default_rng(0)
+    results = {'backend': backend, 'rss_before_load_mb': rss_mb()}
+
+    started_at = time.perf_counter()
+    model = inference.load(backend)
+    results['load_seconds'] = round(time.perf_counter() - started_at, 3)
+
+    image = rng.random((1, *INPUT_SHAPE), dtype=np.float32)
+    for _ in range(3):
+        model.predict_on_batch(image)
+    latencies = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        model.predict_on_batch(image)
+        latencies.append(time.perf_counter() - started_at)
+    results['latency_ms'] = {
+        'p50': round(float(np.percentile(latencies, 50)) * 1000, 2),
+        'p95': round(float(np.percentile(latencies, 95)) * 1000, 2)
+    }
+
+    results['images_per_second'] = {}
+    for batch_size in batch_sizes:
+        batch = rng.random((batch_size, *INPUT_SHAPE), dtype=np.float32)
+        model.predict_on_batch(batch)
+        rounds = max(1, iterations // batch_size)
+        started_at = time.perf_counter()
+        for _ in range(rounds):
+            model.predict_on_batch(batch)
+        elapsed = time.perf_counter() - started_at
+        results['images_per_second'][str(batch_size)] = round(rounds * batch_size / elapsed, 1)
+
+    results['rss_after_mb'] = rss_mb()
+    results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['keras', 'tflite'])
+    parser.add_argument('--keras-model', default=os.path.join('models', 'Corn_efficientnet_modelBueno.h5'))
+    parser.add_argument('--tflite-model', default=os.getenv('TFLITE_MODEL_PATH', os.path.join('models', 'corn_model.tflite')))
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--iterations', type=int, default=64)
+    parser.add_argument('--worker', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.keras_model, args.tflite_model, args.batch_sizes, args.iterations)))
+        return
+
+    results = []
+    for backend in args.backends:
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', backend, '--keras-model', args.keras_model,
+             '--tflite-model', args.tflite_model, '--iterations', str(args.iterations),
+             '--batch-sizes', *map(str, args.batch_sizes)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps({'results': results, 'config': vars(args)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Compara el rendimiento de la clasificación con una pasada del modelo por imagen
+(`MODEL.predict` con lote de 1, como antes) contra `InferenceBatcher` con solicitudes concurrentes.
+
+Usa el modelo pequeño de `tiny_model.py` (o `--model-path`) y tensores ya preprocesados, de modo
+que solo se mide la inferencia.
+
+Uso (desde Backend/):
+    python benchmarks/inference_batching.py --concurrency 64 --images 512
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from batcher import InferenceBatcher  # noqa: E402
+from executors import SourceExecutor  # noqa: E402
+from tiny_model import INPUT_SHAPE, build_tiny_model  # noqa: E402
+
+
+async def drive(submit, images, concurrency):
+    """Envía `images` con `concurrency` clientes concurrentes y devuelve las imágenes por segundo."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(image):
+        async with semaphore:
+            return await submit(image)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(image) for image in images))
+    elapsed = time.perf_counter() - started_at
+    return {'seconds': round(elapsed, 3), 'images_per_second': round(len(images) / elapsed, 1)}
+
+
+async def run(model, images, concurrency, workers, max_batch_size, max_wait_ms):
+    import inference
+    inference.MODEL = model
+
+    executor = SourceExecutor('inference', workers)
+
+    def predict_single(image):
+        # Camino anterior: `predict` con un lote de una imagen
+        return model.predict(image[np.newaxis], verbose=0)
+
+    results = {'per_image': await drive(lambda image: executor.run(predict_single, image), images, concurrency)}
+
+    batcher = InferenceBatcher('inference', inference.predict_batch, executor, max_batch_size, max_wait_ms, workers)
+    results['batched'] = await drive(batcher.submit, images, concurrency)
+    results['batched'].update(batcher.stats())
+    await batcher.stop()
+    executor.shutdown()
+
+    results['speedup'] = round(results['batched']['images_per_second'] / results['per_image']['images_per_second'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=512)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=2, help='Hilos del executor de inferencia')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--model-path', default=None, help='Modelo Keras a usar en lugar del modelo pequeño')
+    args = parser.parse_args()
+
+    if args.model_path:
+        from tensorflow.keras.models import load_model
+        model = load_model(args.model_path)
+    else:
+        model = build_tiny_model()
+
+    rng = np.random.default_rng(0)
+    images = [rng.random(INPUT_SHAPE, dtype=np.float32) for _ in range(args.images)]
+    # Calentar ambos caminos para no medir el trazado inicial del grafo
+    model.predict(images[0][np.newaxis], verbose=0)
+    model.predict_on_batch(np.stack(images[:args.max_batch_size]))
+
+    results = asyncio.run(run(model, images, args.concurrency, args.workers, args.max_batch_size, args.max_wait_ms))
+    results['config'] = vars(args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Verifica que el modelo exportado a TensorFlow Lite clasifique igual que el modelo Keras.
+
+Compara, imagen por imagen, la clase predicha y la diferencia de confianza por clase entre
+ambos backends de `inference`. Termina con código 1 si la concordancia de clases queda por
+debajo de `--min-agreement` o si la diferencia máxima de confianza supera `--max-delta`.
+
+Uso (desde Backend/):
+    python benchmarks/inference_parity.py --images-dir imagenes_validacion/
+    python benchmarks/inference_parity.py --tflite-model models/corn_model_int8.tflite --max-delta 0.1
+    python benchmarks/inference_parity.py --tiny   # modelo pequeño exportado al vuelo, sin el modelo real
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import inference  # noqa: E402
+from export_model import IMAGE_EXTENSIONS, export  # noqa: E402
+from tiny_model import INPUT_SHAPE, build_tiny_model  # noqa: E402
+
+
+def load_images(directory, count, seed):
+    """Imágenes preprocesadas de `directory`, o aleatorias si no se indicó directorio."""
+    if directory:
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )[:count]
+        return np.stack([inference.preprocess_image(path) for path in paths])
+    return np.random.default_rng(seed).random((count, *INPUT_SHAPE), dtype=np.float32)
+
+
+def compare(reference, candidate):
+    """
+    Args:
+        reference (np.ndarray): Probabilidades (N, clases) del modelo Keras.
+        candidate (np.ndarray): Probabilidades (N, clases) del modelo exportado.
+
+    Returns:
+        dict: Concordancia de clases y diferencias de confianza.
+    """
+    agree = np.argmax(reference, axis=1) == np.argmax(candidate, axis=1)
+    delta = np.abs(reference - candidate)
+    top = np.argmax(reference, axis=1)
+    top_delta = delta[np.arange(len(top)), top]
+    return {
+        'images': len(reference),
+        'class_agreement': round(float(agree.mean()), 4),
+        'disagreements': int((~agree).sum()),
+        'max_confidence_delta': round(float(delta.max()), 6),
+        'mean_confidence_delta': round(float(delta.mean()), 6),
+        'p95_top_class_delta': round(float(np.percentile(top_delta, 95)), 6)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keras-model', default=inference.MODEL_PATH)
+    parser.add_argument('--tflite-model', default=inference.TFLITE_MODEL_PATH)
+    parser.add_argument('--images-dir', default=None, help='Imágenes reales; si no se indica se usan aleatorias')
+    parser.add_argument('--images', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--quantization', choices=('none', 'float16', 'int8'), default='none',
+                        help='Solo con --tiny: cuantización del modelo exportado al vuelo')
+    parser.add_argument('--tiny', action='store_true', help='Usar el modelo pequeño de tiny_model.py')
+    parser.add_argument('--min-agreement', type=float, default=0.99)
+    parser.add_argument('--max-delta', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    images = load_images(args.images_dir, args.images, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.tiny:
+            # El mismo modelo se guarda como .h5 y se exporta, para comparar pesos idénticos
+            tiny_model = build_tiny_model(args.seed)
+            args.keras_model = os.path.join(tmp, 'tiny.h5')
+            args.tflite_model = os.path.join(tmp, 'tiny.tflite')
+            tiny_model.save(args.keras_model)
+            export(tiny_model, args.tflite_model, args.quantization, list(images[:32]))
+        inference.MODEL_PATH = args.keras_model
+        inference.TFLITE_MODEL_PATH = args.tflite_model
+
+        keras_model = inference.load('keras')
+        tflite_model = inference.load('tflite')
+        reference, candidate = [], []
+        for start in range(0, len(images), args.batch_size):
+            batch = images[start:start + args.batch_size]
+            reference.append(np.asarray(keras_model.predict_on_batch(batch)))
+            candidate.append(tflite_model.predict_on_batch(batch))
+
+    results = compare(np.concatenate(reference), np.concatenate(candidate))
+    results['passed'] = (
+        results['class_agreement'] >= args.min_agreement and results['max_confidence_delta'] <= args.max_delta
+    )
+    results['config'] = vars(args)
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
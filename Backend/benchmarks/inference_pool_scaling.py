@@ -0,0 +1,128 @@
+"""
+Mide cómo escala el rendimiento del pool de procesos de inferencia (`inference_pool.py`) de 1
+a N procesos: imágenes por segundo, aceleración y eficiencia respecto a un solo proceso. Como
+referencia también mide el modelo cargado en el mismo proceso con los hilos de TensorFlow por
+defecto, que es el modo sin pool.
+
+Cada configuración recibe lotes desde varios hilos a la vez (dos por proceso), como los hilos
+del executor de inferencia de la API. Usa el modelo pequeño de `tiny_model.py` (o `--model-path`).
+
+Uso (desde Backend/):
+    python benchmarks/inference_pool_scaling.py --max-workers 4
+    python benchmarks/inference_pool_scaling.py --workers 1 2 4 8 --intra-op-threads 1 --pin-cpus
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from inference_pool import InferencePool  # noqa: E402
+from tiny_model import INPUT_SHAPE, save_tiny_model  # noqa: E402
+
+
+def drive(predict, batch, clients, duration):
+    """Llama a `predict` desde `clients` hilos durante `duration` segundos y devuelve imágenes por segundo."""
+    counts = [0] * clients
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        while time.perf_counter() < stop_at:
+            predict(batch)
+            counts[index] += len(batch)
+
+    started_at = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - started_at)
+
+
+def measure_pool(workers, args, batch):
+    pool = InferencePool(
+        workers,
+        intra_op_threads=args.intra_op_threads,
+        inter_op_threads=args.inter_op_threads,
+        max_batch_size=args.batch_size,
+        model_path=args.model_path,
+        pin_cpus=args.pin_cpus
+    )
+    started_at = time.perf_counter()
+    pool.start()
+    startup_seconds = time.perf_counter() - started_at
+    try:
+        # Calentar cada proceso antes de medir
+        drive(pool.predict_probabilities, batch, 2 * workers, 1.0)
+        images_per_second = drive(pool.predict_probabilities, batch, 2 * workers, args.duration)
+    finally:
+        pool.close()
+    return {
+        'workers': workers,
+        'threads_per_worker': args.intra_op_threads,
+        'startup_seconds': round(startup_seconds, 2),
+        'images_per_second': round(images_per_second, 1)
+    }
+
+
+def measure_in_process(args, batch, clients):
+    """El modo sin pool: un modelo en este proceso con los hilos de TensorFlow por defecto."""
+    import inference
+    inference.MODEL_PATH = args.model_path
+    model = inference.load('keras')
+    drive(model.predict_on_batch, batch, clients, 1.0)
+    return {
+        'mode': 'in_process',
+        'clients': clients,
+        'images_per_second': round(drive(model.predict_on_batch, batch, clients, args.duration), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', nargs='+', type=int, default=None, help='Procesos a probar (por defecto 1..max)')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--intra-op-threads', type=int, default=1)
+    parser.add_argument('--inter-op-threads', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0, help='Segundos de medición por configuración')
+    parser.add_argument('--pin-cpus', action='store_true')
+    parser.add_argument('--model-path', default=None, help='Modelo Keras a usar en lugar del modelo pequeño')
+    args = parser.parse_args()
+
+    workers_list = args.workers or list(range(1, args.max_workers + 1))
+    batch = np.random.default_rng(0).random((args.batch_size, *INPUT_SHAPE), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.model_path is None:
+            args.model_path = save_tiny_model(os.path.join(directory, 'tiny_model.h5'))
+
+        results = [measure_pool(workers, args, batch) for workers in workers_list]
+        baseline = results[0]['images_per_second'] / results[0]['workers']
+        for result in results:
+            speedup = result['images_per_second'] / baseline
+            result['speedup'] = round(speedup, 2)
+            result['efficiency'] = round(speedup / result['workers'], 2)
+
+        # Al final, para que TensorFlow no se cargue en este proceso mientras se miden los pools
+        in_process = measure_in_process(args, batch, 2 * max(workers_list))
+
+    print(json.dumps({
+        'cpus': os.cpu_count(),
+        'pool': results,
+        'baseline': in_process,
+        'config': vars(args)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
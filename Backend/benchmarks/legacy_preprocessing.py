@@ -0,0 +1,37 @@
+"""
+Preprocesamiento anterior de la API (antes de `preprocessing.py`), conservado solo como
+referencia para los scripts de paridad y de rendimiento.
+"""
+import cv2
+import numpy as np
+
+
+def legacy_enhance_image(image):
+    image = cv2.addWeighted(image, 1.5, image, -0.5, 0)
+    kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
+    image = cv2.filter2D(image, -1, kernel)
+
+    # Ajuste de HSV
+    hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+    hue, saturation, value = cv2.split(hsv)
+    value = np.clip(value * 1.25, 0, 255).astype(np.uint8)
+    hsv = cv2.merge([hue, saturation, value])
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
+
+
+def legacy_preprocess(image_rgb):
+    """Redimensiona, mejora y normaliza una imagen RGB como lo hacía `inference.preprocess_image`."""
+    image_resized = cv2.resize(image_rgb, (256, 256))
+    return legacy_enhance_image(image_resized).astype(np.float32) / 255.0
+
+
+def sample_images(count, seed=0, size=(256, 256)):
+    """Imágenes RGB uint8 suavizadas (con bordes y gradientes, no solo ruido) reproducibles."""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        noise = rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+        blurred = cv2.GaussianBlur(noise, (0, 0), rng.uniform(0.5, 4))
+        # Estirar al rango completo para cubrir pixeles oscuros y saturados
+        images.append(cv2.normalize(blurred, None, 0, 255, cv2.NORM_MINMAX))
+    return np.stack(images)
@@ -0,0 +1,259 @@
+"""
+Prueba de carga sin red: levanta `fake_upstreams.py` y `bench_server.py`, envía solicitudes
+a `/get_report`, `/get_recommendations` y `/classify_image` con la concurrencia indicada y
+escribe p50/p95/p99 y solicitudes por segundo en JSON.
+
+La configuración y el commit quedan en el resultado; con `--baseline` se agregan las
+diferencias porcentuales contra una corrida anterior para detectar regresiones.
+
+Uso (desde Backend/):
+    python benchmarks/load_test.py --concurrency 16 --requests 200 --output bench.json
+    python benchmarks/load_test.py --output bench_new.json --baseline bench.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+import cv2
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+ENDPOINTS = ['get_report', 'get_recommendations', 'classify_image']
+
+# Región de las ubicaciones generadas (Estado de México)
+LOCATION_BBOX = (18.8, -100.2, 19.9, -98.9)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def make_locations(count, distinct, hot_locations, seed):
+    """
+    Genera las ubicaciones de las solicitudes. Con `distinct` cada solicitud usa un punto nuevo
+    (cachés frías); si no, se reparten entre `hot_locations` puntos (cachés calientes).
+    """
+    rng = random.Random(seed)
+    south, west, north, east = LOCATION_BBOX
+    pool_size = count if distinct else hot_locations
+    pool = [
+        {'latitude': round(rng.uniform(south, north), 5), 'longitude': round(rng.uniform(west, east), 5)}
+        for _ in range(pool_size)
+    ]
+    return [pool[idx % pool_size] for idx in range(count)]
+
+
+def make_image(seed, width=640, height=480):
+    """JPEG sintético reproducible para `/classify_image`."""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (9, 9), 0)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+def summarize(latencies, errors, elapsed):
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    summary = {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round((len(latencies) + errors) / elapsed, 3) if elapsed else None
+    }
+    if values.size:
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary.update({
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'mean_ms': round(float(values.mean()), 2),
+            'max_ms': round(float(values.max()), 2)
+        })
+    return summary
+
+
+async def send(session, base_url, endpoint, payload, image):
+    if endpoint == 'classify_image':
+        form = aiohttp.FormData()
+        form.add_field('file', image, filename='bench.jpg', content_type='image/jpeg')
+        async with session.post(f"{base_url}/classify_image", data=form) as response:
+            await response.read()
+            return response.status
+    async with session.post(f"{base_url}/{endpoint}", json=payload) as response:
+        await response.read()
+        return response.status
+
+
+async def run_endpoint(base_url, endpoint, concurrency, total, warmup, locations, image):
+    """Lazo cerrado: `concurrency` clientes envían solicitudes hasta completar `total`."""
+    timeout = aiohttp.ClientTimeout(total=300)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        for idx in range(warmup):
+            await send(session, base_url, endpoint, locations[idx % len(locations)], image)
+
+        latencies = []
+        errors = 0
+        next_request = 0
+
+        async def client():
+            nonlocal errors, next_request
+            while next_request < total:
+                payload = locations[next_request % len(locations)]
+                next_request += 1
+                started_at = time.perf_counter()
+                try:
+                    status = await send(session, base_url, endpoint, payload, image)
+                except Exception:
+                    status = None
+                if status == 200:
+                    latencies.append(time.perf_counter() - started_at)
+                else:
+                    errors += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return summarize(latencies, errors, time.perf_counter() - started_at)
+
+
+async def wait_ready(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/readyz") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"La API no estuvo lista en {timeout} segundos")
+
+
+def compare(results, baseline):
+    """
+    Diferencia porcentual de cada métrica contra la corrida base: en las latencias un valor
+    positivo es una regresión; en `requests_per_second`, una mejora.
+    """
+    comparison = {}
+    for endpoint, summary in results.items():
+        previous = baseline.get('results', {}).get(endpoint)
+        if not previous:
+            continue
+        comparison[endpoint] = {
+            metric: round((summary[metric] - previous[metric]) / previous[metric] * 100, 2)
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'requests_per_second')
+            if summary.get(metric) is not None and previous.get(metric)
+        }
+    return comparison
+
+
+def start_process(args, env=None):
+    return subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='Solicitudes medidas por endpoint')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--hot-locations', type=int, default=0,
+                        help='Repartir las solicitudes entre N ubicaciones (0 = una ubicación nueva por solicitud)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--http-latency', type=float, default=0.08)
+    parser.add_argument('--http-jitter', type=float, default=0.04)
+    parser.add_argument('--http-error-rate', type=float, default=0.0)
+    parser.add_argument('--ee-latency', type=float, default=0.3)
+    parser.add_argument('--llm-latency', type=float, default=0.5)
+    parser.add_argument('--ready-timeout', type=float, default=180)
+    parser.add_argument('--output', default=None, help='Archivo JSON de resultados (por defecto, salida estándar)')
+    parser.add_argument('--baseline', default=None, help='Resultados de una corrida anterior para comparar')
+    args = parser.parse_args()
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(',') if endpoint.strip()]
+    upstream_port, api_port = free_port(), free_port()
+    upstream_url = f"http://127.0.0.1:{upstream_port}"
+    base_url = f"http://127.0.0.1:{api_port}"
+
+    env = dict(
+        os.environ,
+        OPEN_METEO_ARCHIVE_URL=f"{upstream_url}/v1/archive",
+        OPENWEATHER_URL=f"{upstream_url}/data/2.5/weather",
+        OPENWEATHER_API_KEY='bench',
+        OPENAI_API_KEY='bench',
+        EO_BACKEND='ee',
+        PERSISTENT_CACHE_PATH='',
+        PREFETCH_ENABLED='0'
+    )
+    processes = [
+        start_process([
+            os.path.join(BENCHMARKS_DIR, 'fake_upstreams.py'), '--port', str(upstream_port),
+            '--latency', str(args.http_latency), '--jitter', str(args.http_jitter),
+            '--error-rate', str(args.http_error_rate), '--seed', str(args.seed)
+        ]),
+        start_process([
+            os.path.join(BENCHMARKS_DIR, 'bench_server.py'), '--port', str(api_port),
+            '--ee-latency', str(args.ee_latency), '--llm-latency', str(args.llm_latency)
+        ], env=env)
+    ]
+
+    try:
+        asyncio.run(wait_ready(base_url, args.ready_timeout))
+        image = make_image(args.seed)
+        results = {}
+        for position, endpoint in enumerate(endpoints):
+            # Cada endpoint usa ubicaciones distintas para no heredar las cachés del anterior
+            locations = make_locations(
+                args.requests + args.warmup, args.hot_locations == 0, args.hot_locations, args.seed + position
+            )
+            results[endpoint] = asyncio.run(run_endpoint(
+                base_url, endpoint, args.concurrency, args.requests, args.warmup, locations, image
+            ))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+    output = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'results': results
+    }
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        output['baseline_commit'] = baseline.get('commit')
+        output['comparison_pct'] = compare(results, baseline)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
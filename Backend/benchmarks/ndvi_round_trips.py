@@ -0,0 +1,77 @@
+"""
+Compara las peticiones a Earth Engine de `get_closest_available_ndvi` en modo
+'retries' contra el modo 'single', usando un `ee` falso con latencia simulada.
+
+Uso (desde Backend/):
+    python benchmarks/ndvi_round_trips.py --latency 0.5
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_ee import create_fake_ee  # noqa: E402
+
+
+def make_responder(empty_windows):
+    """
+    El modo por reintentos recibe NDVI nulo en las primeras `empty_windows` ventanas;
+    el modo de una sola petición recibe la imagen válida equivalente.
+    """
+    state = {'calls': 0}
+    stats = {'NDVI_min': 3100, 'NDVI_max': 4200, 'NDVI_stdDev': 210.5, 'NDVI_count': 1}
+
+    def responder(node):
+        if 'sort' in node.op_names():
+            acquisition = datetime.datetime(2023, 10, 3) - datetime.timedelta(days=5 * empty_windows)
+            return {
+                'NDVI': 3639,
+                'time_start': acquisition.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000,
+                'stats': {'NDVI_mean': 3639, **stats}
+            }
+        # Los reintentos reciben directamente el resultado de `reduceRegion` con `stats_reducer`
+        state['calls'] += 1
+        if state['calls'] > empty_windows:
+            return {'NDVI_mean': 3639, **stats}
+        return {'NDVI_mean': None, 'NDVI_min': None, 'NDVI_max': None, 'NDVI_stdDev': None, 'NDVI_count': 0}
+
+    return responder
+
+
+def run(mode, empty_windows, latency):
+    fake_ee = create_fake_ee(make_responder(empty_windows), latency=latency)
+    sys.modules['ee'] = fake_ee
+    sys.modules.pop('earth_engine', None)
+    import earth_engine
+
+    start = time.perf_counter()
+    result = earth_engine.get_closest_available_ndvi(19.127, -99.494, '2024-10-01', '2024-10-05', mode=mode)
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'empty_windows': empty_windows,
+        'round_trips': fake_ee.round_trips,
+        'seconds': round(elapsed, 4),
+        'result': result
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.2, help='Latencia simulada por getInfo() en segundos')
+    args = parser.parse_args()
+
+    results = [
+        run(mode, empty_windows, args.latency)
+        for empty_windows in range(3)
+        for mode in ('retries', 'single')
+    ]
+    print(json.dumps(results, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
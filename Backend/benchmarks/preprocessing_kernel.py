@@ -0,0 +1,65 @@
+"""
+Compara el rendimiento del preprocesamiento anterior (enfoque, ida y vuelta a HSV y
+normalización, imagen por imagen) contra `preprocessing.preprocess_batch`, imagen por imagen
+y por lotes. Las imágenes ya vienen en 256x256 para medir solo la mejora y la normalización.
+
+Uso (desde Backend/):
+    python benchmarks/preprocessing_kernel.py --images 256 --batch-sizes 1 8 32
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import preprocessing  # noqa: E402
+from legacy_preprocessing import legacy_enhance_image, sample_images  # noqa: E402
+
+
+def images_per_second(func, batches, images, repeat):
+    """Mejor de `repeat` corridas de `func` sobre todos los lotes, en imágenes por segundo."""
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for batch in batches:
+            func(batch)
+        best = min(best, time.perf_counter() - started_at)
+    return round(images / best, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=256)
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    images = sample_images(args.images)
+    singles = list(images)
+
+    def legacy(image):
+        return legacy_enhance_image(image).astype(np.float32) / 255.0
+
+    results = {
+        'legacy_per_image': images_per_second(legacy, singles, len(images), args.repeat),
+        'fused_per_image': images_per_second(preprocessing.preprocess_batch, singles, len(images), args.repeat),
+        'fused_batched': {}
+    }
+    for batch_size in args.batch_sizes:
+        batches = [images[start:start + batch_size] for start in range(0, len(images), batch_size)]
+        results['fused_batched'][str(batch_size)] = images_per_second(
+            preprocessing.preprocess_batch, batches, len(images), args.repeat
+        )
+    results['speedup_per_image'] = round(results['fused_per_image'] / results['legacy_per_image'], 2)
+    results['config'] = vars(args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Paridad numérica del preprocesamiento de `preprocessing.py` contra el de antes
+(ida y vuelta RGB→HSV→RGB en uint8, en `legacy_preprocessing.py`).
+
+El escalado directo por V'/V evita la cuantización del tono y la saturación de OpenCV, así que
+la diferencia no es cero: se verifica que quede dentro de `--max-delta` niveles (de 255) por
+pixel y `--max-mean-delta` en promedio. También verifica que un lote dé lo mismo que las
+imágenes por separado y que la entrada float32 (como en el entrenamiento) dé lo mismo que uint8.
+
+Uso (desde Backend/):
+    python benchmarks/preprocessing_parity.py
+    python benchmarks/preprocessing_parity.py --images-dir imagenes_validacion/
+"""
+import argparse
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import preprocessing  # noqa: E402
+from legacy_preprocessing import legacy_enhance_image, sample_images  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_images(directory, count, seed):
+    """Imágenes RGB de 256x256 de `directory`, o sintéticas si no se indicó directorio."""
+    if not directory:
+        return sample_images(count, seed)
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )[:count]
+    return np.stack([
+        preprocessing.resize(cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)) for path in paths
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images-dir', default=None)
+    parser.add_argument('--images', type=int, default=64)
+    parser.add_argument('--max-delta', type=float, default=8, help='Diferencia máxima por pixel (niveles de 0-255)')
+    parser.add_argument('--max-mean-delta', type=float, default=1, help='Diferencia promedio (niveles de 0-255)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    images = load_images(args.images_dir, args.images, args.seed)
+    reference = np.stack([legacy_enhance_image(image) for image in images]).astype(np.float32) / 255.0
+    batch = preprocessing.preprocess_batch(images)
+    delta = np.abs(batch - reference) * 255
+
+    single = np.stack([preprocessing.preprocess_batch(image)[0] for image in images])
+    enhanced = preprocessing.enhance_batch(images)
+    from_float = np.stack([preprocessing.enhance_image(image.astype(np.float32)) for image in images])
+
+    results = {
+        'images': len(images),
+        'dtype': str(batch.dtype),
+        'max_delta_levels': round(float(delta.max()), 3),
+        'mean_delta_levels': round(float(delta.mean()), 4),
+        'p99_delta_levels': round(float(np.percentile(delta, 99)), 3),
+        'batch_matches_single': bool(np.array_equal(batch, single)),
+        'float32_matches_uint8': bool(np.array_equal(from_float, enhanced.astype(np.float32))),
+        'uint8_matches_normalized': bool(np.abs(enhanced / 255.0 - batch).max() <= 0.5 / 255 + 1e-6)
+    }
+    results['passed'] = (
+        results['dtype'] == 'float32'
+        and results['max_delta_levels'] <= args.max_delta
+        and results['mean_delta_levels'] <= args.max_mean_delta
+        and results['batch_matches_single']
+        and results['float32_matches_uint8']
+        and results['uint8_matches_normalized']
+    )
+    results['config'] = vars(args)
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Verifica el almacén local de rásters (`raster_store.py`) con un almacén sintético escrito con
+`write_raster` en un directorio temporal, sin Earth Engine.
+
+1. Humedad del suelo: el promedio temporal y espacial de la caja de `local_soil_moisture` (y sus
+   estadísticas) contra NumPy sobre los píxeles que tocan la caja, calculados por sus bordes.
+2. NDVI: el valor de `local_latest_ndvi` contra el píxel que contiene al punto en la fecha más
+   reciente con dato válido, incluidos puntos en los bordes sur y este de la capa.
+3. Recarga: las fechas se escriben desde otro proceso (como la sincronización); la capa se ve
+   aunque la primera consulta haya sido antes de sincronizar, y una fecha nueva se ve sin reiniciar.
+
+Uso (desde Backend/):
+    python benchmarks/raster_store_check.py
+    python benchmarks/raster_store_check.py --points 500 --seed 3
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import raster_store  # noqa: E402
+
+# Capa sintética con la resolución de SMAP; la caja se ajusta a un número entero de píxeles
+RESOLUTION = 0.09
+WIDTH, HEIGHT = 45, 44
+BBOX = [-101.6, 21.3 - HEIGHT * RESOLUTION, -101.6 + WIDTH * RESOLUTION, 21.3]
+SOIL_DATES = ['2024-09-24', '2024-09-26', '2024-09-27', '2024-09-28']
+NDVI_DATES = ['2023-09-14', '2023-09-22', '2023-09-30']
+
+
+def synthetic_array(rng, shape, nan_fraction):
+    array = rng.uniform(0.05, 0.5, shape).astype(np.float32)
+    array[rng.random(shape) < nan_fraction] = np.nan
+    return array
+
+
+def write_from_other_process(root, product, date_str, array):
+    """Escribe una fecha con `write_raster` desde otro proceso, como la sincronización."""
+    array_path = os.path.join(root, f'.input-{product}-{date_str}.npy')
+    np.save(array_path, array)
+    script = (
+        "import sys, numpy as np, raster_store; "
+        "raster_store.write_raster(sys.argv[1], sys.argv[2], np.load(sys.argv[3]), "
+        f"{BBOX!r}, {RESOLUTION!r}, sys.argv[4])"
+    )
+    subprocess.run(
+        [sys.executable, '-c', script, product, date_str, array_path, root], cwd=BACKEND_DIR, check=True
+    )
+    os.remove(array_path)
+
+
+def pixel_edges(shape):
+    """Bordes norte/sur de cada fila y oeste/este de cada columna."""
+    west, _, _, north = BBOX
+    rows = np.arange(shape[0])
+    cols = np.arange(shape[1])
+    return (
+        north - rows * RESOLUTION, north - (rows + 1) * RESOLUTION,
+        west + cols * RESOLUTION, west + (cols + 1) * RESOLUTION
+    )
+
+
+def reference_soil(arrays, lat, lng, buffer):
+    """Promedio de NumPy sobre los píxeles cuya área se traslapa con la caja del punto."""
+    tops, bottoms, lefts, rights = pixel_edges(arrays[0].shape)
+    row_mask = (bottoms < lat + buffer) & (tops > lat - buffer)
+    col_mask = (lefts < lng + buffer) & (rights > lng - buffer)
+    stack = np.stack([array[row_mask][:, col_mask] for array in arrays]).astype(np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        composite = np.nanmean(stack, axis=0)
+    valid = composite[~np.isnan(composite)]
+    if valid.size == 0:
+        return None, 0
+    return {'mean': valid.mean(), 'min': valid.min(), 'max': valid.max(), 'std_dev': valid.std()}, int(valid.size)
+
+
+def reference_ndvi(arrays, lat, lng):
+    """Valor del píxel que contiene al punto en la fecha más reciente con dato válido."""
+    tops, _, lefts, _ = pixel_edges(arrays[0].shape)
+    row = min(int(np.searchsorted(-tops, -lat, side='right')) - 1, len(tops) - 1)
+    col = min(int(np.searchsorted(lefts, lng, side='right')) - 1, len(lefts) - 1)
+    for date, array in reversed(list(zip(NDVI_DATES, arrays))):
+        if not np.isnan(array[row, col]):
+            return date, float(array[row, col])
+    return None, None
+
+
+def check_soil(root, arrays, rng, points):
+    date_str = '2024-09-30'
+    # La consulta usa las fechas de 6 a 2 días antes: '2024-09-28' queda fuera
+    used = [array for date, array in zip(SOIL_DATES, arrays) if '2024-09-24' <= date < '2024-09-28']
+    max_error = 0.0
+    mismatches = 0
+    for _ in range(points):
+        buffer = float(rng.uniform(0.1, 1.0))
+        lat = float(rng.uniform(BBOX[1] + buffer, BBOX[3] - buffer))
+        lng = float(rng.uniform(BBOX[0] + buffer, BBOX[2] - buffer))
+        result = raster_store.local_soil_moisture(lat, lng, date_str, buffer, root)
+        expected, valid_pixels = reference_soil(used, lat, lng, buffer)
+        if expected is None:
+            mismatches += result is None or result['mean_soil_moisture'] is not None
+            continue
+        actual = {'mean': result['mean_soil_moisture'], **result['stats']}
+        mismatches += actual['valid_pixels'] != valid_pixels
+        max_error = max(max_error, *(abs(actual[name] - value) for name, value in expected.items()))
+    return {'points': points, 'mismatches': mismatches, 'max_abs_error': max_error}
+
+
+def check_ndvi(root, arrays, rng, points):
+    west, south, east, north = BBOX
+    # Puntos al azar y en los bordes (sur y este incluidos)
+    coordinates = [(float(rng.uniform(south, north)), float(rng.uniform(west, east))) for _ in range(points)]
+    coordinates += [(south, east), (south, west), (north, east), (north, west)]
+    widened_start = datetime.datetime(2023, 9, 1)
+    current_end = datetime.datetime(2023, 10, 5)
+    mismatches = 0
+    for lat, lng in coordinates:
+        result = raster_store.local_latest_ndvi(lat, lng, widened_start, current_end, root)
+        date, value = reference_ndvi(arrays, lat, lng)
+        if value is None:
+            mismatches += result != {}
+            continue
+        acquired = datetime.datetime.fromtimestamp(result['time_start'] / 1000, datetime.timezone.utc)
+        mismatches += result['NDVI'] != value or acquired.strftime('%Y-%m-%d') != date
+    return {'points': len(coordinates), 'mismatches': mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=200, help='Puntos al azar por producto')
+    parser.add_argument('--nan-fraction', type=float, default=0.3, help='Proporción de píxeles sin dato')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    soil_arrays = [synthetic_array(rng, (HEIGHT, WIDTH), args.nan_fraction) for _ in SOIL_DATES]
+    ndvi_arrays = [synthetic_array(rng, (HEIGHT, WIDTH), args.nan_fraction) for _ in NDVI_DATES]
+
+    with tempfile.TemporaryDirectory() as root:
+        # Consultar antes de sincronizar no debe dejar la capa desactivada
+        results = {'missing_before_sync': raster_store.get_layer('smap', root) is None}
+
+        for date, array in zip(SOIL_DATES, soil_arrays):
+            write_from_other_process(root, 'smap', date, array)
+        for date, array in zip(NDVI_DATES[:-1], ndvi_arrays[:-1]):
+            write_from_other_process(root, 'ndvi', date, array)
+        results['visible_after_sync'] = raster_store.get_layer('smap', root) is not None
+        results['soil_moisture'] = check_soil(root, soil_arrays, rng, args.points)
+
+        # La última fecha de NDVI llega después de que la capa ya se abrió en este proceso
+        stale_dates = list(raster_store.get_layer('ndvi', root).dates)
+        write_from_other_process(root, 'ndvi', NDVI_DATES[-1], ndvi_arrays[-1])
+        results['reloaded_new_date'] = (
+            NDVI_DATES[-1] not in stale_dates and NDVI_DATES[-1] in raster_store.get_layer('ndvi', root).dates
+        )
+        results['ndvi'] = check_ndvi(root, ndvi_arrays, rng, args.points)
+
+    results['passed'] = (
+        results['missing_before_sync']
+        and results['visible_after_sync']
+        and results['reloaded_new_date']
+        and results['soil_moisture']['mismatches'] == 0
+        and results['soil_moisture']['max_abs_error'] <= 1e-6
+        and results['ndvi']['mismatches'] == 0
+    )
+    results['config'] = vars(args)
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
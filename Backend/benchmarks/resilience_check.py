@@ -0,0 +1,98 @@
+"""
+Verifica con latencia inyectada el comportamiento de los circuitos, los tiempos límite
+y las peticiones de respaldo (hedging) de `resilience.py`, sin red.
+
+1. Una fuente bloqueante (como Earth Engine) se vuelve lenta: las primeras llamadas agotan
+   su tiempo, el circuito se abre y las siguientes fallan de inmediato; al recuperarse la
+   fuente, la llamada de prueba lo vuelve a cerrar.
+2. Una petición idempotente cuya primera copia es lenta: con hedging se responde con la copia.
+
+Uso (desde Backend/):
+    python benchmarks/resilience_check.py --latency 0.5 --timeout 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executors import SourceExecutor  # noqa: E402
+from resilience import CircuitBreaker, hedged  # noqa: E402
+
+
+async def check_breaker(latency, timeout, threshold, reset_timeout):
+    executor = SourceExecutor('slow_source', max_workers=4)
+    breaker = CircuitBreaker('slow_source', failure_threshold=threshold, reset_timeout=reset_timeout)
+    injected = {'latency': latency}
+
+    def source():
+        time.sleep(injected['latency'])
+        return {'value': 1}
+
+    async def call(phase):
+        started_at = time.perf_counter()
+        try:
+            await breaker.call(executor.run, source, timeout=timeout)
+            outcome = 'ok'
+        except Exception as e:
+            outcome = type(e).__name__
+        return {
+            'phase': phase,
+            'outcome': outcome,
+            'ms': round((time.perf_counter() - started_at) * 1000, 1),
+            'state_after': breaker.state
+        }
+
+    calls = [await call('slow') for _ in range(threshold + 3)]
+    injected['latency'] = 0.01
+    calls.append(await call('recovered_before_reset'))
+    await asyncio.sleep(reset_timeout)
+    calls.append(await call('recovered_after_reset'))
+    calls.append(await call('recovered_after_reset'))
+    executor.shutdown()
+    return {'calls': calls, 'breaker': breaker.stats(), 'executor': executor.stats()}
+
+
+async def check_hedging(latency, delay):
+    attempts = {'count': 0}
+
+    async def request():
+        attempts['count'] += 1
+        # La primera copia es lenta (p. ej. una conexión atascada); las demás responden rápido
+        await asyncio.sleep(latency if attempts['count'] == 1 else 0.02)
+        return attempts['count']
+
+    results = {}
+    for name, func in (('sin_hedging', request), ('con_hedging', lambda: hedged(request, delay=delay))):
+        attempts['count'] = 0
+        started_at = time.perf_counter()
+        winner = await func()
+        results[name] = {
+            'ms': round((time.perf_counter() - started_at) * 1000, 1),
+            'attempts': attempts['count'],
+            'winner': winner
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.5, help='Latencia inyectada de la fuente lenta')
+    parser.add_argument('--timeout', type=float, default=0.2, help='Tiempo límite por llamada')
+    parser.add_argument('--threshold', type=int, default=3)
+    parser.add_argument('--reset-timeout', type=float, default=1.0)
+    parser.add_argument('--hedge-delay', type=float, default=0.1)
+    args = parser.parse_args()
+
+    result = {
+        'breaker': asyncio.run(check_breaker(args.latency, args.timeout, args.threshold, args.reset_timeout)),
+        'hedging': asyncio.run(check_hedging(args.latency, args.hedge_delay))
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Mide la inferencia por mosaicos (`inference.iter_tile_rows`) sobre una imagen sintética de alta
+resolución: mosaicos por segundo para varios pasos y la memoria adicional durante el recorrido,
+que debe depender del ancho de la imagen (una fila de mosaicos) y no de su alto.
+
+Usa el modelo pequeño de `tiny_model.py` (o `--model-path`), así que mide el recorrido y el
+preprocesamiento más que el costo del modelo real. También renderiza el mapa de calor.
+
+Uso (desde Backend/):
+    python benchmarks/tiled_inference.py --width 4000 --height 3000 --strides 256 128
+    python benchmarks/tiled_inference.py --overlay /tmp/heatmap.jpg
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import inference  # noqa: E402
+from heatmap import encode_jpeg, render_overlay  # noqa: E402
+from inference_backends import rss_mb  # noqa: E402
+from legacy_preprocessing import sample_images  # noqa: E402
+from tiny_model import build_tiny_model  # noqa: E402
+
+
+def run(image, stride, batch_size):
+    """Recorre la imagen completa y devuelve la rejilla, el rendimiento y la memoria máxima observada."""
+    rss_before = rss_mb()
+    peak = rss_before
+    ys, class_rows, confidence_rows = [], [], []
+    started_at = time.perf_counter()
+    for y, xs, classes, confidences in inference.iter_tile_rows(image, stride, batch_size):
+        ys.append(y)
+        class_rows.append(classes)
+        confidence_rows.append(confidences)
+        peak = max(peak, rss_mb())
+    elapsed = time.perf_counter() - started_at
+    classes = np.stack(class_rows)
+    return ys, xs, classes, np.stack(confidence_rows), {
+        'stride': stride,
+        'grid': list(classes.shape),
+        'tiles': int(classes.size),
+        'seconds': round(elapsed, 3),
+        'tiles_per_second': round(classes.size / elapsed, 1),
+        'extra_rss_mb': round(peak - rss_before, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--strides', nargs='+', type=int, default=[256, 128])
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--model-path', default=None, help='Modelo Keras a usar en lugar del modelo pequeño')
+    parser.add_argument('--overlay', default=None, help='Guardar el mapa de calor del último paso en esta ruta')
+    args = parser.parse_args()
+
+    if args.model_path:
+        from tensorflow.keras.models import load_model
+        inference.MODEL = load_model(args.model_path)
+    else:
+        inference.MODEL = build_tiny_model()
+
+    image = sample_images(1, size=(args.width, args.height))[0]
+    # Calentar el modelo con un lote completo
+    next(inference.iter_tile_rows(image[:inference.TILE_SIZE], inference.TILE_SIZE, args.batch_size))
+
+    results = []
+    for stride in args.strides:
+        ys, xs, classes, confidences, result = run(image, stride, args.batch_size)
+        results.append(result)
+
+    if args.overlay:
+        started_at = time.perf_counter()
+        overlay = render_overlay(image, ys, xs, classes, confidences, inference.CLASS_LABELS, inference.TILE_SIZE)
+        with open(args.overlay, 'wb') as output:
+            output.write(encode_jpeg(overlay))
+        results.append({'overlay': args.overlay, 'render_seconds': round(time.perf_counter() - started_at, 3)})
+
+    print(json.dumps({'results': results, 'config': vars(args)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
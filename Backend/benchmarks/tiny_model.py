@@ -0,0 +1,38 @@
+"""
+Modelo Keras pequeño con pesos aleatorios y la misma interfaz que el clasificador de
+enfermedades (entrada 256x256x3, 4 clases con softmax), para medir sin el modelo real.
+
+Uso (desde Backend/):
+    python benchmarks/tiny_model.py --output /tmp/tiny_model.h5
+"""
+import argparse
+
+INPUT_SHAPE = (256, 256, 3)
+NUM_CLASSES = 4
+
+
+def build_tiny_model(seed=0):
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(seed)
+    return tf.keras.Sequential([
+        tf.keras.layers.Input(shape=INPUT_SHAPE),
+        tf.keras.layers.Conv2D(8, 3, strides=2, activation='relu'),
+        tf.keras.layers.Conv2D(16, 3, strides=2, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(NUM_CLASSES, activation='softmax')
+    ])
+
+
+def save_tiny_model(path, seed=0):
+    """Construye el modelo y lo guarda en `path` (formato según la extensión, p. ej. `.h5`)."""
+    build_tiny_model(seed).save(path)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(save_tiny_model(args.output, args.seed))
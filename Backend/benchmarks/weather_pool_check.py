@@ -0,0 +1,145 @@
+"""
+Verifica sin red la sesión HTTP compartida de la API (`create_http_session` y `get_weather_data`
+de `main.py`) contra servidores falsos de `fake_upstreams.py` levantados en este proceso.
+
+1. Reutilización de conexiones: varias rondas de consultas concurrentes al clima; con keep-alive
+   las conexiones abiertas no pasan de las solicitudes simultáneas de una ronda (acotadas por
+   `HTTP_MAX_CONNECTIONS_PER_HOST`), aunque las solicitudes sumen muchas más.
+2. Tiempos límite: un servidor más lento que `HTTP_TOTAL_TIMEOUT` (y otro más lento que el
+   presupuesto de un reporte): las consultas se cortan a tiempo y la sección del clima se degrada
+   con motivo 'timeout' (o 'circuit_open' una vez que el circuito del servicio se abre).
+
+Uso (desde Backend/):
+    python benchmarks/weather_pool_check.py --concurrency 16 --rounds 5
+    python benchmarks/weather_pool_check.py --slow-latency 2 --total-timeout 0.5 --deadline 0.3
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from aiohttp import web  # noqa: E402
+
+from fake_ee import create_fake_ee  # noqa: E402
+from fake_upstreams import create_app  # noqa: E402
+from resilience import CircuitBreaker  # noqa: E402
+
+
+async def start_upstream(host, port, latency, jitter):
+    """Levanta `fake_upstreams` en este proceso y devuelve el runner y la URL base."""
+    runner = web.AppRunner(create_app(latency, jitter, 0.0, 0), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner, f"http://{host}:{port}"
+
+
+async def upstream_stats(session, base_url):
+    async with session.get(f"{base_url}/stats") as response:
+        return await response.json()
+
+
+def summarize(latencies, results):
+    latencies = sorted(latencies)
+    reasons = collections.Counter(result.get('reason', 'ok') for result in results)
+    return {
+        'calls': len(results),
+        'outcomes': dict(reasons),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1)
+    }
+
+
+async def weather_round(api, session, concurrency, deadline_budget=None):
+    async def call(index):
+        deadline = api.Deadline(deadline_budget) if deadline_budget is not None else None
+        started_at = time.perf_counter()
+        result = await api.get_weather_data(
+            session, 19.4 + index * 0.01, -99.1, '2024-09-01', '2024-09-05', deadline=deadline
+        )
+        return time.perf_counter() - started_at, result
+
+    return await asyncio.gather(*(call(index) for index in range(concurrency)))
+
+
+async def check_reuse(api, session, base_url, args):
+    latencies, results = [], []
+    for _ in range(args.rounds):
+        for elapsed, result in await weather_round(api, session, args.concurrency):
+            latencies.append(elapsed)
+            results.append(result)
+    stats = await upstream_stats(session, base_url)
+    return {
+        **summarize(latencies, results),
+        'upstream_requests': stats['requests'],
+        'upstream_connections': stats['connections'],
+        'requests_per_connection': round(stats['requests'] / max(1, stats['connections']), 1),
+        'max_connections_per_host': api.HTTP_MAX_CONNECTIONS_PER_HOST
+    }
+
+
+async def check_timeout(api, session, base_url, args, deadline_budget=None):
+    api.OPEN_METEO_ARCHIVE_URL = f"{base_url}/v1/archive"
+    api.OPENWEATHER_URL = f"{base_url}/data/2.5/weather"
+    latencies, results = [], []
+    for elapsed, result in await weather_round(api, session, args.concurrency, deadline_budget):
+        latencies.append(elapsed)
+        results.append(result)
+    return {
+        **summarize(latencies, results),
+        'limit_seconds': deadline_budget if deadline_budget is not None else api.HTTP_TOTAL_TIMEOUT,
+        'breakers': {source: api.BREAKERS[source].stats() for source in ('open_meteo', 'openweather')}
+    }
+
+
+async def run(args):
+    fast_runner, fast_url = await start_upstream(args.host, args.port, args.latency, args.jitter)
+    slow_runner, slow_url = await start_upstream(args.host, args.port + 1, args.slow_latency, 0.0)
+
+    # Las URL y los límites de la sesión se leen al importar la API
+    os.environ['OPEN_METEO_ARCHIVE_URL'] = f"{fast_url}/v1/archive"
+    os.environ['OPENWEATHER_URL'] = f"{fast_url}/data/2.5/weather"
+    os.environ['HTTP_TOTAL_TIMEOUT'] = str(args.total_timeout)
+    sys.modules['ee'] = create_fake_ee(lambda node: {})
+    import main as api
+
+    session = api.create_http_session()
+    try:
+        report = {'reuse': await check_reuse(api, session, fast_url, args)}
+        report['total_timeout'] = await check_timeout(api, session, slow_url, args)
+        # Circuitos nuevos, para que la última fase no falle de inmediato por la anterior
+        for name, breaker in api.BREAKERS.items():
+            api.BREAKERS[name] = CircuitBreaker(name, breaker.failure_threshold, breaker.reset_timeout)
+        report['deadline'] = await check_timeout(api, session, slow_url, args, args.deadline)
+    finally:
+        await session.close()
+        await fast_runner.cleanup()
+        await slow_runner.cleanup()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8911, help='Puerto del servidor rápido (el lento usa el siguiente)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Consultas al clima simultáneas por ronda')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--slow-latency', type=float, default=2.0, help='Latencia del servidor lento')
+    parser.add_argument('--total-timeout', type=float, default=0.5, help='HTTP_TOTAL_TIMEOUT de la sesión')
+    parser.add_argument('--deadline', type=float, default=0.3, help='Presupuesto de cada reporte en la última fase')
+    args = parser.parse_args()
+
+    print(json.dumps({**asyncio.run(run(args)), 'config': vars(args)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
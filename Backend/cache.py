@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+def snap(value, step):
+    """
+    Ajusta una coordenada al centro de la celda de una malla regular.
+
+    Args:
+        value (float): Coordenada (latitud o longitud).
+        step (float): Tamaño de la celda (en grados).
+
+    Returns:
+        float: Centro de la celda que contiene a la coordenada.
+    """
+    return round((value // step) * step + step / 2, 6)
+
+
+class TTLCache:
+    """
+    Caché en memoria con expiración por tiempo (TTL) y desalojo LRU.
+
+    Opcionalmente tiene un segundo nivel persistente (`DiskCache`) compartido entre workers:
+    los fallos en memoria se buscan en disco, y las entradas expiradas en disco se siguen
+    sirviendo durante `stale_ttl` segundos mientras un solo worker las refresca.
+
+    Es segura para usarse desde los hilos del executor. Desde el event loop se usan
+    `lookup_async` y `set_async`: la memoria se consulta en el mismo hilo y el disco (SQLite,
+    que puede esperar hasta varios segundos por otro worker) en los hilos de `executor`.
+    """
+
+    def __init__(self, name, ttl, maxsize=1024, store=None, stale_ttl=0, lease_seconds=60, executor=None):
+        """
+        Args:
+            name (str): Nombre de la caché; también es el espacio de nombres en disco.
+            ttl (float): Segundos durante los que una entrada es fresca.
+            maxsize (int): Entradas máximas en memoria.
+            store (DiskCache): Nivel persistente opcional.
+            stale_ttl (float): Segundos adicionales durante los que se sirve una entrada vieja.
+            lease_seconds (float): Tiempo máximo que un worker reserva el refresco de una entrada.
+            executor (SourceExecutor): Hilos para el nivel persistente en `lookup_async` y `set_async`.
+        """
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.store = store
+        self.stale_ttl = stale_ttl
+        self.lease_seconds = lease_seconds
+        self.executor = executor
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Escrituras a disco en curso, para no perder la referencia a sus tareas
+        self._pending_writes = set()
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            return None
+
+    def _memory_set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _store_get(self, key):
+        try:
+            return self.store.get(self.name, key)
+        except Exception as e:
+            print(f"Error al leer la caché persistente '{self.name}': {e}")
+            return None
+
+    def lookup(self, key):
+        """
+        Busca `key` en memoria y luego en disco, aceptando entradas viejas.
+
+        Returns:
+            tuple: (valor o None, refrescar). `refrescar` es True cuando el valor está viejo y
+            este llamado obtuvo el arrendamiento, es decir, cuando le toca actualizar la entrada.
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            return value, False
+        return self._store_lookup(key)
+
+    def _store_lookup(self, key):
+        """Parte de `lookup` que consulta el nivel persistente tras un fallo en memoria."""
+        found = self._store_get(key) if self.store is not None else None
+        if found is None:
+            with self._lock:
+                self.misses += 1
+            return None, False
+
+        value, expires_at = found
+        remaining = expires_at - time.time()
+        if remaining > 0:
+            # Fresca en disco (la guardó otro worker o una ejecución anterior)
+            self._memory_set(key, value, remaining)
+            with self._lock:
+                self.disk_hits += 1
+            return value, False
+
+        with self._lock:
+            self.stale_hits += 1
+        try:
+            return value, self.store.try_lease(self.name, key, self.lease_seconds)
+        except Exception as e:
+            print(f"Error al reservar el refresco en la caché persistente '{self.name}': {e}")
+            return value, False
+
+    async def lookup_async(self, key):
+        """Igual que `lookup`, pero sin bloquear el event loop cuando hay que ir a disco."""
+        value = self._memory_get(key)
+        if value is not None:
+            return value, False
+        if self.store is None or self.executor is None:
+            return self._store_lookup(key)
+        return await self.executor.run(self._store_lookup, key)
+
+    def get(self, key):
+        """Devuelve el valor fresco asociado a `key` o None si no existe o ya expiró."""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+
+        found = self._store_get(key) if self.store is not None else None
+        if found is not None and found[1] > time.time():
+            self._memory_set(key, found[0], found[1] - time.time())
+            with self._lock:
+                self.disk_hits += 1
+            return found[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        """Guarda `value` bajo `key` y desaloja las entradas menos usadas si se supera `maxsize`."""
+        self._memory_set(key, value, self.ttl)
+        if self.store is not None:
+            self._store_set(key, value)
+
+    def _store_set(self, key, value):
+        try:
+            self.store.set(self.name, key, value, self.ttl, self.stale_ttl)
+        except Exception as e:
+            print(f"Error al escribir la caché persistente '{self.name}': {e}")
+
+    def set_async(self, key, value):
+        """
+        Igual que `set`, pero desde el event loop: guarda en memoria de inmediato y escribe a
+        disco en segundo plano en los hilos de `executor`.
+        """
+        self._memory_set(key, value, self.ttl)
+        if self.store is None:
+            return
+        if self.executor is None:
+            self._store_set(key, value)
+            return
+        task = asyncio.ensure_future(self.executor.run(self._store_set, key, value))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Devuelve los contadores de aciertos y fallos de la caché."""
+        with self._lock:
+            total = self.hits + self.disk_hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl if self.store is not None else None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round((total - self.misses) / total, 4) if total else None
+            }
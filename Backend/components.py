@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+
+class Component:
+    """
+    Recurso pesado que se inicializa en segundo plano al arrancar la aplicación.
+
+    Los endpoints que lo necesitan esperan a que esté listo con `wait_ready`; los demás
+    atienden solicitudes de inmediato.
+    """
+
+    def __init__(self, name, loader, timeout=30.0):
+        """
+        Args:
+            name (str): Nombre del componente.
+            loader (callable): Función bloqueante que inicializa el recurso y lo devuelve.
+            timeout (float): Segundos máximos que un endpoint espera al componente.
+        """
+        self.name = name
+        self.loader = loader
+        self.timeout = timeout
+        self.state = 'pending'
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        self._loaded = asyncio.Event()
+
+    async def load(self):
+        """Ejecuta el cargador en un hilo y registra el resultado."""
+        self.state = 'loading'
+        started_at = time.perf_counter()
+        try:
+            self.value = await asyncio.get_running_loop().run_in_executor(None, self.loader)
+            self.state = 'ready'
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            print(f"Error al inicializar {self.name}: {e}")
+        finally:
+            self.load_seconds = round(time.perf_counter() - started_at, 3)
+            self._loaded.set()
+
+    async def wait(self):
+        """Espera a que termine el intento de carga (con éxito o no), hasta `timeout` segundos."""
+        try:
+            await asyncio.wait_for(self._loaded.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.state == 'ready'
+
+    async def wait_ready(self):
+        """
+        Espera al componente y devuelve el recurso.
+
+        Raises:
+            HTTPException: 503 si el componente falló o no estuvo listo a tiempo.
+        """
+        if not await self.wait():
+            detail = f"El componente '{self.name}' no está disponible"
+            if self.error:
+                detail += f": {self.error}"
+            raise HTTPException(status_code=503, detail=detail)
+        return self.value
+
+    def status(self):
+        return {
+            'state': self.state,
+            'load_seconds': self.load_seconds,
+            'error': self.error
+        }
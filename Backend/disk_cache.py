@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Archivo SQLite compartido por los workers del mismo host (vacío para desactivarlo)
+PERSISTENT_CACHE_PATH = os.getenv("PERSISTENT_CACHE_PATH", "cache.sqlite3")
+PERSISTENT_CACHE_MAX_MB = float(os.getenv("PERSISTENT_CACHE_MAX_MB", 256))
+
+# Cada cuántas escrituras se revisa el tamaño total de la caché
+EVICTION_CHECK_INTERVAL = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    last_access REAL NOT NULL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_stale_until ON entries (stale_until);
+"""
+
+
+class DiskCache:
+    """
+    Caché persistente en SQLite que sobrevive a reinicios y se comparte entre workers.
+
+    La base usa modo WAL, de modo que los lectores no bloquean al escritor. Cada entrada tiene
+    una fecha de expiración y una ventana adicional durante la cual se sigue sirviendo como
+    vieja (stale-while-revalidate); un arrendamiento (`lease_until`) garantiza que solo un
+    worker la refresque a la vez. Cuando el archivo supera `max_bytes` se desalojan las
+    entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, path=PERSISTENT_CACHE_PATH, max_bytes=PERSISTENT_CACHE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # sqlite3 no permite compartir conexiones entre hilos: una por hilo
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(list(key) if isinstance(key, tuple) else key)
+
+    def get(self, namespace, key):
+        """
+        Busca una entrada.
+
+        Returns:
+            tuple: (valor, expires_at), o None si no existe o ya salió de la ventana de stale.
+        """
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at, stale_until, last_access FROM entries WHERE namespace = ? AND key = ?",
+            (namespace, self._key(key))
+        ).fetchone()
+        if row is None or row[2] <= now:
+            return None
+
+        value, expires_at, _, last_access = row
+        # Actualizar el último acceso como mucho una vez por minuto para no escribir en cada lectura
+        if now - last_access > 60:
+            connection.execute(
+                "UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, self._key(key))
+            )
+        return json.loads(value), expires_at
+
+    def set(self, namespace, key, value, ttl, stale_ttl):
+        """
+        Guarda una entrada y libera el arrendamiento de refresco.
+
+        Args:
+            namespace (str): Fuente de datos.
+            key (tuple): Llave de la entrada.
+            value: Valor serializable a JSON.
+            ttl (float): Segundos durante los que la entrada es fresca.
+            stale_ttl (float): Segundos adicionales durante los que se sirve como vieja.
+        """
+        now = time.time()
+        payload = json.dumps(value)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO entries "
+            "(namespace, key, value, size, expires_at, stale_until, last_access, lease_until) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+            (namespace, self._key(key), payload, len(payload), now + ttl, now + ttl + stale_ttl, now)
+        )
+
+        with self._lock:
+            self._writes += 1
+            check = self._writes % EVICTION_CHECK_INTERVAL == 0
+        if check:
+            self.evict()
+
+    def try_lease(self, namespace, key, seconds):
+        """
+        Intenta tomar el arrendamiento para refrescar una entrada vieja.
+
+        La actualización es atómica en SQLite, así que entre todos los workers solo uno lo obtiene
+        hasta que se guarde el valor nuevo o pasen `seconds` segundos.
+
+        Returns:
+            bool: True si este llamado obtuvo el arrendamiento.
+        """
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE entries SET lease_until = ? WHERE namespace = ? AND key = ? AND lease_until < ?",
+            (now + seconds, namespace, self._key(key), now)
+        )
+        return cursor.rowcount == 1
+
+    def evict(self):
+        """
+        Borra las entradas fuera de la ventana de stale y, si se supera `max_bytes`,
+        las usadas hace más tiempo hasta bajar al 90 % del límite.
+
+        Returns:
+            int: Número de entradas borradas.
+        """
+        connection = self._connection()
+        deleted = connection.execute("DELETE FROM entries WHERE stale_until <= ?", (time.time(),)).rowcount
+
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        excess = total - int(self.max_bytes * 0.9)
+        if total <= self.max_bytes or excess <= 0:
+            return deleted
+
+        rowids = []
+        for rowid, size in connection.execute("SELECT rowid, size FROM entries ORDER BY last_access"):
+            rowids.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE rowid = ?", rowids)
+        return deleted + len(rowids)
+
+    def compact(self):
+        """
+        Desaloja entradas, reconstruye el archivo para recuperar el espacio libre y
+        trunca el WAL.
+
+        Returns:
+            dict: Entradas borradas y tamaño del archivo antes y después.
+        """
+        size_before = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        connection = self._connection()
+        deleted = self.evict()
+        connection.execute("VACUUM")
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            'deleted': deleted,
+            'size_before_bytes': size_before,
+            'size_after_bytes': os.path.getsize(self.path)
+        }
+
+    def stats(self):
+        """Número de entradas y bytes por fuente de datos."""
+        now = time.time()
+        rows = self._connection().execute(
+            "SELECT namespace, COUNT(*), SUM(size), SUM(expires_at <= ?) FROM entries GROUP BY namespace",
+            (now,)
+        ).fetchall()
+        return {
+            'path': self.path,
+            'max_bytes': self.max_bytes,
+            'namespaces': {
+                namespace: {'entries': count, 'bytes': size, 'stale': stale}
+                for namespace, count, size, stale in rows
+            }
+        }
+
+
+def open_disk_cache(path=PERSISTENT_CACHE_PATH):
+    """
+    Crea la caché persistente configurada.
+
+    Returns:
+        DiskCache: La caché, o None si `PERSISTENT_CACHE_PATH` está vacío.
+    """
+    return DiskCache(path) if path else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mantenimiento de la caché persistente.")
+    parser.add_argument('command', choices=['compact', 'stats'])
+    parser.add_argument('--path', default=PERSISTENT_CACHE_PATH)
+    args = parser.parse_args()
+
+    disk_cache = DiskCache(args.path)
+    result = disk_cache.compact() if args.command == 'compact' else disk_cache.stats()
+    print(json.dumps(result, indent=2))
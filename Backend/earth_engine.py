@@ -0,0 +1,590 @@
+import datetime
+import math
+import os
+import threading
+
+import ee  # Earth Engine
+
+from metrics import NDVI_ATTEMPT_SECONDS, upstream_timer
+from raster_store import local_soil_moisture, local_latest_ndvi
+
+LOCAL_DATA_ERROR = 'el almacén local de rásters no cubre la consulta'
+
+
+def eo_backend(backend=None):
+    """
+    Backend para humedad del suelo y NDVI: 'ee' (Earth Engine), 'local' (almacén de rásters)
+    o 'auto' (almacén local y, si no cubre la consulta, Earth Engine). Por defecto `EO_BACKEND`.
+    """
+    return backend or os.getenv("EO_BACKEND", "auto")
+
+
+def local_result(backend, label, func, *args):
+    """
+    Consulta el almacén local de rásters con `func(*args)`.
+
+    Args:
+        backend (str): Backend ya resuelto con `eo_backend` ('local' o 'auto').
+        label (str): Nombre de los datos para el mensaje de error.
+
+    Returns:
+        dict: Resultado de `func`, o None si el almacén no cubre la consulta (o falló) y hay que
+        ir a Earth Engine. Con el backend 'local' nunca es None: se devuelve el error.
+    """
+    try:
+        result = func(*args)
+    except Exception as e:
+        if backend == 'local':
+            return {'error': f'Error al obtener {label}: {e}'}
+        print(f"Error al leer el almacén local de rásters: {e}")  # Logging
+        return None
+    if result is None and backend == 'local':
+        return {'error': f'Error al obtener {label}: {LOCAL_DATA_ERROR}'}
+    return result
+
+
+_initialized = False
+_initialize_lock = threading.Lock()
+
+
+def initialize_earth_engine(project=None):
+    """
+    Inicializa Earth Engine una sola vez por proceso.
+
+    Si falla, la excepción se propaga y el siguiente llamado lo vuelve a intentar.
+
+    Args:
+        project (str): Proyecto de Earth Engine; por defecto `EE_PROJECT`.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _initialize_lock:
+        if not _initialized:
+            ee.Initialize(project=project or os.getenv("EE_PROJECT", 'ee-luisfernandordzdmz'))
+            # Límite por petición HTTP para que una consulta lenta no ocupe un hilo indefinidamente
+            ee.data.setDeadline(int(float(os.getenv("EE_REQUEST_TIMEOUT", 30)) * 1000))
+            _initialized = True
+
+
+def stats_reducer():
+    """
+    Reductor combinado que en una sola pasada calcula promedio, mínimo, máximo,
+    desviación estándar y número de píxeles válidos.
+    """
+    return ee.Reducer.mean() \
+        .combine(ee.Reducer.minMax(), sharedInputs=True) \
+        .combine(ee.Reducer.stdDev(), sharedInputs=True) \
+        .combine(ee.Reducer.count(), sharedInputs=True)
+
+
+def soil_moisture_stats(lat, lng, date_str, buffer, reducer):
+    """
+    Construye (sin ejecutar) la reducción de humedad del suelo SMAP alrededor de un punto.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        date_str (str): Fecha en formato 'YYYY-MM-DD'.
+        buffer (float): Tamaño del área alrededor del punto (en grados).
+        reducer (ee.Reducer): Reductor a aplicar sobre la región.
+
+    Returns:
+        ee.Dictionary: Resultado de `reduceRegion` sobre la banda `soil_moisture_am`.
+    """
+    # Definir fechas
+    date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    start_date = (date - datetime.timedelta(days=6)).strftime('%Y-%m-%d')
+    end_date = (date - datetime.timedelta(days=2)).strftime('%Y-%m-%d')
+
+    # Colección de imágenes de SMAP
+    dataset = ee.ImageCollection('NASA/SMAP/SPL3SMP_E/006') \
+        .filter(ee.Filter.date(start_date, end_date))
+    soil_moisture_surface = dataset.select('soil_moisture_am')
+
+    # Región de interés
+    region = ee.Geometry.Rectangle([lng - buffer, lat - buffer, lng + buffer, lat + buffer])
+
+    # Reducir región
+    return soil_moisture_surface.mean().reduceRegion(
+        reducer=reducer,
+        geometry=region,
+        scale=10000,
+        maxPixels=1e9
+    )
+
+
+def ndvi_search_dates(start_date, end_date, max_retries):
+    """
+    Calcula el rango de búsqueda de NDVI (un año atrás por falta de datos) y su ampliación
+    para cubrir los `max_retries` desplazamientos de 5 días.
+
+    Returns:
+        tuple: Inicio, fin e inicio ampliado como `datetime`.
+    """
+    current_start = datetime.datetime.strptime(start_date, '%Y-%m-%d') - datetime.timedelta(days=365)
+    current_end = datetime.datetime.strptime(end_date, '%Y-%m-%d') - datetime.timedelta(days=365)
+    widened_start = current_start - datetime.timedelta(days=5 * (max_retries - 1))
+    return current_start, current_end, widened_start
+
+
+def latest_ndvi_stats(lat, lng, widened_start, current_end):
+    """
+    Construye (sin ejecutar) la búsqueda de la imagen MODIS más reciente con NDVI válido en el punto.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        widened_start (datetime): Inicio del rango ampliado.
+        current_end (datetime): Fin del rango.
+
+    Returns:
+        ee.Dictionary: Con 'NDVI', 'time_start' y 'stats', o vacío si no hay imágenes válidas.
+    """
+    return latest_ndvi_at(ee.Geometry.Point([lng, lat]), widened_start, current_end)
+
+
+def latest_ndvi_at(point, widened_start, current_end):
+    """Igual que `latest_ndvi_stats`, con el punto como `ee.Geometry` (p. ej. el de un `ee.Feature`)."""
+    def add_point_ndvi(image):
+        stats = image.reduceRegion(
+            reducer=stats_reducer(),
+            geometry=point,
+            scale=500,
+            maxPixels=1e9
+        )
+        return image.set({'point_ndvi': stats.get('NDVI_mean'), 'point_stats': stats})
+
+    # Imágenes con valor válido en el punto, de la más reciente a la más antigua
+    valid = ee.ImageCollection('MODIS/061/MYD13A1') \
+        .filter(ee.Filter.date(widened_start.strftime('%Y-%m-%d'), current_end.strftime('%Y-%m-%d'))) \
+        .select('NDVI') \
+        .map(add_point_ndvi) \
+        .filter(ee.Filter.notNull(['point_ndvi'])) \
+        .sort('system:time_start', False)
+    latest = ee.Image(valid.first())
+
+    return ee.Dictionary(ee.Algorithms.If(
+        valid.size().gt(0),
+        ee.Dictionary({
+            'NDVI': latest.get('point_ndvi'),
+            'time_start': latest.get('system:time_start'),
+            'stats': latest.get('point_stats')
+        }),
+        ee.Dictionary({})
+    ))
+
+
+def ndvi_result(result, current_start, max_retries):
+    """
+    Convierte el resultado de `latest_ndvi_stats` al formato de respuesta de NDVI.
+
+    Args:
+        result (dict): Resultado de `getInfo()`.
+        current_start (datetime): Inicio del rango original.
+        max_retries (int): Número de rangos de 5 días cubiertos por la búsqueda.
+
+    Returns:
+        dict: NDVI, intentos equivalentes y fecha de adquisición.
+    """
+    mean_ndvi = result.get('NDVI', None)
+    if mean_ndvi is None:
+        return {'mean_ndvi': None, 'error': 'No se encontró NDVI en los rangos especificados'}
+
+    acquisition_date = datetime.datetime.utcfromtimestamp(result['time_start'] / 1000)
+    # Intento del método por reintentos en el que se habría encontrado la imagen
+    days_before_start = (current_start - acquisition_date).total_seconds() / 86400
+    retry = max(0, min(max_retries - 1, math.ceil(days_before_start / 5)))
+
+    return {
+        'mean_ndvi': mean_ndvi,
+        'reintentos_para_obtener_ndvi_cercano': retry,
+        'fecha_adquisicion': acquisition_date.strftime('%Y-%m-%d')
+    }
+
+
+def soil_moisture_result(stats, prefix='soil_moisture_am_'):
+    """
+    Convierte el resultado de `stats_reducer()` al formato de respuesta de humedad del suelo.
+
+    Args:
+        stats (dict): Resultado de `getInfo()`.
+        prefix (str): Prefijo de las llaves ('' en `reduceRegions` con una sola banda).
+    """
+    return {
+        'mean_soil_moisture': stats.get(f'{prefix}mean', None),
+        'stats': {
+            'min': stats.get(f'{prefix}min', None),
+            'max': stats.get(f'{prefix}max', None),
+            'std_dev': stats.get(f'{prefix}stdDev', None),
+            'valid_pixels': stats.get(f'{prefix}count', None)
+        }
+    }
+
+
+def get_soil_moisture_data(lat, lng, date_str, buffer=1, backend=None):
+    """
+    Obtiene la humedad del suelo promedio en un área específica.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        date_str (str): Fecha en formato 'YYYY-MM-DD'.
+        buffer (float): Tamaño del área alrededor del punto (en grados).
+        backend (str): 'ee', 'local' o 'auto'; ver `eo_backend`.
+
+    Returns:
+        dict: Diccionario con la humedad del suelo promedio.
+    """
+    backend = eo_backend(backend)
+    if backend != 'ee':
+        local_data = local_result(
+            backend, 'datos de humedad del suelo', local_soil_moisture, lat, lng, date_str, buffer
+        )
+        if local_data is not None:
+            return local_data
+
+    try:
+        initialize_earth_engine()
+
+        stats = soil_moisture_stats(lat, lng, date_str, buffer, stats_reducer())
+        with upstream_timer('earth_engine', 'soil_moisture'):
+            return soil_moisture_result(stats.getInfo())
+
+    except Exception as e:
+        return {'error': f'Error al obtener datos de humedad del suelo: {e}'}
+
+
+def get_closest_available_ndvi(lat, lng, start_date, end_date, max_retries=3, mode=None, backend=None):
+    """
+    Busca el NDVI promedio más cercano hacia atrás si no encuentra un valor en el rango dado.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
+        end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        max_retries (int): Máximo número de intentos hacia atrás para buscar un valor NDVI válido.
+        mode (str): 'single' resuelve la búsqueda en Earth Engine con una sola petición;
+            'retries' hace una petición por intento. Por defecto se usa `NDVI_LOOKUP_MODE`.
+        backend (str): 'ee', 'local' o 'auto'; ver `eo_backend`.
+
+    Returns:
+        dict: Diccionario con el NDVI promedio.
+    """
+    backend = eo_backend(backend)
+    if backend != 'ee':
+        current_start, current_end, widened_start = ndvi_search_dates(start_date, end_date, max_retries)
+        local_data = local_result(backend, 'datos de NDVI', local_latest_ndvi, lat, lng, widened_start, current_end)
+        if local_data is not None:
+            if 'error' in local_data:
+                return local_data
+            return add_ndvi_stats(ndvi_result(local_data, current_start, max_retries), local_data)
+
+    mode = mode or os.getenv("NDVI_LOOKUP_MODE", "single")
+    if mode == 'retries':
+        return get_ndvi_with_retries(lat, lng, start_date, end_date, max_retries)
+    return get_ndvi_single_request(lat, lng, start_date, end_date, max_retries)
+
+
+def get_ndvi_with_retries(lat, lng, start_date, end_date, max_retries=3):
+    """
+    Busca el NDVI con una petición `getInfo()` por intento, moviendo el rango 5 días hacia atrás cada vez.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
+        end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        max_retries (int): Máximo número de intentos hacia atrás para buscar un valor NDVI válido.
+
+    Returns:
+        dict: Diccionario con el NDVI promedio.
+    """
+    try:
+        initialize_earth_engine()
+        # Formatear fechas y restar un año por ahora por falta de datos
+        current_start = datetime.datetime.strptime(start_date, '%Y-%m-%d') - datetime.timedelta(days=365)
+        current_end = datetime.datetime.strptime(end_date, '%Y-%m-%d') - datetime.timedelta(days=365)
+
+        for retry in range(max_retries):
+            # Colección de imágenes de MODIS
+            dataset = ee.ImageCollection('MODIS/061/MYD13A1') \
+                .filter(ee.Filter.date(current_start.strftime('%Y-%m-%d'), current_end.strftime('%Y-%m-%d'))) \
+                .select('NDVI')
+            point = ee.Geometry.Point([lng, lat])
+
+            # Reducir para obtener el promedio y sus estadísticas
+            ndvi_stats = dataset.mean().reduceRegion(
+                reducer=stats_reducer(),
+                geometry=point,
+                scale=500,
+                maxPixels=1e9
+            )
+            with NDVI_ATTEMPT_SECONDS.labels(retry).time(), upstream_timer('earth_engine', 'ndvi_attempt'):
+                ndvi_value = ndvi_stats.getInfo()
+            mean_ndvi = ndvi_value.get('NDVI_mean', None)
+
+            # Si se encuentra un valor válido, se devuelve
+            if mean_ndvi is not None:
+                return add_ndvi_stats(
+                    {'mean_ndvi': mean_ndvi, 'reintentos_para_obtener_ndvi_cercano': retry}, {'stats': ndvi_value}
+                )
+
+            # Si no se encuentra, busca hacia atrás (por ejemplo, 5 días antes)
+            current_start -= datetime.timedelta(days=5)
+            current_end -= datetime.timedelta(days=5)
+            print(f"Retry {retry + 1}: Buscando NDVI en rango {current_start} - {current_end}")
+
+        return {'mean_ndvi': None, 'error': 'No se encontró NDVI en los rangos especificados'}
+
+    except Exception as e:
+        return {'error': f'Error al obtener datos de NDVI: {e}'}
+
+
+def get_ndvi_single_request(lat, lng, start_date, end_date, max_retries=3):
+    """
+    Busca el NDVI más reciente con valor válido usando una sola petición `getInfo()`.
+
+    Se reduce cada imagen del rango ampliado (el rango original más los `max_retries - 1`
+    desplazamientos de 5 días) y Earth Engine elige la imagen válida más reciente.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
+        end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        max_retries (int): Número de rangos de 5 días hacia atrás que cubre la búsqueda.
+
+    Returns:
+        dict: Diccionario con el NDVI, los intentos equivalentes y la fecha de adquisición.
+    """
+    try:
+        initialize_earth_engine()
+        current_start, current_end, widened_start = ndvi_search_dates(start_date, end_date, max_retries)
+
+        with upstream_timer('earth_engine', 'ndvi'):
+            result = latest_ndvi_stats(lat, lng, widened_start, current_end).getInfo()
+        return add_ndvi_stats(ndvi_result(result, current_start, max_retries), result)
+
+    except Exception as e:
+        return {'error': f'Error al obtener datos de NDVI: {e}'}
+
+
+def add_ndvi_stats(ndvi_data, result):
+    """Agrega al NDVI las estadísticas de la imagen elegida por `latest_ndvi_stats`."""
+    if ndvi_data.get('mean_ndvi') is not None:
+        ndvi_stats = result.get('stats', {})
+        ndvi_data['stats'] = {
+            'min': ndvi_stats.get('NDVI_min', None),
+            'max': ndvi_stats.get('NDVI_max', None),
+            'std_dev': ndvi_stats.get('NDVI_stdDev', None),
+            'valid_pixels': ndvi_stats.get('NDVI_count', None)
+        }
+    return ndvi_data
+
+
+def get_earth_engine_data(soil_point, ndvi_point, date_str, start_date, end_date, buffer=1, max_retries=3,
+                          backend=None):
+    """
+    Obtiene humedad del suelo y NDVI con una sola petición `getInfo()`.
+
+    Ambas reducciones se combinan en un `ee.Dictionary`; además del promedio se incluyen
+    mínimo, máximo, desviación estándar y número de píxeles válidos de cada producto.
+
+    Args:
+        soil_point (tuple): (latitud, longitud) del centro del área de humedad del suelo.
+        ndvi_point (tuple): (latitud, longitud) del punto de NDVI.
+        date_str (str): Fecha en formato 'YYYY-MM-DD'.
+        start_date (str): Fecha de inicio del rango de NDVI en formato 'YYYY-MM-DD'.
+        end_date (str): Fecha de fin del rango de NDVI en formato 'YYYY-MM-DD'.
+        buffer (float): Tamaño del área alrededor del punto de humedad del suelo (en grados).
+        max_retries (int): Número de rangos de 5 días hacia atrás que cubre la búsqueda de NDVI.
+        backend (str): 'ee', 'local' o 'auto'; ver `eo_backend`.
+
+    Returns:
+        tuple: Diccionarios de humedad del suelo y de NDVI.
+    """
+    backend = eo_backend(backend)
+    current_start, current_end, widened_start = ndvi_search_dates(start_date, end_date, max_retries)
+
+    if backend != 'ee':
+        soil_local = local_result(
+            backend, 'datos de humedad del suelo', local_soil_moisture, soil_point[0], soil_point[1], date_str, buffer
+        )
+        ndvi_local = local_result(
+            backend, 'datos de NDVI', local_latest_ndvi, ndvi_point[0], ndvi_point[1], widened_start, current_end
+        )
+        if ndvi_local is not None and 'error' not in ndvi_local:
+            ndvi_local = add_ndvi_stats(ndvi_result(ndvi_local, current_start, max_retries), ndvi_local)
+        if soil_local is not None and ndvi_local is not None:
+            return soil_local, ndvi_local
+        # Si el almacén local solo cubre una fuente, la otra se consulta por separado
+        if soil_local is not None:
+            return soil_local, get_closest_available_ndvi(
+                *ndvi_point, start_date, end_date, max_retries, backend='ee'
+            )
+        if ndvi_local is not None:
+            return get_soil_moisture_data(*soil_point, date_str, buffer, backend='ee'), ndvi_local
+
+    try:
+        initialize_earth_engine()
+
+        with upstream_timer('earth_engine', 'fused'):
+            result = ee.Dictionary({
+                'soil_moisture': soil_moisture_stats(soil_point[0], soil_point[1], date_str, buffer, stats_reducer()),
+                'ndvi': latest_ndvi_stats(ndvi_point[0], ndvi_point[1], widened_start, current_end)
+            }).getInfo()
+
+        soil_moisture_data = soil_moisture_result(result['soil_moisture'])
+
+        ndvi_data = add_ndvi_stats(ndvi_result(result['ndvi'], current_start, max_retries), result['ndvi'])
+
+        return soil_moisture_data, ndvi_data
+
+    except Exception as e:
+        return (
+            {'error': f'Error al obtener datos de humedad del suelo: {e}'},
+            {'error': f'Error al obtener datos de NDVI: {e}'}
+        )
+
+
+def batch_with_local(points, backend, local, remote):
+    """
+    Resuelve un lote con el almacén local y envía a Earth Engine solo las ubicaciones que no cubre.
+
+    Args:
+        points (list): Lista de tuplas (latitud, longitud).
+        backend (str): 'ee', 'local' o 'auto'; ver `eo_backend`.
+        local (callable): `local(backend, lat, lng)`, como `local_result` para una ubicación.
+        remote (callable): `remote(points)`, la consulta por lote a Earth Engine.
+
+    Returns:
+        list: Resultados en el mismo orden que `points`.
+    """
+    backend = eo_backend(backend)
+    if backend == 'ee':
+        return remote(points)
+
+    results = [local(backend, lat, lng) for lat, lng in points]
+    pending = [idx for idx, result in enumerate(results) if result is None]
+    if pending:
+        for idx, result in zip(pending, remote([points[idx] for idx in pending])):
+            results[idx] = result
+    return results
+
+
+def get_soil_moisture_batch(points, date_str, buffer=1, backend=None):
+    """
+    Obtiene la humedad del suelo promedio para varias ubicaciones: del almacén local las que
+    cubre y de Earth Engine, con un solo `reduceRegions`, las demás.
+
+    Args:
+        points (list): Lista de tuplas (latitud, longitud).
+        date_str (str): Fecha en formato 'YYYY-MM-DD'.
+        buffer (float): Tamaño del área alrededor de cada punto (en grados).
+        backend (str): 'ee', 'local' o 'auto'; ver `eo_backend`.
+
+    Returns:
+        list: Diccionarios con la humedad del suelo promedio, en el mismo orden que `points`.
+    """
+    def local(backend, lat, lng):
+        return local_result(backend, 'datos de humedad del suelo', local_soil_moisture, lat, lng, date_str, buffer)
+
+    return batch_with_local(points, backend, local, lambda pending: ee_soil_moisture_batch(pending, date_str, buffer))
+
+
+def ee_soil_moisture_batch(points, date_str, buffer=1):
+    """Consulta por lote de `get_soil_moisture_batch` en Earth Engine."""
+    try:
+        initialize_earth_engine()
+
+        # Definir fechas
+        date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+        start_date = (date - datetime.timedelta(days=6)).strftime('%Y-%m-%d')
+        end_date = (date - datetime.timedelta(days=2)).strftime('%Y-%m-%d')
+
+        # Colección de imágenes de SMAP
+        soil_moisture_surface = ee.ImageCollection('NASA/SMAP/SPL3SMP_E/006') \
+            .filter(ee.Filter.date(start_date, end_date)) \
+            .select('soil_moisture_am')
+
+        # Una región por ubicación, identificada por su posición en la solicitud
+        regions = ee.FeatureCollection([
+            ee.Feature(ee.Geometry.Rectangle([lng - buffer, lat - buffer, lng + buffer, lat + buffer]), {'idx': idx})
+            for idx, (lat, lng) in enumerate(points)
+        ])
+
+        with upstream_timer('earth_engine', 'soil_moisture_batch'):
+            stats = soil_moisture_surface.mean().reduceRegions(
+                collection=regions,
+                reducer=stats_reducer(),
+                scale=10000
+            ).getInfo()
+
+        results = [soil_moisture_result({}) for _ in points]
+        for feature in stats['features']:
+            properties = feature['properties']
+            results[properties['idx']] = soil_moisture_result(properties, prefix='')
+        return results
+
+    except Exception as e:
+        return [{'error': f'Error al obtener datos de humedad del suelo: {e}'} for _ in points]
+
+
+def get_ndvi_batch(points, start_date, end_date, max_retries=3, backend=None):
+    """
+    Obtiene el NDVI de varias ubicaciones: del almacén local las que cubre y de Earth Engine,
+    con una sola petición `getInfo()`, las demás.
+
+    Para cada ubicación se elige, como en `get_ndvi_single_request`, la imagen más reciente con
+    valor válido en el rango ampliado, así que el resultado (y la entrada que comparten en la
+    caché de NDVI) es el mismo que el de `/get_report`.
+
+    Args:
+        points (list): Lista de tuplas (latitud, longitud).
+        start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
+        end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        max_retries (int): Máximo número de intentos hacia atrás para buscar un valor NDVI válido.
+        backend (str): 'ee', 'local' o 'auto'; ver `eo_backend`.
+
+    Returns:
+        list: Diccionarios con el NDVI, los intentos equivalentes y la fecha de adquisición, en el
+        mismo orden que `points`.
+    """
+    current_start, current_end, widened_start = ndvi_search_dates(start_date, end_date, max_retries)
+
+    def local(backend, lat, lng):
+        local_data = local_result(backend, 'datos de NDVI', local_latest_ndvi, lat, lng, widened_start, current_end)
+        if local_data is None or 'error' in local_data:
+            return local_data
+        return add_ndvi_stats(ndvi_result(local_data, current_start, max_retries), local_data)
+
+    return batch_with_local(
+        points, backend, local, lambda pending: ee_ndvi_batch(pending, start_date, end_date, max_retries)
+    )
+
+
+def ee_ndvi_batch(points, start_date, end_date, max_retries=3):
+    """Consulta por lote de `get_ndvi_batch` en Earth Engine."""
+    try:
+        initialize_earth_engine()
+        current_start, current_end, widened_start = ndvi_search_dates(start_date, end_date, max_retries)
+
+        features = ee.FeatureCollection([
+            ee.Feature(ee.Geometry.Point([lng, lat]), {'idx': idx})
+            for idx, (lat, lng) in enumerate(points)
+        ]).map(lambda feature: feature.set('ndvi', latest_ndvi_at(feature.geometry(), widened_start, current_end)))
+
+        with upstream_timer('earth_engine', 'ndvi_batch'):
+            stats = features.getInfo()
+
+        results = [ndvi_result({}, current_start, max_retries) for _ in points]
+        for feature in stats['features']:
+            properties = feature['properties']
+            ndvi = properties.get('ndvi') or {}
+            results[properties['idx']] = add_ndvi_stats(ndvi_result(ndvi, current_start, max_retries), ndvi)
+        return results
+
+    except Exception as e:
+        return [{'error': f'Error al obtener datos de NDVI: {e}'} for _ in points]
@@ -0,0 +1,129 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+import ee  # Earth Engine
+
+from et_forecast_store import ET_STORE_PATH, write_store
+
+
+def initialize_worker(project):
+    """Inicializa Earth Engine una vez por proceso del pool."""
+    ee.Initialize(project=project)
+
+
+def get_weekly_et_series(lat, lng, start_year, end_year):
+    """
+    Obtiene la serie semanal de evapotranspiración MODIS de un punto con una sola petición.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        start_year (int): Año inicial.
+        end_year (int): Año final.
+
+    Returns:
+        pd.Series: Evapotranspiración semanal con valores faltantes interpolados.
+    """
+    rows = ee.ImageCollection('MODIS/061/MOD16A2GF') \
+        .select('ET') \
+        .filter(ee.Filter.date(f'{start_year}-01-01', f'{end_year + 1}-01-01')) \
+        .getRegion(ee.Geometry.Point([lng, lat]), 500) \
+        .getInfo()
+
+    et_df = pd.DataFrame(rows[1:], columns=rows[0])
+    et_df['date'] = pd.to_datetime(et_df['time'], unit='ms')
+    series = et_df.set_index('date')['ET'].astype(float).resample('W').mean()
+    return series.interpolate(method='linear').dropna()
+
+
+def fit_forecast(series, horizon_weeks):
+    """
+    Ajusta el modelo SARIMA usado en `forecastevotranspiration.py` y pronostica hacia adelante.
+
+    Returns:
+        pd.DataFrame: Pronóstico con columnas `mean`, `mean_ci_lower` y `mean_ci_upper`.
+    """
+    model = sm.tsa.statespace.SARIMAX(series, order=(1, 1, 1), seasonal_order=(1, 1, 1, 52))
+    model_fit = model.fit(disp=False)
+    forecast_df = model_fit.get_forecast(steps=horizon_weeks).summary_frame()
+    forecast_df.index = pd.date_range(
+        start=series.index[-1] + pd.DateOffset(weeks=1), periods=horizon_weeks, freq='W'
+    )
+    return forecast_df[['mean', 'mean_ci_lower', 'mean_ci_upper']]
+
+
+def build_cell(lat, lon, start_year, end_year, horizon_weeks):
+    """Descarga y pronostica una celda dentro de un proceso del pool."""
+    series = get_weekly_et_series(lat, lon, start_year, end_year)
+    return lat, lon, fit_forecast(series, horizon_weeks)
+
+
+def grid_cells(bbox, step):
+    """Centros de las celdas de una malla regular sobre la caja (oeste, sur, este, norte)."""
+    west, south, east, north = bbox
+    lats = np.arange(south + step / 2, north, step)
+    lons = np.arange(west + step / 2, east, step)
+    return [(round(float(lat), 6), round(float(lon), 6)) for lat in lats for lon in lons]
+
+
+def build_store(cells, start_year, end_year, horizon_weeks, workers, project, path=ET_STORE_PATH):
+    """
+    Pronostica todas las celdas en paralelo con un pool de procesos y escribe el almacén.
+
+    Args:
+        cells (list): Tuplas (latitud, longitud).
+        start_year (int): Año inicial del histórico.
+        end_year (int): Año final del histórico.
+        horizon_weeks (int): Semanas a pronosticar.
+        workers (int): Número de procesos.
+        project (str): Proyecto de Earth Engine.
+        path (str): Ruta del archivo de datos.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=initialize_worker, initargs=(project,)) as executor:
+        futures = {
+            executor.submit(build_cell, lat, lon, start_year, end_year, horizon_weeks): (lat, lon)
+            for lat, lon in cells
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            lat, lon = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error al pronosticar la celda ({lat}, {lon}): {e}")
+            if done % 50 == 0 or done == len(futures):
+                print(f"Celdas procesadas: {done}/{len(futures)}")
+
+    # Orden estable para que el archivo no dependa del orden de terminación
+    results.sort(key=lambda result: (result[0], result[1]))
+    write_store(results, path)
+    print(f"Pronósticos de {len(results)} celdas guardados en '{path}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera pronósticos de evapotranspiración por celda.")
+    parser.add_argument('--bbox', default=os.getenv("RASTER_BBOX", "-101.6,17.4,-97.6,21.3"),
+                        help="Caja 'oeste,sur,este,norte'")
+    parser.add_argument('--step', type=float, default=0.1, help="Tamaño de la celda en grados")
+    parser.add_argument('--cells-csv', help="CSV con columnas latitude,longitude en lugar de la malla")
+    parser.add_argument('--start-year', type=int, default=2015)
+    parser.add_argument('--end-year', type=int, default=2023)
+    parser.add_argument('--horizon-weeks', type=int, default=66)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', default=ET_STORE_PATH)
+    args = parser.parse_args()
+
+    if args.cells_csv:
+        cells_df = pd.read_csv(args.cells_csv)
+        cells = list(zip(cells_df['latitude'], cells_df['longitude']))
+    else:
+        cells = grid_cells([float(value) for value in args.bbox.split(',')], args.step)
+
+    build_store(
+        cells, args.start_year, args.end_year, args.horizon_weeks, args.workers,
+        os.getenv("EE_PROJECT", 'ee-luisfernandordzdmz'), args.output
+    )
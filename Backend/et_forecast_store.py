@@ -0,0 +1,192 @@
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from et_index import ETIndex
+
+# Archivos del almacén de pronósticos por celda
+ET_STORE_PATH = os.getenv("ET_STORE_PATH", "et_forecasts.npy")
+EARTH_RADIUS_KM = 6371.0
+
+# Orden de las columnas dentro del archivo columnar
+COLUMNS = ('date', 'mean', 'mean_ci_lower', 'mean_ci_upper')
+
+
+def cells_path(path):
+    """Ruta del índice de celdas que acompaña al archivo de datos (formato anterior, sin generaciones)."""
+    return os.path.splitext(path)[0] + '_cells.npy'
+
+
+def generations_dir(path):
+    """Directorio con una subcarpeta por generación escrita del almacén (datos e índice de celdas)."""
+    return os.path.splitext(path)[0] + '_generations'
+
+
+def pointer_path(path):
+    """Archivo con el nombre de la generación vigente; se reemplaza de forma atómica."""
+    return os.path.splitext(path)[0] + '_current.txt'
+
+
+def current_files(path):
+    """
+    Archivos de datos y de celdas de la generación vigente. Como ambos se leen de la misma
+    carpeta y el apuntador se reemplaza de una vez, un lector nunca mezcla dos generaciones.
+
+    Returns:
+        tuple: (datos, celdas), o None si el almacén no se ha generado.
+    """
+    try:
+        with open(pointer_path(path), 'r', encoding='utf-8') as pointer_file:
+            generation = pointer_file.read().strip()
+    except FileNotFoundError:
+        # Almacén escrito antes de las generaciones: dos archivos junto a `path`
+        if os.path.exists(path) and os.path.exists(cells_path(path)):
+            return path, cells_path(path)
+        return None
+    directory = os.path.join(generations_dir(path), generation)
+    return os.path.join(directory, 'data.npy'), os.path.join(directory, 'cells.npy')
+
+
+def to_unit_vectors(lats, lons):
+    """Convierte coordenadas a vectores unitarios 3D para buscar vecinos por distancia sobre la esfera."""
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    return np.column_stack([np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats)])
+
+
+class ETForecastStore:
+    """
+    Pronósticos de evapotranspiración por celda de una malla.
+
+    Los datos viven en un arreglo `.npy` de forma (columnas, filas), de modo que cada columna
+    es contigua en disco; se abre con `mmap_mode='r'` y solo se leen las filas de la celda pedida.
+    El índice de celdas (latitud, longitud, desplazamiento, longitud de la serie) se carga en
+    memoria y se consulta con un KD-tree.
+    """
+
+    def __init__(self, path=ET_STORE_PATH, max_cached_series=256, cells_file=None):
+        """
+        Args:
+            path (str): Archivo de datos.
+            max_cached_series (int): Celdas cuyo índice de promedios se mantiene en memoria.
+            cells_file (str): Índice de celdas; por defecto el que acompaña a `path`.
+        """
+        self.path = path
+        self._data = np.load(path, mmap_mode='r')
+        cells = np.load(cells_file or cells_path(path))
+        self.lats, self.lons = cells[:, 0], cells[:, 1]
+        self.offsets, self.lengths = cells[:, 2].astype(np.int64), cells[:, 3].astype(np.int64)
+        self._tree = cKDTree(to_unit_vectors(self.lats, self.lons))
+        self._indexes = OrderedDict()
+        self._max_cached_series = max_cached_series
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lats)
+
+    def nearest_cell(self, lat, lon):
+        """
+        Busca la celda más cercana a un punto.
+
+        Returns:
+            tuple: Posición de la celda y distancia en kilómetros.
+        """
+        chord, cell = self._tree.query(to_unit_vectors([lat], [lon])[0])
+        distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(min(chord / 2, 1.0))
+        return int(cell), float(distance_km)
+
+    def series(self, cell):
+        """Lee del archivo la serie de una celda como DataFrame indexado por fecha."""
+        rows = slice(self.offsets[cell], self.offsets[cell] + self.lengths[cell])
+        block = np.array(self._data[:, rows])
+        forecast_df = pd.DataFrame(
+            {column: block[position] for position, column in enumerate(COLUMNS) if column != 'date'},
+            index=pd.to_datetime(block[0], unit='D')
+        )
+        forecast_df.index.name = 'date'
+        return forecast_df
+
+    def index_for(self, cell):
+        """Índice de promedios de una celda; se mantienen en memoria las series más usadas."""
+        with self._lock:
+            index = self._indexes.get(cell)
+            if index is not None:
+                self._indexes.move_to_end(cell)
+                return index
+
+        index = ETIndex(self.series(cell))
+        with self._lock:
+            self._indexes[cell] = index
+            if len(self._indexes) > self._max_cached_series:
+                self._indexes.popitem(last=False)
+        return index
+
+
+def load_store(path=ET_STORE_PATH):
+    """
+    Abre el almacén de pronósticos si existe.
+
+    Returns:
+        ETForecastStore: El almacén, o None si no se ha generado.
+    """
+    files = current_files(path)
+    if files is None:
+        return None
+    data_file, cells_file = files
+    return ETForecastStore(data_file, cells_file=cells_file)
+
+
+def write_store(results, path=ET_STORE_PATH):
+    """
+    Escribe los pronósticos de varias celdas en el archivo columnar y su índice de celdas.
+
+    Ambos archivos se escriben en una carpeta de generación nueva y luego se reemplaza el
+    apuntador a la generación vigente. Se conserva la generación anterior, por si un lector
+    acaba de leer el apuntador; las demás se borran.
+
+    Args:
+        results (list): Tuplas (lat, lon, forecast_df) con columnas `mean`, `mean_ci_lower`
+            y `mean_ci_upper` e índice de fechas.
+        path (str): Ruta del archivo de datos.
+    """
+    generation = f"{time.time_ns():x}"
+    directory = os.path.join(generations_dir(path), generation)
+    os.makedirs(directory)
+
+    total_rows = sum(len(forecast_df) for _, _, forecast_df in results)
+    data = np.lib.format.open_memmap(
+        os.path.join(directory, 'data.npy'), mode='w+', dtype=np.float64, shape=(len(COLUMNS), total_rows)
+    )
+    cells = np.zeros((len(results), 4), dtype=np.float64)
+
+    offset = 0
+    for position, (lat, lon, forecast_df) in enumerate(results):
+        rows = slice(offset, offset + len(forecast_df))
+        # Fechas como días desde la época: se representan exactamente en float64
+        data[0, rows] = forecast_df.index.values.astype('datetime64[D]').astype(np.int64)
+        for column_position, column in enumerate(COLUMNS[1:], start=1):
+            data[column_position, rows] = forecast_df[column].to_numpy(dtype=np.float64)
+        cells[position] = (lat, lon, offset, len(forecast_df))
+        offset += len(forecast_df)
+
+    data.flush()
+    del data
+    np.save(os.path.join(directory, 'cells.npy'), cells)
+
+    previous = current_files(path)
+    with open(pointer_path(path) + '.tmp', 'w', encoding='utf-8') as pointer_file:
+        pointer_file.write(generation)
+    os.replace(pointer_path(path) + '.tmp', pointer_path(path))
+
+    keep = {generation}
+    if previous is not None:
+        keep.add(os.path.basename(os.path.dirname(previous[0])))
+    for name in os.listdir(generations_dir(path)):
+        if name not in keep:
+            shutil.rmtree(os.path.join(generations_dir(path), name), ignore_errors=True)
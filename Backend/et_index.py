@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+
+class ETIndex:
+    """
+    Índice precalculado para promediar el pronóstico de evapotranspiración entre dos fechas.
+
+    Guarda las fechas como un arreglo int64 ordenado y las sumas acumuladas de cada columna,
+    de modo que el promedio de un rango se obtiene con dos `searchsorted` y una resta.
+    """
+
+    COLUMNS = ('mean', 'mean_ci_lower', 'mean_ci_upper')
+
+    def __init__(self, forecast_df, columns=COLUMNS):
+        forecast_df = forecast_df.sort_index()
+        self.dates = forecast_df.index.values.astype('datetime64[ns]').astype(np.int64)
+        self.columns = [column for column in columns if column in forecast_df.columns]
+
+        # Sumas y conteos acumulados (con un cero inicial) ignorando valores faltantes, como `mean()` de pandas
+        self._sums = {}
+        self._counts = {}
+        for column in self.columns:
+            values = forecast_df[column].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+            self._sums[column] = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+            self._counts[column] = np.concatenate([[0], np.cumsum(valid)])
+
+    @staticmethod
+    def to_int64(dates):
+        """Convierte fechas ('YYYY-MM-DD', datetime o arreglos de ellas) a nanosegundos int64."""
+        try:
+            return np.atleast_1d(np.asarray(dates, dtype='datetime64[ns]')).astype(np.int64)
+        except (TypeError, ValueError):
+            return np.atleast_1d(pd.to_datetime(dates)).astype('datetime64[ns]').astype(np.int64)
+
+    def nearest(self, targets):
+        """
+        Posición de la fecha más cercana para cada objetivo, con el mismo desempate que
+        `Index.get_indexer(..., method='nearest')` (ante empate gana la fecha posterior).
+
+        Args:
+            targets (np.ndarray): Fechas en nanosegundos int64.
+
+        Returns:
+            np.ndarray: Posiciones en `self.dates`.
+        """
+        n = len(self.dates)
+        right = np.searchsorted(self.dates, targets, side='left')
+        left = np.searchsorted(self.dates, targets, side='right') - 1
+
+        right_clipped = np.minimum(right, n - 1)
+        left_clipped = np.maximum(left, 0)
+        left_distance = targets - self.dates[left_clipped]
+        right_distance = self.dates[right_clipped] - targets
+
+        use_left = (left >= 0) & ((right >= n) | (left_distance < right_distance))
+        return np.where(use_left, left_clipped, right_clipped)
+
+    def averages(self, start_dates, end_dates, columns=None):
+        """
+        Promedios de varias columnas para lotes de rangos de fechas.
+
+        Cada fecha se ajusta a la fecha más cercana del pronóstico y el rango incluye ambos extremos.
+
+        Args:
+            start_dates: Fechas de inicio (cadena, datetime o arreglo).
+            end_dates: Fechas de fin (cadena, datetime o arreglo).
+            columns (list): Columnas a promediar; por defecto todas las del índice.
+
+        Returns:
+            dict: Arreglo de promedios por columna (NaN si el rango queda vacío).
+        """
+        start_idx = self.nearest(self.to_int64(start_dates))
+        end_idx = self.nearest(self.to_int64(end_dates)) + 1
+
+        averages = {}
+        for column in columns or self.columns:
+            sums = self._sums[column][end_idx] - self._sums[column][start_idx]
+            counts = self._counts[column][end_idx] - self._counts[column][start_idx]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                averages[column] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return averages
+
+    def average(self, start_date, end_date, column='mean'):
+        """
+        Promedio de una columna entre dos fechas.
+
+        Args:
+            start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
+            end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+            column (str): Columna a promediar.
+
+        Returns:
+            float: Valor promedio.
+        """
+        return float(self.averages(start_date, end_date, [column])[column][0])
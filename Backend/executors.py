@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import EXECUTOR_WAIT_SECONDS
+
+
+class SourceExecutor:
+    """
+    Pool de hilos dedicado a una fuente de datos bloqueante.
+
+    Lleva métricas de profundidad de cola y tiempo de espera antes de ejecutar cada tarea.
+    """
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self._wait_histogram = EXECUTOR_WAIT_SECONDS.labels(name)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, func, *args):
+        """
+        Ejecuta `func(*args)` en el pool de la fuente y espera su resultado.
+
+        Si quien espera se cancela (p. ej. por un tiempo agotado) antes de que la tarea empiece,
+        la tarea se descarta y no ocupa un hilo.
+
+        Args:
+            func (callable): Función bloqueante.
+
+        Returns:
+            Resultado de `func`.
+        """
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        started = cancelled = False
+        with self._lock:
+            self.queued += 1
+
+        def task():
+            nonlocal started
+            wait = time.perf_counter() - submitted_at
+            with self._lock:
+                if cancelled:
+                    return None
+                started = True
+                self.queued -= 1
+                self.running += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            self._wait_histogram.observe(wait)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        try:
+            return await loop.run_in_executor(self._executor, task)
+        except asyncio.CancelledError:
+            with self._lock:
+                if not started:
+                    cancelled = True
+                    self.queued -= 1
+                    self.cancelled += 1
+            raise
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Devuelve la profundidad de cola, las tareas en curso y los tiempos de espera."""
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "avg_wait_seconds": round(self.total_wait / started, 6) if started else None,
+                "max_wait_seconds": round(self.max_wait, 6)
+            }
+
+
+class AsyncLimiter:
+    """
+    Límite de concurrencia para una fuente asíncrona, con las mismas métricas que `SourceExecutor`.
+    """
+
+    def __init__(self, name, max_concurrency):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._wait_histogram = EXECUTOR_WAIT_SECONDS.labels(name)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, func, *args):
+        """
+        Espera un lugar libre y ejecuta la corrutina `func(*args)`.
+
+        Args:
+            func (callable): Corrutina de la fuente.
+
+        Returns:
+            Resultado de `func`.
+        """
+        submitted_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        wait = time.perf_counter() - submitted_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._wait_histogram.observe(wait)
+        self.running += 1
+        try:
+            return await func(*args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def shutdown(self):
+        pass
+
+    def stats(self):
+        """Devuelve la profundidad de cola, las tareas en curso y los tiempos de espera."""
+        started = self.completed + self.running
+        return {
+            "max_workers": self.max_concurrency,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "avg_wait_seconds": round(self.total_wait / started, 6) if started else None,
+            "max_wait_seconds": round(self.max_wait, 6)
+        }
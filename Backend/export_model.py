@@ -0,0 +1,103 @@
+"""
+Exporta el modelo Keras de enfermedades del maíz a TensorFlow Lite para inferencia en CPU.
+
+Con `--quantization float16` los pesos se guardan en float16 (la mitad del tamaño); con
+`--quantization int8` los pesos y las activaciones se cuantizan a int8 calibrando con imágenes
+reales preprocesadas igual que en la API. En ambos casos la entrada y la salida siguen siendo
+float32, así que `inference.TFLiteModel` recibe el mismo tensor que el modelo Keras.
+
+Uso (desde Backend/):
+    python export_model.py --output models/corn_model.tflite
+    python export_model.py --quantization int8 --calibration-dir calibracion/ --output models/corn_model_int8.tflite
+
+Después se activa con INFERENCE_BACKEND=tflite (y TFLITE_MODEL_PATH si se usó otra ruta).
+"""
+import argparse
+import os
+
+import numpy as np
+
+import inference
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def calibration_images(directory, samples):
+    """
+    Lee hasta `samples` imágenes de `directory` con el mismo preprocesamiento de la API.
+
+    Raises:
+        ValueError: Si el directorio no tiene imágenes.
+    """
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )[:samples]
+    if not paths:
+        raise ValueError(f"No hay imágenes de calibración en {directory}")
+    return [inference.preprocess_image(path) for path in paths]
+
+
+def export(model, output_path, quantization='none', calibration=None):
+    """
+    Convierte un modelo Keras a TensorFlow Lite y lo guarda.
+
+    Args:
+        model (tf.keras.Model): Modelo a convertir.
+        output_path (str): Ruta del archivo .tflite.
+        quantization (str): 'none', 'float16' o 'int8'.
+        calibration (list): Imágenes preprocesadas para calibrar la cuantización int8.
+
+    Returns:
+        int: Tamaño en bytes del modelo exportado.
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if not calibration:
+            raise ValueError("La cuantización int8 necesita imágenes de calibración")
+
+        def representative_dataset():
+            for image in calibration:
+                yield [np.expand_dims(image, axis=0).astype(np.float32)]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+    elif quantization != 'none':
+        raise ValueError(f"Cuantización desconocida: {quantization}")
+
+    content = converter.convert()
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'wb') as model_file:
+        model_file.write(content)
+    return len(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-path', default=inference.MODEL_PATH, help='Modelo Keras de origen')
+    parser.add_argument('--output', default=inference.TFLITE_MODEL_PATH)
+    parser.add_argument('--quantization', choices=('none', 'float16', 'int8'), default='none')
+    parser.add_argument('--calibration-dir', default=None, help='Imágenes para calibrar la cuantización int8')
+    parser.add_argument('--calibration-samples', type=int, default=200)
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.model_path)
+
+    calibration = None
+    if args.quantization == 'int8':
+        if not args.calibration_dir:
+            parser.error("--quantization int8 requiere --calibration-dir")
+        calibration = calibration_images(args.calibration_dir, args.calibration_samples)
+
+    size = export(model, args.output, args.quantization, calibration)
+    print(f"Modelo exportado en {args.output} ({size / 1e6:.1f} MB, cuantización: {args.quantization})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+
+# Color (RGB) de cada clase en el mapa de calor
+CLASS_COLORS = {
+    'Blight': (220, 40, 40),
+    'Common_Rust': (240, 140, 20),
+    'Gray_Leaf_Spot': (150, 60, 200),
+    'Healthy': (40, 170, 70)
+}
+
+
+def render_overlay(image_rgb, ys, xs, classes, confidences, labels, tile, alpha=0.45, max_side=1600):
+    """
+    Dibuja sobre la imagen el mapa de calor de los mosaicos: el color es la clase y la
+    intensidad, la confianza. La imagen se reduce a `max_side` pixeles en su lado mayor.
+
+    Donde los mosaicos se traslapan, cada uno pinta solo la celda de `stride` alrededor de su
+    centro, así que cada zona queda con el color del mosaico más cercano.
+
+    Args:
+        image_rgb (np.ndarray): Imagen RGB en uint8 a resolución completa.
+        ys (list): Posición y de cada fila de mosaicos.
+        xs (list): Posición x de cada columna de mosaicos.
+        classes (np.ndarray): Índices de clase, (filas, columnas).
+        confidences (np.ndarray): Confianzas, (filas, columnas).
+        labels (list): Etiqueta de cada índice de clase.
+        tile (int): Lado de los mosaicos en pixeles.
+        alpha (float): Opacidad del mapa de calor.
+        max_side (int): Lado mayor máximo de la imagen resultante.
+
+    Returns:
+        np.ndarray: Imagen RGB en uint8 con el mapa de calor.
+    """
+    height, width = image_rgb.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    base = cv2.resize(image_rgb, size, interpolation=cv2.INTER_AREA) if scale < 1 else image_rgb.copy()
+
+    # Límites de las celdas: a la mitad entre los centros de mosaicos vecinos
+    def edges(positions, length):
+        centers = np.asarray(positions) + tile / 2
+        middle = (centers[1:] + centers[:-1]) / 2
+        return np.round(np.concatenate(([0], middle, [length])) * scale).astype(int)
+
+    row_edges = edges(ys, min(height, ys[-1] + tile))
+    col_edges = edges(xs, min(width, xs[-1] + tile))
+    palette = np.array([CLASS_COLORS.get(label, (128, 128, 128)) for label in labels], dtype=np.float32)
+
+    layer = np.zeros_like(base)
+    for row in range(len(ys)):
+        for col in range(len(xs)):
+            color = palette[classes[row, col]] * float(confidences[row, col])
+            layer[row_edges[row]:row_edges[row + 1], col_edges[col]:col_edges[col + 1]] = color
+
+    overlay = cv2.addWeighted(base, 1 - alpha, layer, alpha, 0)
+    # Rejilla tenue para distinguir las celdas
+    for edge in row_edges[1:-1]:
+        overlay[edge, :] = overlay[edge, :] // 2
+    for edge in col_edges[1:-1]:
+        overlay[:, edge] = overlay[:, edge] // 2
+    return overlay
+
+
+def encode_jpeg(image_rgb, quality=85):
+    """
+    Returns:
+        bytes: Imagen RGB codificada como JPEG.
+
+    Raises:
+        ValueError: Si OpenCV no pudo codificar la imagen.
+    """
+    ok, encoded = cv2.imencode('.jpg', cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("No se pudo codificar el mapa de calor.")
+    return encoded.tobytes()
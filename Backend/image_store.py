@@ -0,0 +1,97 @@
+import asyncio
+import collections
+import os
+import threading
+
+
+class ImageStore:
+    """
+    Conserva en disco las últimas `max_images` imágenes subidas, fuera del camino de la solicitud.
+
+    Las escrituras se encolan y las hace un executor propio; el orden de las imágenes conservadas
+    se lleva en memoria (se lee el directorio una sola vez al crear el almacén), así que guardar
+    una imagen no hace `listdir` ni lecturas de fechas. Si la cola está llena o falla la escritura,
+    la imagen se descarta y solo se cuenta: la clasificación nunca espera al disco.
+    """
+
+    def __init__(self, directory, max_images, executor, max_pending=32):
+        """
+        Args:
+            directory (str): Directorio donde se guardan las imágenes.
+            max_images (int): Imágenes que se conservan; al superarse se borran las más antiguas.
+            executor (SourceExecutor): Executor (de un hilo) que hace las escrituras en orden.
+            max_pending (int): Escrituras en cola a partir de las cuales se descartan imágenes nuevas.
+        """
+        self.directory = directory
+        self.max_images = max_images
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = 0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._tasks = set()
+        os.makedirs(directory, exist_ok=True)
+        existing = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory)),
+            key=os.path.getctime
+        )
+        self._retained = collections.deque(existing)
+
+    def save(self, filename, data):
+        """
+        Encola la escritura de una imagen sin esperarla.
+
+        Args:
+            filename (str): Nombre del archivo dentro del directorio.
+            data (bytes): Contenido de la imagen.
+
+        Returns:
+            asyncio.Task: Tarea de la escritura, o None si se descartó.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return None
+            self.pending += 1
+        task = asyncio.ensure_future(self.executor.run(self._write, os.path.join(self.directory, filename), data))
+        # Se guarda la referencia para que la tarea no se recolecte antes de terminar
+        self._tasks.add(task)
+        task.add_done_callback(self._write_done)
+        return task
+
+    def _write_done(self, task):
+        self._tasks.discard(task)
+        with self._lock:
+            self.pending -= 1
+
+    def _write(self, path, data):
+        try:
+            with open(path, 'wb') as buffer:
+                buffer.write(data)
+            with self._lock:
+                self._retained.append(path)
+                expired = [self._retained.popleft() for _ in range(len(self._retained) - self.max_images)]
+            for old_path in expired:
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self.written += 1
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Error al guardar la imagen {path}: {e}")  # Logging
+
+    def stats(self):
+        with self._lock:
+            return {
+                'retained': len(self._retained),
+                'max_images': self.max_images,
+                'pending': self.pending,
+                'written': self.written,
+                'dropped': self.dropped,
+                'errors': self.errors
+            }
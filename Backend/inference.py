@@ -1,8 +1,11 @@
 import os
+import threading
+import time
 import numpy as np
 import cv2
-import tensorflow as tf
-from tensorflow.keras.models import load_model
+
+from metrics import INFERENCE_STAGE_SECONDS
+from preprocessing import IMAGE_SIZE, preprocess_batch, resize
 
 # Definir las etiquetas de las clases en el orden correcto
 CLASS_LABELS = ['Blight', 'Common_Rust', 'Gray_Leaf_Spot', 'Healthy']
@@ -10,63 +13,449 @@ CLASS_LABELS = ['Blight', 'Common_Rust', 'Gray_Leaf_Spot', 'Healthy']
 # Ruta al modelo entrenado
 MODEL_PATH = os.path.join('models', 'Corn_efficientnet_modelBueno.h5')
 
-# Cargar el modelo al iniciar el módulo
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"No se encontró el modelo en la ruta especificada: {MODEL_PATH}")
-
-MODEL = load_model(MODEL_PATH)
-
-# Función de mejora de imagen
-def enhance_image(image):
-    image = cv2.addWeighted(image, 1.5, image, -0.5, 0)
-    kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-    image = cv2.filter2D(image, -1, kernel)
-    
-    # Ajuste de HSV
-    hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
-    hue, saturation, value = cv2.split(hsv)
-    value = np.clip(value * 1.25, 0, 255).astype(np.uint8)
-    hsv = cv2.merge([hue, saturation, value])
-    image = cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
-    
-    return image
+# Backend de inferencia: 'keras' (modelo .h5) o 'tflite' (modelo exportado con `export_model.py`)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")
+TFLITE_MODEL_PATH = os.getenv("TFLITE_MODEL_PATH", os.path.join('models', 'corn_model.tflite'))
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", 2))
 
-# Función para realizar la inferencia
-def predict_image(image_path):
+# Hilos de TensorFlow dentro de una operación (intra-op) y entre operaciones (inter-op); 0 deja los de TensorFlow
+INTRA_OP_THREADS = int(os.getenv("INFERENCE_INTRA_OP_THREADS", 0))
+INTER_OP_THREADS = int(os.getenv("INFERENCE_INTER_OP_THREADS", 0))
+
+# Cada cuántos segundos se revisa si cambió el archivo del modelo para recargarlo
+MODEL_CHECK_INTERVAL = float(os.getenv("INFERENCE_MODEL_CHECK_INTERVAL", 5))
+
+# El modelo del backend configurado se carga bajo demanda (o al arrancar la API, en segundo plano)
+MODEL = None
+_models = {}
+# Huella del archivo de cada modelo cargado y última revisión del archivo
+_loaded_fingerprints = {}
+_checked_at = {}
+_load_lock = threading.Lock()
+
+
+class TFLiteModel:
+    """
+    Modelo exportado a TensorFlow Lite con la misma interfaz `predict_on_batch` que Keras.
+
+    El intérprete no se puede compartir entre hilos, así que cada hilo del executor
+    tiene el suyo; el tamaño del lote de la entrada se ajusta solo cuando cambia.
+    """
+
+    def __init__(self, path, num_threads=None):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No se encontró el modelo en la ruta especificada: {path}")
+        try:
+            # Runtime ligero si está instalado; si no, el incluido en TensorFlow
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self._interpreter_class = Interpreter
+        with open(path, 'rb') as model_file:
+            self._model_content = model_file.read()
+        self.path = path
+        self.num_threads = num_threads or TFLITE_NUM_THREADS
+        self._local = threading.local()
+        # Validar el modelo al cargarlo y no en la primera solicitud
+        self._interpreter()
+
+    def _interpreter(self):
+        interpreter = getattr(self._local, 'interpreter', None)
+        if interpreter is None:
+            interpreter = self._interpreter_class(model_content=self._model_content, num_threads=self.num_threads)
+            interpreter.allocate_tensors()
+            self._local.interpreter = interpreter
+            self._local.batch_size = interpreter.get_input_details()[0]['shape'][0]
+        return interpreter
+
+    def predict_on_batch(self, image_batch):
+        interpreter = self._interpreter()
+        input_details = interpreter.get_input_details()[0]
+        if self._local.batch_size != len(image_batch):
+            interpreter.resize_tensor_input(input_details['index'], image_batch.shape)
+            interpreter.allocate_tensors()
+            self._local.batch_size = len(image_batch)
+
+        interpreter.set_tensor(input_details['index'], image_batch.astype(input_details['dtype'], copy=False))
+        interpreter.invoke()
+        return interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+
+
+def configure_threads(intra_op=None, inter_op=None, backend=None):
+    """
+    Fija los hilos de inferencia antes de cargar el modelo. En TensorFlow solo se pueden fijar
+    antes de que arranque su runtime; con TFLite, `intra_op` son los hilos del intérprete.
+
+    Args:
+        intra_op (int): Hilos por operación; por defecto `INFERENCE_INTRA_OP_THREADS`.
+        inter_op (int): Operaciones en paralelo; por defecto `INFERENCE_INTER_OP_THREADS`.
+        backend (str): 'keras' o 'tflite'; por defecto `INFERENCE_BACKEND`.
+    """
+    global TFLITE_NUM_THREADS
+    intra_op = INTRA_OP_THREADS if intra_op is None else intra_op
+    inter_op = INTER_OP_THREADS if inter_op is None else inter_op
+    if (backend or INFERENCE_BACKEND) == 'tflite':
+        if intra_op:
+            TFLITE_NUM_THREADS = intra_op
+        return
+    if not (intra_op or inter_op):
+        return
+
+    import tensorflow as tf
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        print(f"No se pudieron fijar los hilos de TensorFlow (el runtime ya estaba iniciado): {e}")  # Logging
+
+
+def _load_model(backend):
+    if backend == 'keras':
+        if not os.path.exists(MODEL_PATH):
+            raise FileNotFoundError(f"No se encontró el modelo en la ruta especificada: {MODEL_PATH}")
+        from tensorflow.keras.models import load_model
+        # Los hilos de TensorFlow solo se pueden fijar antes de la primera carga
+        if backend not in _loaded_fingerprints:
+            configure_threads(backend='keras')
+        return load_model(MODEL_PATH)
+    if backend == 'tflite':
+        configure_threads(backend='tflite')
+        return TFLiteModel(TFLITE_MODEL_PATH)
+    raise ValueError(f"Backend de inferencia desconocido: {backend}")
+
+
+def _model_changed(backend):
+    """Indica si el archivo del modelo cargado cambió (se revisa a lo más cada `MODEL_CHECK_INTERVAL`)."""
+    if backend not in _loaded_fingerprints:
+        return False
+    now = time.monotonic()
+    if now - _checked_at.get(backend, 0) < MODEL_CHECK_INTERVAL:
+        return False
+    _checked_at[backend] = now
+    current = model_fingerprint(backend)
+    return current is not None and current != _loaded_fingerprints[backend]
+
+
+def load(backend=None):
+    """
+    Carga el modelo de un backend una sola vez y lo devuelve.
+
+    Si el archivo del modelo se reemplaza, la siguiente llamada (pasado `MODEL_CHECK_INTERVAL`)
+    carga el nuevo; si la recarga falla se sigue usando el modelo anterior.
+
+    Args:
+        backend (str): 'keras' o 'tflite'; por defecto `INFERENCE_BACKEND`.
+    """
+    global MODEL
+    backend = backend or INFERENCE_BACKEND
+    model = MODEL if backend == INFERENCE_BACKEND and MODEL is not None else _models.get(backend)
+    if model is not None and not _model_changed(backend):
+        return model
+
+    with _load_lock:
+        current = _models.get(backend)
+        if current is not None and current is not model:
+            # Otro hilo ya lo recargó
+            return current
+        fingerprint = model_fingerprint(backend)
+        try:
+            new_model = _load_model(backend)
+        except Exception as e:
+            if model is None:
+                raise
+            print(f"No se pudo recargar el modelo '{backend}'; se sigue usando el anterior: {e}")  # Logging
+            return model
+        _models[backend] = new_model
+        _loaded_fingerprints[backend] = fingerprint
+        _checked_at[backend] = time.monotonic()
+
+    if backend == INFERENCE_BACKEND:
+        MODEL = new_model
+    return new_model
+
+
+def loaded_fingerprint(backend=None):
+    """
+    Huella del archivo con el que se cargó el modelo en este proceso (ver `model_fingerprint`),
+    o None si aún no se carga. Cambia cuando `load` recarga un modelo reemplazado.
+    """
+    return _loaded_fingerprints.get(backend or INFERENCE_BACKEND)
+
+
+def model_fingerprint(backend=None):
+    """
+    Identifica la versión del archivo del modelo de un backend (ruta, fecha de modificación y tamaño),
+    para invalidar resultados guardados cuando se reemplaza el modelo.
+
+    Returns:
+        tuple: Huella del archivo, o None si no existe.
+    """
+    backend = backend or INFERENCE_BACKEND
+    path = TFLITE_MODEL_PATH if backend == 'tflite' else MODEL_PATH
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return backend, path, stat.st_mtime_ns, stat.st_size
+
+
+def preprocess_image(image_path):
+    """
+    Carga una imagen y la prepara para el modelo.
+
+    Args:
+        image_path (str): Ruta de la imagen.
+
+    Returns:
+        np.ndarray: Imagen de 256x256x3 en float32 normalizada a [0, 1].
+    """
     # Verifica si el archivo existe
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"El archivo {image_path} no existe.")
-    
-    # Carga la imagen utilizando OpenCV
-    image = cv2.imread(image_path)
-    if image is None:
-        raise ValueError(f"No se pudo cargar la imagen {image_path}.")
-    
-    # Convierte la imagen de BGR a RGB
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    
-    # Redimensiona la imagen a 256x256
-    image_resized = cv2.resize(image_rgb, (256, 256))
-    
-    # Aplica la función de mejora de imagen
-    image_enhanced = enhance_image(image_resized)
-    
-    # Normaliza la imagen
-    image_normalized = image_enhanced / 255.0
-    
+
+    with INFERENCE_STAGE_SECONDS.labels('decode').time():
+        # Carga la imagen utilizando OpenCV
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"No se pudo cargar la imagen {image_path}.")
+
+        # Convierte la imagen de BGR a RGB
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    return prepare_image(image_rgb)
+
+
+def decode_bytes(data):
+    """
+    Decodifica una imagen desde memoria (p. ej. el contenido de una subida).
+
+    Args:
+        data (bytes): Contenido del archivo JPEG o PNG.
+
+    Returns:
+        np.ndarray: Imagen RGB en uint8 con su tamaño original.
+
+    Raises:
+        ValueError: Si los bytes no son una imagen válida.
+    """
+    with INFERENCE_STAGE_SECONDS.labels('decode').time():
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("No se pudo decodificar la imagen.")
+
+        # Convierte la imagen de BGR a RGB
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+# Reducciones que el decodificador puede hacer directamente (en JPEG, sin decodificar a tamaño completo)
+REDUCED_DECODE_FLAGS = {
+    0.5: cv2.IMREAD_REDUCED_COLOR_2,
+    0.25: cv2.IMREAD_REDUCED_COLOR_4,
+    0.125: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+
+def decode_factor(scale):
+    """Reducción que hace el decodificador para `scale`: la menor de 1/2, 1/4 y 1/8 que no baja de `scale`, o 1."""
+    return min((factor for factor in REDUCED_DECODE_FLAGS if factor >= scale), default=1.0)
+
+
+def decode_scaled(data, scale=1.0):
+    """
+    Decodifica una imagen desde memoria reducida por `scale`.
+
+    El decodificador reduce primero a 1/2, 1/4 u 1/8 (ver `decode_factor`) y lo que falte se
+    ajusta después, así que con JPEG una foto muy grande nunca ocupa memoria a tamaño completo.
+
+    Args:
+        data (bytes): Contenido del archivo JPEG o PNG.
+        scale (float): Factor de reducción entre 0 y 1.
+
+    Returns:
+        np.ndarray: Imagen RGB en uint8.
+
+    Raises:
+        ValueError: Si los bytes no son una imagen válida.
+    """
+    factor = decode_factor(scale)
+    if factor == 1:
+        image_rgb = decode_bytes(data)
+    else:
+        with INFERENCE_STAGE_SECONDS.labels('decode').time():
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), REDUCED_DECODE_FLAGS[factor])
+            if image is None:
+                raise ValueError("No se pudo decodificar la imagen.")
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    if scale < factor:
+        height, width = image_rgb.shape[:2]
+        ratio = scale / factor
+        size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+        image_rgb = cv2.resize(image_rgb, size, interpolation=cv2.INTER_AREA)
+    return image_rgb
+
+
+def decode_resized(data):
+    """
+    Decodifica una imagen desde memoria y la redimensiona al tamaño de entrada del modelo.
+
+    Son exactamente los pixeles de los que depende la predicción, así que sirven como llave
+    de la caché de resultados.
+
+    Args:
+        data (bytes): Contenido del archivo JPEG o PNG.
+
+    Returns:
+        np.ndarray: Imagen RGB de 256x256 en uint8.
+    """
+    image_rgb = decode_bytes(data)
+    with INFERENCE_STAGE_SECONDS.labels('resize').time():
+        return resize(image_rgb)
+
+
+def preprocess_bytes(data):
+    """
+    Decodifica una imagen desde memoria y la prepara para el modelo.
+
+    Args:
+        data (bytes): Contenido del archivo JPEG o PNG.
+
+    Returns:
+        np.ndarray: Imagen de 256x256x3 en float32 normalizada a [0, 1].
+
+    Raises:
+        ValueError: Si los bytes no son una imagen válida.
+    """
+    return prepare_image(decode_bytes(data))
+
+
+def prepare_image(image_rgb):
+    """
+    Redimensiona, mejora y normaliza una imagen RGB ya decodificada.
+
+    Args:
+        image_rgb (np.ndarray): Imagen RGB en uint8.
+
+    Returns:
+        np.ndarray: Imagen de 256x256x3 en float32 normalizada a [0, 1].
+    """
+    with INFERENCE_STAGE_SECONDS.labels('preprocess').time():
+        # Redimensiona a 256x256 (si no lo está ya), mejora y normaliza (el mismo preprocesamiento del entrenamiento)
+        if image_rgb.shape[1::-1] != IMAGE_SIZE:
+            image_rgb = resize(image_rgb)
+        return preprocess_batch(image_rgb)[0]
+
+
+def predict_probabilities(image_batch, backend=None):
+    """
+    Probabilidades de cada clase para un lote de imágenes preprocesadas.
+
+    Args:
+        image_batch (np.ndarray): Arreglo (N, 256, 256, 3) de `preprocess_image`.
+        backend (str): 'keras' o 'tflite'; por defecto `INFERENCE_BACKEND`.
+
+    Returns:
+        np.ndarray: Arreglo (N, clases).
+    """
+    model = load(backend)
+    with INFERENCE_STAGE_SECONDS.labels('predict').time():
+        # `predict_on_batch` evita el costo fijo de armar el pipeline de datos de `predict`
+        return np.asarray(model.predict_on_batch(image_batch))
+
+
+def labels_from_probabilities(predictions):
+    """
+    Returns:
+        list: Tuplas (etiqueta, confianza) de la clase más probable de cada fila.
+    """
+    predicted_indexes = np.argmax(predictions, axis=1)
+    return [
+        (CLASS_LABELS[index], float(prediction[index]))
+        for index, prediction in zip(predicted_indexes, predictions)
+    ]
+
+
+def predict_batch(image_batch, backend=None):
+    """
+    Clasifica un lote de imágenes preprocesadas con una sola pasada del modelo.
+
+    Args:
+        image_batch (np.ndarray): Arreglo (N, 256, 256, 3) de `preprocess_image`.
+        backend (str): 'keras' o 'tflite'; por defecto `INFERENCE_BACKEND`.
+
+    Returns:
+        list: Tuplas (etiqueta, confianza), una por imagen.
+    """
+    # Clase con mayor probabilidad y su confianza
+    return labels_from_probabilities(predict_probabilities(image_batch, backend))
+
+
+# Función para realizar la inferencia
+def predict_image(image_path, backend=None):
     # Expande las dimensiones para que sea compatible con el modelo
-    image_batch = np.expand_dims(image_normalized, axis=0)
-    
-    # Realiza la predicción
-    predictions = MODEL.predict(image_batch)
-    
-    # Obtiene el índice de la clase con mayor probabilidad
-    predicted_index = np.argmax(predictions, axis=1)[0]
-    
-    # Obtiene la confianza de la predicción
-    confidence = float(predictions[0][predicted_index])
-    
-    # Obtiene la etiqueta de la clase
-    predicted_label = CLASS_LABELS[predicted_index]
-    
-    return predicted_label, confidence
\ No newline at end of file
+    image_batch = np.expand_dims(preprocess_image(image_path), axis=0)
+    return predict_batch(image_batch, backend)[0]
+
+# Lado de cada mosaico en la inferencia por mosaicos (el tamaño de entrada del modelo)
+TILE_SIZE = IMAGE_SIZE[0]
+
+
+def tile_positions(length, stride, tile=TILE_SIZE):
+    """
+    Inicios de las ventanas a lo largo de un eje; la última se alinea al borde para cubrir toda la imagen.
+
+    Args:
+        length (int): Largo del eje en pixeles (al menos `tile`).
+        stride (int): Paso entre ventanas.
+        tile (int): Lado de la ventana.
+
+    Returns:
+        list: Posiciones de inicio.
+    """
+    last = length - tile
+    positions = list(range(0, last + 1, stride))
+    if positions[-1] != last:
+        positions.append(last)
+    return positions
+
+
+def iter_tile_rows(image_rgb, stride=TILE_SIZE, batch_size=32, backend=None, predict=None):
+    """
+    Clasifica una imagen a resolución completa por mosaicos de 256x256, una fila de mosaicos a la vez.
+
+    Los mosaicos son vistas de la imagen (sin copiarla); solo los tensores de la fila en curso
+    están en memoria, así que el uso de memoria no crece con el alto de la imagen.
+
+    Args:
+        image_rgb (np.ndarray): Imagen RGB en uint8; si algún lado mide menos de 256 se rellena por reflejo.
+        stride (int): Paso entre mosaicos (menor que 256 para que se traslapen).
+        batch_size (int): Mosaicos por pasada del modelo.
+        backend (str): 'keras' o 'tflite'; por defecto `INFERENCE_BACKEND`.
+        predict (callable): Función que devuelve las probabilidades de un lote (p. ej. el pool de
+            procesos de inferencia); por defecto el modelo cargado en este proceso.
+
+    Yields:
+        tuple: (y, posiciones x, índices de clase, confianzas) de cada fila de mosaicos.
+    """
+    height, width = image_rgb.shape[:2]
+    if height < TILE_SIZE or width < TILE_SIZE:
+        image_rgb = cv2.copyMakeBorder(
+            image_rgb, 0, max(0, TILE_SIZE - height), 0, max(0, TILE_SIZE - width), cv2.BORDER_REFLECT_101
+        )
+    if predict is None:
+        model = load(backend)
+        predict = model.predict_on_batch
+    xs = tile_positions(image_rgb.shape[1], stride)
+    for y in tile_positions(image_rgb.shape[0], stride):
+        band = image_rgb[y:y + TILE_SIZE]
+        classes, confidences = [], []
+        for start in range(0, len(xs), batch_size):
+            tiles = [band[:, x:x + TILE_SIZE] for x in xs[start:start + batch_size]]
+            with INFERENCE_STAGE_SECONDS.labels('tile_preprocess').time():
+                image_batch = preprocess_batch(tiles)
+            with INFERENCE_STAGE_SECONDS.labels('tile_predict').time():
+                probabilities = np.asarray(predict(image_batch))
+            classes.append(probabilities.argmax(axis=1))
+            confidences.append(probabilities.max(axis=1))
+        yield y, xs, np.concatenate(classes), np.concatenate(confidences)
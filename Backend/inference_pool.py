@@ -0,0 +1,351 @@
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import inference
+
+# Forma de una imagen preprocesada y número de clases del modelo
+INPUT_SHAPE = (*inference.IMAGE_SIZE[::-1], 3)
+NUM_CLASSES = len(inference.CLASS_LABELS)
+
+
+class _Slot:
+    """Bloque de memoria compartida para un lote: entradas (N×256×256×3) y salidas (N×clases) en float32."""
+
+    def __init__(self, max_batch_size, name=None):
+        input_bytes = max_batch_size * int(np.prod(INPUT_SHAPE)) * 4
+        output_bytes = max_batch_size * NUM_CLASSES * 4
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=input_bytes + output_bytes)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.inputs = np.ndarray((max_batch_size, *INPUT_SHAPE), dtype=np.float32, buffer=self.memory.buf)
+        self.outputs = np.ndarray(
+            (max_batch_size, NUM_CLASSES), dtype=np.float32, buffer=self.memory.buf, offset=input_bytes
+        )
+        self.done = threading.Event()
+        self.error = None
+        # El lote agotó su tiempo: el bloque vuelve a la lista de libres cuando llegue su resultado
+        self.abandoned = False
+
+    def close(self, unlink=False):
+        # Soltar las vistas antes de cerrar el bloque
+        self.inputs = self.outputs = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def _worker_main(index, slot_names, max_batch_size, tasks, results, current, backend, model_path,
+                 intra_op_threads, inter_op_threads, cpus):
+    """
+    Proceso de inferencia: fija sus hilos (y sus CPUs, si se indicaron), carga el modelo una
+    vez y atiende lotes de la cola hasta recibir None. En `current[index]` deja el bloque que
+    está calculando, para que el pool pueda resolverlo si el proceso muere a medio lote.
+    """
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    # También limita los pools de OpenMP/MKL que no controla `tf.config.threading`
+    os.environ['OMP_NUM_THREADS'] = str(intra_op_threads)
+    try:
+        if backend:
+            inference.INFERENCE_BACKEND = backend
+        if model_path:
+            if inference.INFERENCE_BACKEND == 'tflite':
+                inference.TFLITE_MODEL_PATH = model_path
+            else:
+                inference.MODEL_PATH = model_path
+        # `load` los aplica antes de arrancar el runtime de TensorFlow
+        inference.INTRA_OP_THREADS = intra_op_threads
+        inference.INTER_OP_THREADS = inter_op_threads
+        inference.load()
+        slots = [_Slot(max_batch_size, name) for name in slot_names]
+    except Exception as e:
+        results.put(('failed', index, repr(e), None))
+        return
+
+    results.put(('ready', index, None, inference.loaded_fingerprint()))
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        slot_id, count = task
+        slot = slots[slot_id]
+        current[index] = slot_id
+        try:
+            # `load` recarga el modelo si se reemplazó su archivo
+            model = inference.load()
+            slot.outputs[:count] = np.asarray(model.predict_on_batch(slot.inputs[:count]))
+            error = None
+        except Exception as e:
+            error = repr(e)
+        current[index] = -1
+        results.put(('done', slot_id, error, inference.loaded_fingerprint()))
+
+    for slot in slots:
+        slot.close()
+
+
+class InferencePool:
+    """
+    Pool de procesos de inferencia, cada uno con su propia copia del modelo y un número fijo de
+    hilos de TensorFlow, para que las solicitudes concurrentes no se peleen por los núcleos.
+
+    Los lotes se reparten por una cola común; los tensores van y vienen por bloques de memoria
+    compartida (dos por proceso, para preparar el siguiente lote mientras se calcula el actual),
+    así que por la cola solo viaja el número de bloque y no los arreglos serializados.
+
+    Un hilo de vigilancia reinicia los procesos que mueren; si uno no puede volver a cargar el
+    modelo se deja de reiniciar, y cuando no queda ninguno las solicitudes fallan de inmediato.
+    """
+
+    def __init__(self, workers, intra_op_threads=1, inter_op_threads=1, max_batch_size=32,
+                 backend=None, model_path=None, pin_cpus=False, timeout=60.0):
+        """
+        Args:
+            workers (int): Procesos de inferencia.
+            intra_op_threads (int): Hilos por operación en cada proceso.
+            inter_op_threads (int): Operaciones en paralelo en cada proceso.
+            max_batch_size (int): Imágenes máximas por lote (tamaño de cada bloque compartido).
+            backend (str): 'keras' o 'tflite'; por defecto el de `inference`.
+            model_path (str): Ruta del modelo; por defecto la de `inference`.
+            pin_cpus (bool): Fijar cada proceso a `intra_op_threads` CPUs propias.
+            timeout (float): Segundos máximos de espera de un lote (y de un bloque libre).
+        """
+        self.workers = workers
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.max_batch_size = max_batch_size
+        self.backend = backend
+        self.model_path = model_path
+        self.pin_cpus = pin_cpus
+        self.timeout = timeout
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.restarts = 0
+        # Huella del modelo con el que respondió el último proceso (ver `inference.loaded_fingerprint`)
+        self.model_fingerprint = None
+        self._processes = []
+        # Procesos que no pudieron volver a cargar el modelo: ya no se reinician
+        self._failed = set()
+        self._closing = threading.Event()
+        self._watchdog_thread = None
+        self._slots = []
+        self._free = queue.Queue()
+        self._results_thread = None
+        self._lock = threading.Lock()
+
+    def _cpus(self, index):
+        if not self.pin_cpus:
+            return None
+        available = sorted(os.sched_getaffinity(0))
+        start = index * self.intra_op_threads
+        return [available[(start + offset) % len(available)] for offset in range(self.intra_op_threads)]
+
+    def _spawn(self, index):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, [slot.memory.name for slot in self._slots], self.max_batch_size, self._tasks,
+                  self._results, self._current, self.backend, self.model_path, self.intra_op_threads,
+                  self.inter_op_threads, self._cpus(index)),
+            name=f"inference-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def start(self, startup_timeout=300.0):
+        """
+        Crea los bloques compartidos, lanza los procesos y espera a que todos carguen el modelo.
+
+        Raises:
+            RuntimeError: Si algún proceso no pudo cargar el modelo o no respondió a tiempo.
+        """
+        # `spawn`: TensorFlow no es seguro después de `fork`
+        self._context = multiprocessing.get_context('spawn')
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._current = self._context.Array('i', [-1] * self.workers, lock=False)
+        self._slots = [_Slot(self.max_batch_size) for _ in range(2 * self.workers)]
+        for slot_id in range(len(self._slots)):
+            self._free.put(slot_id)
+        self._processes = [self._spawn(index) for index in range(self.workers)]
+
+        for _ in range(self.workers):
+            try:
+                status, index, error, fingerprint = self._results.get(timeout=startup_timeout)
+            except queue.Empty:
+                self.close()
+                raise RuntimeError("Los procesos de inferencia no terminaron de cargar el modelo a tiempo")
+            if status == 'failed':
+                self.close()
+                raise RuntimeError(f"El proceso de inferencia {index} no pudo cargar el modelo: {error}")
+            self.model_fingerprint = fingerprint
+
+        self._results_thread = threading.Thread(target=self._collect_results, name="inference-pool-results", daemon=True)
+        self._results_thread.start()
+        self._watchdog_thread = threading.Thread(target=self._watchdog, name="inference-pool-watchdog", daemon=True)
+        self._watchdog_thread.start()
+        return self
+
+    def _finish(self, slot_id, error):
+        """Entrega el resultado de un bloque a quien lo espera, o lo libera si ya nadie lo espera."""
+        slot = self._slots[slot_id]
+        with self._lock:
+            if slot.abandoned:
+                slot.abandoned = False
+                self._free.put(slot_id)
+                return
+            slot.error = error
+            slot.done.set()
+
+    def _collect_results(self):
+        """Avisa a quien espera cada bloque cuando su proceso termina el lote."""
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            status, value, error, fingerprint = message
+            if fingerprint is not None:
+                self.model_fingerprint = fingerprint
+            if status == 'done':
+                self._finish(value, error)
+            elif status == 'failed':
+                # Un proceso reiniciado no pudo cargar el modelo; no se vuelve a intentar
+                print(f"El proceso de inferencia {value} no pudo volver a cargar el modelo: {error}")  # Logging
+                with self._lock:
+                    self._failed.add(value)
+
+    def _watchdog(self, interval=1.0):
+        """
+        Reinicia los procesos que murieron (p. ej. por falta de memoria) y resuelve con error el
+        lote que tenían a medias, para que su bloque no se pierda.
+        """
+        while not self._closing.wait(interval):
+            for index, process in enumerate(self._processes):
+                if process.is_alive() or self._closing.is_set():
+                    continue
+                with self._lock:
+                    if index in self._failed:
+                        continue
+                    self.restarts += 1
+                print(f"El proceso de inferencia {index} terminó con código {process.exitcode}; reiniciando")  # Logging
+                slot_id = self._current[index]
+                self._current[index] = -1
+                if slot_id >= 0:
+                    self._finish(slot_id, f"El proceso de inferencia {index} terminó a medio lote")
+                self._processes[index] = self._spawn(index)
+
+    def alive(self):
+        """Returns: int: Procesos vivos o que se están reiniciando."""
+        with self._lock:
+            return sum(
+                process.is_alive() or index not in self._failed
+                for index, process in enumerate(self._processes)
+            )
+
+    def predict_probabilities(self, image_batch):
+        """
+        Calcula las probabilidades de un lote en algún proceso del pool. Bloquea hasta tener el resultado.
+
+        Args:
+            image_batch (np.ndarray): Arreglo (N, 256, 256, 3) en float32.
+
+        Returns:
+            np.ndarray: Arreglo (N, clases).
+
+        Raises:
+            RuntimeError: Si el proceso falló al calcular el lote.
+            TimeoutError: Si no hubo bloque libre o el lote no terminó en `timeout` segundos.
+        """
+        if len(image_batch) > self.max_batch_size:
+            return np.concatenate([
+                self.predict_probabilities(image_batch[start:start + self.max_batch_size])
+                for start in range(0, len(image_batch), self.max_batch_size)
+            ])
+
+        # Fallar de inmediato si ningún proceso pudo cargar el modelo
+        if not self.alive():
+            raise RuntimeError("No hay procesos de inferencia disponibles")
+
+        count = len(image_batch)
+        try:
+            slot_id = self._free.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"El pool de inferencia no tuvo un bloque libre en {self.timeout} s")
+        slot = self._slots[slot_id]
+        slot.inputs[:count] = image_batch
+        slot.done.clear()
+        self._tasks.put((slot_id, count))
+        if not slot.done.wait(self.timeout):
+            with self._lock:
+                # El resultado pudo llegar justo al agotarse el tiempo
+                if not slot.done.is_set():
+                    # Un proceso lento todavía escribirá en el bloque: se libera al llegar su resultado
+                    slot.abandoned = True
+                    self.failed_batches += 1
+                    raise TimeoutError(f"El pool de inferencia no respondió en {self.timeout} s")
+
+        try:
+            if slot.error is not None:
+                with self._lock:
+                    self.failed_batches += 1
+                raise RuntimeError(f"Error en el proceso de inferencia: {slot.error}")
+            with self._lock:
+                self.batches += 1
+                self.items += count
+            return slot.outputs[:count].copy()
+        finally:
+            self._free.put(slot_id)
+
+    def predict_batch(self, image_batch):
+        """
+        Igual que `inference.predict_batch`, pero en el pool.
+
+        Returns:
+            list: Tuplas (etiqueta, confianza), una por imagen.
+        """
+        return inference.labels_from_probabilities(self.predict_probabilities(image_batch))
+
+    def close(self):
+        """Detiene los procesos y libera los bloques compartidos."""
+        self._closing.set()
+        if self._watchdog_thread is not None:
+            self._watchdog_thread.join(timeout=5)
+            self._watchdog_thread = None
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        if self._results_thread is not None:
+            self._results.put(None)
+            self._results_thread.join(timeout=5)
+            self._results_thread = None
+        for slot in self._slots:
+            slot.close(unlink=True)
+        self._slots = []
+
+    def stats(self):
+        alive = sum(process.is_alive() for process in self._processes)
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'alive': alive,
+                'restarts': self.restarts,
+                'failed_workers': sorted(self._failed),
+                'intra_op_threads': self.intra_op_threads,
+                'inter_op_threads': self.inter_op_threads,
+                'max_batch_size': self.max_batch_size,
+                'free_slots': self._free.qsize(),
+                'batches': self.batches,
+                'images': self.items,
+                'failed_batches': self.failed_batches
+            }
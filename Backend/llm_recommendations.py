@@ -1,9 +1,12 @@
 import os
+import time
 import openai
 from llama_index.core.llms import ChatMessage
 from llama_index.llms.openai import OpenAI
 from dotenv import load_dotenv
 
+from metrics import LLM_QUESTION_SECONDS, upstream_timer
+
 load_dotenv()
 
 # Cargar la clave de API de OpenAI desde las variables de entorno
@@ -66,12 +69,17 @@ def generate_recommendations(report_data):
             ChatMessage(role="user", content=question),
         ]
 
+        started_at = time.perf_counter()
         try:
-            response = OpenAI(model="gpt-4").chat(messages)
+            with upstream_timer('openai', 'chat'):
+                response = OpenAI(model="gpt-4").chat(messages)
             recommendations.append(response)
+            outcome = 'ok'
         except Exception as e:
             print(f"Error al procesar la pregunta: {e}")
             recommendations.append("No response due to error.")
+            outcome = 'error'
+        LLM_QUESTION_SECONDS.labels(outcome).observe(time.perf_counter() - started_at)
 
     return recommendations
 
@@ -1,38 +1,185 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import UploadFile as FormFile
+from starlette.formparsers import MultiPartException, MultiPartParser
 
 from pydantic import BaseModel
-import requests
-import ee  # Earth Engine
+import aiohttp
+import base64
+import numpy as np
 import pandas as pd
 import datetime
 import asyncio
+import functools
+import time
 
+from contextlib import asynccontextmanager
 import json
 import os
-import shutil
+import uuid
 from dotenv import load_dotenv
-from typing import List
+from typing import List, Optional
 
-# Importar la función de inferencia
-from inference import predict_image
+from cache import TTLCache, snap
 
-from llm_recommendations import generate_recommendations
+from disk_cache import open_disk_cache
+
+from singleflight import SingleFlight
+
+from executors import AsyncLimiter, SourceExecutor
+
+from et_index import ETIndex
+
+from et_forecast_store import load_store
+
+from prefetch import PrefetchScheduler
+
+from components import Component
+
+from batcher import InferenceBatcher
+
+from result_cache import InferenceResultCache
+
+from heatmap import encode_jpeg, render_overlay
+
+from image_store import ImageStore
+
+from inference_pool import InferencePool
+
+from uploads import (
+    MAX_UPLOAD_BYTES,
+    UploadLimitMiddleware,
+    UploadTooLarge,
+    image_size,
+    iter_upload_images,
+    read_upload,
+    sniff_image_type
+)
+
+from resilience import CircuitBreaker, CircuitOpenError, Deadline, hedged
+
+from metrics import MetricsMiddleware, REPORT_STAGE_SECONDS, UPSTREAM_ERRORS, register_stats, render, upstream_timer
+
+from earth_engine import (
+    LOCAL_DATA_ERROR,
+    initialize_earth_engine,
+    get_soil_moisture_data,
+    get_closest_available_ndvi,
+    get_earth_engine_data,
+    get_soil_moisture_batch,
+    get_ndvi_batch
+)
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Inicializar la API de Earth Engine
-try:
-    ee.Initialize(project='ee-luisfernandordzdmz')
-except Exception as e:
-    ee.Authenticate()
-    ee.Initialize(project='ee-luisfernandordzdmz')
+# Configuración del cliente HTTP compartido para las APIs meteorológicas
+OPEN_METEO_ARCHIVE_URL = os.getenv("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/weather")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 20))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 60))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", 10))
+
+
+def create_http_session():
+    """
+    Crea la sesión HTTP compartida con pool de conexiones keep-alive.
+
+    Returns:
+        aiohttp.ClientSession: Sesión con límites de conexiones y tiempos de espera explícitos.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_MAX_CONNECTIONS,
+        limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(total=HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+# Pool de procesos de inferencia (0 lo desactiva y el modelo se carga en este proceso). Cada
+# proceso carga el modelo una vez con un número fijo de hilos de TensorFlow
+INFERENCE_POOL_WORKERS = int(os.getenv("INFERENCE_POOL_WORKERS", 0))
+INFERENCE_POOL = InferencePool(
+    INFERENCE_POOL_WORKERS,
+    intra_op_threads=int(os.getenv("INFERENCE_POOL_INTRA_OP_THREADS", 1)),
+    inter_op_threads=int(os.getenv("INFERENCE_POOL_INTER_OP_THREADS", 1)),
+    max_batch_size=int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 32)),
+    pin_cpus=os.getenv("INFERENCE_POOL_PIN_CPUS", "0") == "1"
+) if INFERENCE_POOL_WORKERS > 0 else None
+
+# Executors dedicados por fuente para que una fuente lenta no acapare a las demás
+WEATHER_LIMITER = AsyncLimiter("weather", int(os.getenv("WEATHER_MAX_CONCURRENCY", 32)))
+EE_EXECUTOR = SourceExecutor("earth_engine", int(os.getenv("EE_MAX_WORKERS", 8)))
+ET_EXECUTOR = SourceExecutor("evapotranspiration", int(os.getenv("ET_MAX_WORKERS", 2)))
+# Con el pool, dos hilos por proceso para preparar un lote mientras se calcula otro
+INFERENCE_EXECUTOR = SourceExecutor(
+    "inference", int(os.getenv("INFERENCE_MAX_WORKERS", 2 * INFERENCE_POOL_WORKERS or 2))
+)
+PREPROCESS_EXECUTOR = SourceExecutor("preprocess", int(os.getenv("PREPROCESS_MAX_WORKERS", 4)))
+LLM_EXECUTOR = SourceExecutor("llm", int(os.getenv("LLM_MAX_WORKERS", 4)))
+# Un solo hilo para que las imágenes se escriban y se roten en orden
+IMAGE_WRITER_EXECUTOR = SourceExecutor("image_writer", 1)
+# Lecturas y escrituras de la caché persistente (SQLite) fuera del event loop
+DISK_CACHE_EXECUTOR = SourceExecutor("disk_cache", int(os.getenv("DISK_CACHE_MAX_WORKERS", 4)))
+EXECUTORS = [
+    WEATHER_LIMITER, EE_EXECUTOR, ET_EXECUTOR, INFERENCE_EXECUTOR, PREPROCESS_EXECUTOR, LLM_EXECUTOR,
+    IMAGE_WRITER_EXECUTOR, DISK_CACHE_EXECUTOR
+]
+
+# Presupuesto de latencia de cada reporte: las secciones que no terminan a tiempo se
+# responden como degradadas en lugar de hacer esperar al reporte completo
+REPORT_LATENCY_BUDGET = float(os.getenv("REPORT_LATENCY_BUDGET", 8))
+PREFETCH_LATENCY_BUDGET = float(os.getenv("PREFETCH_LATENCY_BUDGET", 120))
+# Cada consulta del reporte tiene como máximo lo que queda del presupuesto; la sección
+# completa espera este margen extra para que el tiempo agotado lo registre el circuito
+DEADLINE_GRACE = float(os.getenv("DEADLINE_GRACE", 0.25))
+
+# Tiempo máximo de cada consulta a Earth Engine; agotarlo cuenta como fallo para su circuito
+EE_TIMEOUT = float(os.getenv("EE_TIMEOUT", 20))
+
+# Copia de respaldo de las peticiones GET lentas (0 para desactivarla)
+HTTP_HEDGE_DELAY = float(os.getenv("HTTP_HEDGE_DELAY", 0))
+
+# Circuitos por fuente: tras varios fallos seguidos se falla de inmediato durante un tiempo
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", 30))
+BREAKERS = {
+    name: CircuitBreaker(name, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+    for name in ('open_meteo', 'openweather', 'earth_engine')
+}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Crea los recursos compartidos al iniciar la aplicación y los libera al apagarla."""
+    app.state.http_session = create_http_session()
+    # Inicializar los componentes pesados en paralelo sin bloquear el arranque
+    app.state.startup_task = asyncio.gather(*(component.load() for component in COMPONENTS))
+    if PREFETCH_ENABLED:
+        PREFETCH_SCHEDULER.start()
+    try:
+        yield
+    finally:
+        app.state.startup_task.cancel()
+        await PREFETCH_SCHEDULER.stop()
+        await INFERENCE_BATCHER.stop()
+        await app.state.http_session.close()
+        for executor in EXECUTORS:
+            executor.shutdown()
+        if INFERENCE_POOL is not None:
+            INFERENCE_POOL.close()
+
 
 app = FastAPI(
     title="Chinampa API",
     description="API para proporcionar información agrícola basada en datos meteorológicos y satelitales",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -42,63 +189,316 @@ app.add_middleware(
     allow_methods=["*"],  # Permitir todos los métodos HTTP (GET, POST, etc.)
     allow_headers=["*"],  # Permitir todos los headers
 )
+# Corta las subidas demasiado grandes mientras llegan, antes de procesar el formulario
+CLASSIFY_BATCH_MAX_UPLOAD_BYTES = int(os.getenv("CLASSIFY_BATCH_MAX_UPLOAD_MB", 1024)) * 1024 * 1024
+FIELD_MAX_UPLOAD_BYTES = int(os.getenv("FIELD_MAX_UPLOAD_MB", 50)) * 1024 * 1024
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/classify_image": MAX_UPLOAD_BYTES + 64 * 1024,
+    "/classify_images": CLASSIFY_BATCH_MAX_UPLOAD_BYTES,
+    "/classify_field": FIELD_MAX_UPLOAD_BYTES + 64 * 1024
+})
+app.add_middleware(MetricsMiddleware)
 
 # Directorio donde se almacenarán las imágenes
 IMAGE_DIR = "uploaded_images"
 MAX_IMAGES = 10  # Número máximo de imágenes permitidas
 
-# Crear el directorio si no existe
-os.makedirs(IMAGE_DIR, exist_ok=True)
+# Las imágenes se guardan en segundo plano; el directorio se crea si no existe
+IMAGE_STORE = ImageStore(IMAGE_DIR, MAX_IMAGES, IMAGE_WRITER_EXECUTOR)
+
+# Límites de la clasificación por lote (/classify_images)
+CLASSIFY_BATCH_MAX_FILES = int(os.getenv("CLASSIFY_BATCH_MAX_FILES", 1000))
+CLASSIFY_BATCH_MAX_IMAGES = int(os.getenv("CLASSIFY_BATCH_MAX_IMAGES", 2000))
+CLASSIFY_BATCH_MAX_IN_FLIGHT = int(os.getenv("CLASSIFY_BATCH_MAX_IN_FLIGHT", 64))
+
+# Inferencia por mosaicos (/classify_field): mosaicos por pasada del modelo y paso mínimo permitido
+FIELD_TILE_BATCH_SIZE = int(os.getenv("FIELD_TILE_BATCH_SIZE", 32))
+FIELD_MIN_STRIDE = int(os.getenv("FIELD_MIN_STRIDE", 64))
+# Pixeles máximos que se decodifican en memoria (un PNG muy comprimible cabe en 50 MB y ocupa GB)
+FIELD_MAX_MEGAPIXELS = float(os.getenv("FIELD_MAX_MEGAPIXELS", 100))
+
+
+class ImageUploadParser(MultiPartParser):
+    """
+    Parser de formularios de /classify_image: Starlette pasa a un archivo temporal las partes de
+    más de 1 MB; con este límite la imagen se queda en memoria. Solo aplica a esta ruta.
+    """
+    max_file_size = MAX_UPLOAD_BYTES
+
+
+class BatchUploadParser(MultiPartParser):
+    """Parser de formularios de /classify_images: cada archivo pasa a disco a partir de 64 KB."""
+    max_file_size = 64 * 1024
 
 # Clase para recibir la ubicación
 class Location(BaseModel):
     latitude: float
     longitude: float
 
+
+# Clase para registrar una parcela para el precálculo de reportes
+class Field(Location):
+    name: Optional[str] = None
+
 # API Key de OpenWeatherMap (asegúrate de mantenerla segura)
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 
-# Cargar el archivo CSV de evapotranspiración al iniciar la aplicación
-try:
-    forecast_df = pd.read_csv('evapotranspiration_forecast_2023-2024.csv', parse_dates=['Unnamed: 0'])
-    forecast_df.rename(columns={'Unnamed: 0': 'date'}, inplace=True)
-    forecast_df.set_index('date', inplace=True)
-except Exception as e:
-    raise RuntimeError(f"Error al cargar el archivo CSV de evapotranspiración: {e}")
+# Pronósticos de evapotranspiración por celda (generados con `et_forecast_job.py`).
+# Si no existen, o la celda más cercana está demasiado lejos, se usa el CSV global.
+ET_MAX_CELL_DISTANCE_KM = float(os.getenv("ET_MAX_CELL_DISTANCE_KM", 25))
+
 
+def load_evapotranspiration():
+    """
+    Carga el archivo CSV de evapotranspiración y el almacén de pronósticos por celda.
 
-def initialize_earth_engine():
-    """Inicializa Earth Engine en el contexto actual."""
+    Returns:
+        dict: Índice del CSV global ('index') y almacén por celda ('store', puede ser None).
+    """
     try:
-        ee.Initialize()
+        forecast_df = pd.read_csv('evapotranspiration_forecast_2023-2024.csv', parse_dates=['Unnamed: 0'])
+        forecast_df.rename(columns={'Unnamed: 0': 'date'}, inplace=True)
+        forecast_df.set_index('date', inplace=True)
     except Exception as e:
-        print(f"Earth Engine ya está inicializado o falló al inicializar: {e}")
+        raise RuntimeError(f"Error al cargar el archivo CSV de evapotranspiración: {e}")
 
+    return {'index': ETIndex(forecast_df), 'store': load_store()}
 
-def get_weather_data(lat, lon, start_date_str, end_date_str):
+
+def load_inference():
+    """
+    Importa TensorFlow y carga el modelo de clasificación de enfermedades; con el pool de
+    inferencia, el modelo se carga en sus procesos y no en el de la API.
+    """
+    import inference
+    if INFERENCE_POOL is not None:
+        INFERENCE_POOL.start()
+    else:
+        inference.load()
+    return inference
+
+
+def load_llm():
+    """Importa el cliente de LLM y la base de conocimientos."""
+    import llm_recommendations
+    return llm_recommendations
+
+
+# Recursos pesados que se inicializan en segundo plano al arrancar la aplicación
+STARTUP_WAIT_TIMEOUT = float(os.getenv("STARTUP_WAIT_TIMEOUT", 30))
+EARTH_ENGINE = Component("earth_engine", initialize_earth_engine, STARTUP_WAIT_TIMEOUT)
+EVAPOTRANSPIRATION = Component("evapotranspiration", load_evapotranspiration, STARTUP_WAIT_TIMEOUT)
+INFERENCE = Component("inference", load_inference, STARTUP_WAIT_TIMEOUT)
+LLM = Component("llm", load_llm, STARTUP_WAIT_TIMEOUT)
+COMPONENTS = [EARTH_ENGINE, EVAPOTRANSPIRATION, INFERENCE, LLM]
+
+# Cachés por fuente de datos. Cada fuente usa su propia malla para la llave:
+# SMAP se promedia sobre un rectángulo de ±1°, MODIS tiene píxeles de 500 m (~0.0045°)
+# y el clima se resuelve a ~0.01°. SMAP y MODIS solo cambian una vez al día.
+WEATHER_GRID = float(os.getenv("WEATHER_CACHE_GRID", 0.01))
+NDVI_GRID = float(os.getenv("NDVI_CACHE_GRID", 0.0045))
+
+# Segundo nivel en SQLite compartido por los workers y persistente entre reinicios. Las entradas
+# expiradas se siguen sirviendo durante `*_CACHE_STALE_TTL` segundos mientras se refrescan.
+DISK_CACHE = open_disk_cache()
+CACHE_REFRESH_LEASE = int(os.getenv("CACHE_REFRESH_LEASE", 60))
+
+WEATHER_CACHE = TTLCache(
+    "weather",
+    ttl=int(os.getenv("WEATHER_CACHE_TTL", 600)),
+    maxsize=int(os.getenv("WEATHER_CACHE_SIZE", 2048)),
+    store=DISK_CACHE,
+    executor=DISK_CACHE_EXECUTOR,
+    stale_ttl=int(os.getenv("WEATHER_CACHE_STALE_TTL", 3600)),
+    lease_seconds=CACHE_REFRESH_LEASE
+)
+SOIL_MOISTURE_CACHE = TTLCache(
+    "soil_moisture",
+    ttl=int(os.getenv("SOIL_MOISTURE_CACHE_TTL", 6 * 3600)),
+    maxsize=int(os.getenv("SOIL_MOISTURE_CACHE_SIZE", 512)),
+    store=DISK_CACHE,
+    executor=DISK_CACHE_EXECUTOR,
+    stale_ttl=int(os.getenv("SOIL_MOISTURE_CACHE_STALE_TTL", 48 * 3600)),
+    lease_seconds=CACHE_REFRESH_LEASE
+)
+NDVI_CACHE = TTLCache(
+    "ndvi",
+    ttl=int(os.getenv("NDVI_CACHE_TTL", 6 * 3600)),
+    maxsize=int(os.getenv("NDVI_CACHE_SIZE", 4096)),
+    store=DISK_CACHE,
+    executor=DISK_CACHE_EXECUTOR,
+    stale_ttl=int(os.getenv("NDVI_CACHE_STALE_TTL", 48 * 3600)),
+    lease_seconds=CACHE_REFRESH_LEASE
+)
+
+
+def model_fingerprint():
+    """
+    Huella del archivo con el que se cargó el modelo en uso (en este proceso o en el pool); cambia
+    cuando el modelo se recarga tras reemplazar su archivo. None mientras no se ha cargado.
+    """
+    if INFERENCE_POOL is not None:
+        return INFERENCE_POOL.model_fingerprint
+    return INFERENCE.value.loaded_fingerprint() if INFERENCE.value is not None else None
+
+
+# Resultados de clasificación por pixeles de entrada del modelo (reintentos y fotos repetidas).
+# En modo perceptual también aciertan recompresiones de la misma foto.
+INFERENCE_RESULT_CACHE = InferenceResultCache(
+    "inference_results",
+    maxsize=int(os.getenv("INFERENCE_RESULT_CACHE_SIZE", 4096)),
+    fingerprint=model_fingerprint,
+    perceptual=os.getenv("INFERENCE_RESULT_CACHE_PERCEPTUAL", "0") == "1",
+    max_distance=int(os.getenv("INFERENCE_RESULT_CACHE_MAX_DISTANCE", 4))
+)
+CACHES = [WEATHER_CACHE, SOIL_MOISTURE_CACHE, NDVI_CACHE, INFERENCE_RESULT_CACHE]
+
+# Refrescos en segundo plano de entradas viejas (se guarda la referencia para que no se recolecten)
+BACKGROUND_REFRESHES = set()
+
+# Deduplicación de reportes concurrentes para la misma ubicación y fecha
+REPORT_FLIGHTS = SingleFlight("report")
+
+# Deduplicación de clasificaciones concurrentes de la misma imagen (p. ej. reintentos del frontend)
+CLASSIFY_FLIGHTS = SingleFlight("classify")
+
+# Contadores de cachés, executors, deduplicación y componentes expuestos en /metrics
+register_stats(CACHES, EXECUTORS, [REPORT_FLIGHTS, CLASSIFY_FLIGHTS], COMPONENTS, BREAKERS.values())
+
+# Pedir humedad del suelo y NDVI a Earth Engine en una sola petición
+EE_FUSED_QUERY = os.getenv("EE_FUSED_QUERY", "1") == "1"
+
+# Límites del endpoint de reportes por lote
+BATCH_MAX_LOCATIONS = int(os.getenv("BATCH_MAX_LOCATIONS", 500))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 16))
+# Presupuesto de latencia de un lote de reportes (las consultas por lote tardan más que las individuales)
+BATCH_LATENCY_BUDGET = float(os.getenv("BATCH_LATENCY_BUDGET", 30))
+
+
+def is_error(result):
+    return isinstance(result, dict) and 'error' in result
+
+
+def run_in_background(coroutine):
+    """Lanza una corrutina sin esperarla, conservando la referencia hasta que termine."""
+    task = asyncio.ensure_future(coroutine)
+    BACKGROUND_REFRESHES.add(task)
+    task.add_done_callback(BACKGROUND_REFRESHES.discard)
+    return task
+
+
+async def refresh_entry(cache, key, func, *args):
+    """Vuelve a consultar la fuente y actualiza la entrada si el resultado no tiene error."""
+    try:
+        result = await func(*args)
+        if not is_error(result):
+            cache.set_async(key, result)
+    except Exception as e:
+        print(f"Error al refrescar la caché '{cache.name}': {e}")
+
+
+async def cached_call_async(cache, key, func, *args):
+    """
+    Ejecuta `await func(*args)` solo si `key` no está en la caché.
+
+    Si la entrada está vieja se devuelve de inmediato y se refresca en segundo plano.
+    Los resultados con error no se guardan para que el siguiente intento vuelva a consultar la fuente.
+
+    Args:
+        cache (TTLCache): Caché de la fuente de datos.
+        key (tuple): Llave ya ajustada a la malla de la fuente.
+        func (callable): Función asíncrona que obtiene los datos.
+
+    Returns:
+        dict: Resultado de la caché o de `func`.
+    """
+    result, refresh = await cache.lookup_async(key)
+    if result is not None:
+        if refresh:
+            run_in_background(refresh_entry(cache, key, func, *args))
+        return result
+
+    result = await func(*args)
+    if not is_error(result):
+        cache.set_async(key, result)
+    return result
+
+
+async def fetch_json(session, url, params, source, deadline=None):
+    """
+    Realiza una petición GET con la sesión compartida y devuelve el estado y el cuerpo JSON.
+
+    La petición pasa por el circuito del servicio; con `HTTP_HEDGE_DELAY` se lanza una copia
+    si la primera tarda más de ese tiempo. Un estado 5xx se trata como fallo.
+
+    Args:
+        session (aiohttp.ClientSession): Sesión HTTP compartida.
+        url (str): URL del servicio.
+        params (dict): Parámetros de la consulta.
+        source (str): Nombre del servicio para las métricas y el circuito.
+        deadline (Deadline): Presupuesto del reporte; el tiempo máximo de la petición es lo que
+            queda de él, acotado por `HTTP_TOTAL_TIMEOUT`.
+
+    Returns:
+        tuple: Código de estado HTTP y cuerpo decodificado.
+
+    Raises:
+        CircuitOpenError: Si el circuito del servicio está abierto.
+    """
+    async def attempt():
+        with upstream_timer(source, 'get'):
+            async with session.get(url, params=params) as response:
+                if response.status >= 500:
+                    raise Exception(f"{source} respondió con estado {response.status}")
+                if response.status >= 400:
+                    UPSTREAM_ERRORS.labels(source, 'get').inc()
+                return response.status, await response.json(content_type=None)
+
+    timeout = deadline.timeout(HTTP_TOTAL_TIMEOUT) if deadline is not None else None
+    if HTTP_HEDGE_DELAY > 0:
+        return await BREAKERS[source].call(
+            functools.partial(hedged, attempt, delay=HTTP_HEDGE_DELAY), timeout=timeout
+        )
+    return await BREAKERS[source].call(attempt, timeout=timeout)
+
+
+async def get_weather_data(session, lat, lon, start_date_str, end_date_str, deadline=None):
     """
     Obtiene datos meteorológicos históricos y actuales.
 
+    Las consultas a Open-Meteo y OpenWeatherMap se hacen en paralelo sobre la sesión compartida.
+
     Args:
+        session (aiohttp.ClientSession): Sesión HTTP compartida.
         lat (float): Latitud.
         lon (float): Longitud.
         start_date_str (str): Fecha de inicio en formato 'YYYY-MM-DD'.
         end_date_str (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        deadline (Deadline): Presupuesto del reporte para las peticiones (opcional).
 
     Returns:
         dict: Diccionario con los datos meteorológicos.
     """
     try:
-        # Datos históricos de Open-Meteo
-        historical_url = (
-            f"https://archive-api.open-meteo.com/v1/archive?"
-            f"latitude={lat}&longitude={lon}"
-            f"&start_date={start_date_str}&end_date={end_date_str}"
-            f"&daily=temperature_2m_max,temperature_2m_min,precipitation_sum"
-            f"&timezone=UTC"
+        # Datos históricos de Open-Meteo y datos actuales de OpenWeatherMap
+        historical_params = {
+            "latitude": lat,
+            "longitude": lon,
+            "start_date": start_date_str,
+            "end_date": end_date_str,
+            "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
+            "timezone": "UTC"
+        }
+        openweather_params = {
+            "lat": lat,
+            "lon": lon,
+            "units": "metric",
+            "appid": OPENWEATHER_API_KEY or ""
+        }
+        (_, historical_data), (openweather_status, openweather_data) = await asyncio.gather(
+            fetch_json(session, OPEN_METEO_ARCHIVE_URL, historical_params, 'open_meteo', deadline),
+            fetch_json(session, OPENWEATHER_URL, openweather_params, 'openweather', deadline)
         )
-        historical_response = requests.get(historical_url)
-        historical_data = historical_response.json()
 
         if 'daily' not in historical_data:
             raise Exception("Error al obtener datos históricos de Open-Meteo.")
@@ -117,15 +517,7 @@ def get_weather_data(lat, lon, start_date_str, end_date_str):
         avg_temp_last_days = sum(avg_temps) / len(avg_temps) if avg_temps else None
         total_precip_last_days = sum(p for p in precipitations if p is not None) if precipitations else None
 
-        # Datos actuales de OpenWeatherMap
-        openweather_url = (
-            f"https://api.openweathermap.org/data/2.5/weather?"
-            f"lat={lat}&lon={lon}&units=metric&appid={OPENWEATHER_API_KEY}"
-        )
-        openweather_response = requests.get(openweather_url)
-        openweather_data = openweather_response.json()
-
-        if openweather_response.status_code != 200:
+        if openweather_status != 200:
             raise Exception("Error al obtener datos actuales de OpenWeatherMap.")
 
         current_temp = openweather_data['main']['temp']
@@ -139,134 +531,290 @@ def get_weather_data(lat, lon, start_date_str, end_date_str):
         }
 
     except Exception as e:
-        return {'error': f'Error al obtener datos meteorológicos: {e}'}
+        return degraded_result('datos meteorológicos', e)
 
 
-def get_soil_moisture_data(lat, lng, date_str, buffer=1):
+def get_average_et(start_date, end_date, lat=None, lon=None):
     """
-    Obtiene la humedad del suelo promedio en un área específica.
+    Obtiene la evapotranspiración promedio entre dos fechas.
+
+    Si hay ubicación y el almacén por celdas tiene una celda cercana, se usa su pronóstico;
+    si no, se usa el archivo CSV global. Las fechas se ajustan a la fecha más cercana del
+    pronóstico y el promedio sale de un índice de sumas acumuladas.
 
     Args:
-        lat (float): Latitud.
-        lng (float): Longitud.
-        date_str (str): Fecha en formato 'YYYY-MM-DD'.
-        buffer (float): Tamaño del área alrededor del punto (en grados).
+        start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
+        end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        lat (float): Latitud (opcional).
+        lon (float): Longitud (opcional).
 
     Returns:
-        dict: Diccionario con la humedad del suelo promedio.
+        float: Valor promedio de evapotranspiración.
     """
     try:
-        initialize_earth_engine()
-
-        # Definir fechas
-        date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-        start_date = (date - datetime.timedelta(days=6)).strftime('%Y-%m-%d')
-        end_date = (date - datetime.timedelta(days=2)).strftime('%Y-%m-%d')
-
-        # Colección de imágenes de SMAP
-        dataset = ee.ImageCollection('NASA/SMAP/SPL3SMP_E/006') \
-            .filter(ee.Filter.date(start_date, end_date))
-        soil_moisture_surface = dataset.select('soil_moisture_am')
-
-        # Región de interés
-        region = ee.Geometry.Rectangle([lng - buffer, lat - buffer, lng + buffer, lat + buffer])
-
-        # Reducir región para obtener el promedio
-        stats = soil_moisture_surface.mean().reduceRegion(
-            reducer=ee.Reducer.mean(),
-            geometry=region,
-            scale=10000,
-            maxPixels=1e9
-        )
-        soil_moisture_value = stats.getInfo()
-        mean_soil_moisture = soil_moisture_value.get('soil_moisture_am', None)
+        et_data = EVAPOTRANSPIRATION.value
+        if et_data is None:
+            raise RuntimeError(f"datos no disponibles ({EVAPOTRANSPIRATION.state})")
 
-        return {'mean_soil_moisture': mean_soil_moisture}
+        store = et_data['store']
+        if store is not None and lat is not None and lon is not None:
+            cell, distance_km = store.nearest_cell(lat, lon)
+            if distance_km <= ET_MAX_CELL_DISTANCE_KM:
+                return store.index_for(cell).average(start_date, end_date)
+
+        return et_data['index'].average(start_date, end_date)
 
     except Exception as e:
-        return {'error': f'Error al obtener datos de humedad del suelo: {e}'}
+        return {'error': f'Error al obtener datos de evapotranspiración: {e}'}
 
 
-def get_closest_available_ndvi(lat, lng, start_date, end_date, max_retries=3):
+def degraded_result(label, error):
     """
-    Busca el NDVI promedio más cercano hacia atrás si no encuentra un valor en el rango dado.
+    Convierte una excepción al consultar una fuente en una sección con error.
 
     Args:
-        lat (float): Latitud.
-        lng (float): Longitud.
+        label (str): Nombre de los datos para el mensaje (p. ej. 'NDVI').
+        error (Exception): Excepción de la consulta.
+
+    Returns:
+        dict: Mensaje de error y motivo ('timeout', 'circuit_open' o 'error').
+    """
+    if isinstance(error, CircuitOpenError):
+        return {'error': f'Error al obtener {label}: {error}', 'reason': 'circuit_open'}
+    if isinstance(error, asyncio.TimeoutError):
+        return {'error': f'Error al obtener {label}: tiempo de espera agotado', 'reason': 'timeout'}
+    return {'error': f'Error al obtener {label}: {error}', 'reason': 'error'}
+
+
+def ee_failed(result):
+    """
+    Indica si un resultado de Earth Engine es un fallo del servicio. No cuentan la falta de
+    imágenes válidas ni que el almacén local no cubra la consulta.
+    """
+    if isinstance(result, (tuple, list)):
+        return any(ee_failed(item) for item in result)
+    message = result.get('error', '') if isinstance(result, dict) else ''
+    return message.startswith('Error al obtener') and LOCAL_DATA_ERROR not in message
+
+
+async def call_earth_engine(func, *args, deadline=None):
+    """
+    Ejecuta una consulta bloqueante a Earth Engine a través de su executor y su circuito.
+    Con `deadline`, el tiempo máximo es lo que queda del presupuesto, acotado por `EE_TIMEOUT`.
+    """
+    timeout = deadline.timeout(EE_TIMEOUT) if deadline is not None else EE_TIMEOUT
+    return await BREAKERS['earth_engine'].call(
+        EE_EXECUTOR.run, func, *args, timeout=timeout, is_failure=ee_failed
+    )
+
+
+async def get_satellite_data(soil_point, ndvi_point, date_str, start_date, end_date, buffer=1, deadline=None):
+    """
+    Obtiene humedad del suelo y NDVI pasando por sus cachés.
+
+    Si ambos faltan y `EE_FUSED_QUERY` está activo, se piden juntos con una sola petición
+    a Earth Engine; si no, cada fuente se consulta por separado en paralelo.
+
+    Args:
+        soil_point (tuple): (latitud, longitud) ajustadas a la malla de SMAP.
+        ndvi_point (tuple): (latitud, longitud) ajustadas a la malla de MODIS.
+        date_str (str): Fecha actual en formato 'YYYY-MM-DD'.
         start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
         end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
-        max_retries (int): Máximo número de intentos hacia atrás para buscar un valor NDVI válido.
+        buffer (float): Tamaño del área de humedad del suelo (en grados).
+        deadline (Deadline): Presupuesto del reporte para las consultas (opcional).
 
     Returns:
-        dict: Diccionario con el NDVI promedio.
+        tuple: Diccionarios de humedad del suelo y de NDVI.
     """
-    try:
-        initialize_earth_engine()
-        # Formatear fechas y restar un año por ahora por falta de datos
-        current_start = datetime.datetime.strptime(start_date, '%Y-%m-%d') - datetime.timedelta(days=365)
-        current_end = datetime.datetime.strptime(end_date, '%Y-%m-%d') - datetime.timedelta(days=365)
-
-        for retry in range(max_retries):
-            # Colección de imágenes de MODIS
-            dataset = ee.ImageCollection('MODIS/061/MYD13A1') \
-                .filter(ee.Filter.date(current_start.strftime('%Y-%m-%d'), current_end.strftime('%Y-%m-%d'))) \
-                .select('NDVI')
-            point = ee.Geometry.Point([lng, lat])
-
-            # Reducir para obtener el promedio
-            ndvi_mean = dataset.mean().reduceRegion(
-                reducer=ee.Reducer.mean(),
-                geometry=point,
-                scale=500,
-                maxPixels=1e9
+    soil_key = (*soil_point, date_str, buffer)
+    ndvi_key = (*ndvi_point, start_date, end_date)
+
+    (soil_moisture_data, soil_refresh), (ndvi_data, ndvi_refresh) = await asyncio.gather(
+        SOIL_MOISTURE_CACHE.lookup_async(soil_key), NDVI_CACHE.lookup_async(ndvi_key)
+    )
+    soil_cached, ndvi_cached = soil_moisture_data, ndvi_data
+
+    # Las entradas viejas se responden ya y se refrescan en segundo plano
+    if soil_refresh:
+        run_in_background(refresh_entry(
+            SOIL_MOISTURE_CACHE, soil_key,
+            call_earth_engine, get_soil_moisture_data, *soil_point, date_str, buffer
+        ))
+    if ndvi_refresh:
+        run_in_background(refresh_entry(
+            NDVI_CACHE, ndvi_key,
+            call_earth_engine, get_closest_available_ndvi, *ndvi_point, start_date, end_date
+        ))
+
+    if soil_moisture_data is None and ndvi_data is None and EE_FUSED_QUERY:
+        try:
+            soil_moisture_data, ndvi_data = await call_earth_engine(
+                get_earth_engine_data, soil_point, ndvi_point, date_str, start_date, end_date, buffer,
+                deadline=deadline
+            )
+        except Exception as e:
+            soil_moisture_data = degraded_result('datos de humedad del suelo', e)
+            ndvi_data = degraded_result('datos de NDVI', e)
+    else:
+        soil_task = ndvi_task = None
+        if soil_moisture_data is None:
+            soil_task = asyncio.ensure_future(
+                call_earth_engine(get_soil_moisture_data, *soil_point, date_str, buffer, deadline=deadline)
             )
-            ndvi_value = ndvi_mean.getInfo()
-            mean_ndvi = ndvi_value.get('NDVI', None)
+        if ndvi_data is None:
+            ndvi_task = asyncio.ensure_future(
+                call_earth_engine(get_closest_available_ndvi, *ndvi_point, start_date, end_date, deadline=deadline)
+            )
+        if soil_task is not None:
+            try:
+                soil_moisture_data = await soil_task
+            except Exception as e:
+                soil_moisture_data = degraded_result('datos de humedad del suelo', e)
+        if ndvi_task is not None:
+            try:
+                ndvi_data = await ndvi_task
+            except Exception as e:
+                ndvi_data = degraded_result('datos de NDVI', e)
+
+    # Guardar solo los resultados nuevos y sin error
+    if soil_cached is None and not is_error(soil_moisture_data):
+        SOIL_MOISTURE_CACHE.set_async(soil_key, soil_moisture_data)
+    if ndvi_cached is None and not is_error(ndvi_data):
+        NDVI_CACHE.set_async(ndvi_key, ndvi_data)
+    return soil_moisture_data, ndvi_data
+
+
+def report_dates():
+    """
+    Calcula las fechas usadas por los reportes.
 
-            # Si se encuentra un valor válido, se devuelve
-            if mean_ndvi is not None:
-                return {'mean_ndvi': mean_ndvi, 'reintentos_para_obtener_ndvi_cercano': retry}
+    Returns:
+        tuple: Fecha actual, fecha de inicio y fecha de fin en formato 'YYYY-MM-DD'.
+    """
+    date = datetime.datetime.utcnow()
+    date_str = date.strftime('%Y-%m-%d')
+    start_date = (date - datetime.timedelta(days=5)).strftime('%Y-%m-%d')
+    end_date = (date - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+    print(f"Fecha inicial: {start_date}, Fecha final: {end_date}")
+    print(f"Fecha actual: {date_str}")
+    print(f"Fecha final: {end_date}")
+    return date_str, start_date, end_date
 
-            # Si no se encuentra, busca hacia atrás (por ejemplo, 5 días antes)
-            current_start -= datetime.timedelta(days=5)
-            current_end -= datetime.timedelta(days=5)
-            print(f"Retry {retry + 1}: Buscando NDVI en rango {current_start} - {current_end}")
 
-        return {'mean_ndvi': None, 'error': 'No se encontró NDVI en los rangos especificados'}
+def report_points(lat, lon, buffer=1):
+    """
+    Ajusta las coordenadas a la malla de cada fuente para compartir la caché entre ubicaciones cercanas.
 
-    except Exception as e:
-        return {'error': f'Error al obtener datos de NDVI: {e}'}
+    Returns:
+        tuple: Puntos de clima, humedad del suelo y NDVI.
+    """
+    return (
+        (snap(lat, WEATHER_GRID), snap(lon, WEATHER_GRID)),
+        (snap(lat, buffer), snap(lon, buffer)),
+        (snap(lat, NDVI_GRID), snap(lon, NDVI_GRID))
+    )
 
 
-def get_average_et(start_date, end_date):
+async def within_deadline(coroutine, deadline, sections, label):
     """
-    Obtiene la evapotranspiración promedio entre dos fechas utilizando el archivo CSV.
+    Espera una sección del reporte hasta lo que queda del presupuesto.
 
     Args:
-        start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
-        end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        coroutine (coroutine): Corrutina que produce las secciones.
+        deadline (Deadline): Presupuesto de latencia del reporte.
+        sections (tuple): Nombres de las secciones que produce.
+        label (str): Nombre de los datos para el mensaje de error.
 
     Returns:
-        float: Valor promedio de evapotranspiración.
+        dict: Secciones calculadas, o marcadas como degradadas si se agotó el presupuesto.
     """
     try:
-        # Convertir fechas a datetime
-        start_date_dt = pd.to_datetime(start_date)
-        end_date_dt = pd.to_datetime(end_date)
+        # Margen para que venzan primero los tiempos de cada consulta (derivados del mismo
+        # presupuesto) y sus circuitos los cuenten como fallo en lugar de ver una cancelación
+        return await asyncio.wait_for(coroutine, deadline.remaining() + DEADLINE_GRACE)
+    except asyncio.TimeoutError as e:
+        return {section: degraded_result(label, e) for section in sections}
 
-        # Ajustar fechas al índice más cercano
-        start_date_adjusted = forecast_df.index[forecast_df.index.get_indexer([start_date_dt], method='nearest')][0]
-        end_date_adjusted = forecast_df.index[forecast_df.index.get_indexer([end_date_dt], method='nearest')][0]
 
-        # Filtrar y calcular promedio
-        filtered_df = forecast_df.loc[start_date_adjusted:end_date_adjusted]
-        avg_et = filtered_df['mean'].mean()
+def degraded_sections(report):
+    """Secciones del reporte que no se pudieron obtener y el motivo de cada una."""
+    return {
+        section: data.get('reason', 'error')
+        for section, data in report.items()
+        if isinstance(data, dict) and 'error' in data
+    }
 
-        return avg_et
 
-    except Exception as e:
-        return {'error': f'Error al obtener datos de evapotranspiración: {e}'}
+def start_report_tasks(weather_point, soil_point, ndvi_point, date_str, start_date, end_date, buffer=1,
+                       deadline=None):
+    """
+    Lanza en paralelo las consultas a todas las fuentes de datos.
+
+    Cada sección se espera como máximo lo que queda de `deadline`; las que no terminan
+    a tiempo se devuelven con error y motivo 'timeout'.
+
+    Returns:
+        list: Tareas; cada una resuelve a un diccionario con las secciones del reporte que produce.
+    """
+    deadline = deadline or Deadline(REPORT_LATENCY_BUDGET)
+
+    async def weather():
+        with REPORT_STAGE_SECONDS.labels('weather').time():
+            weather_data = await cached_call_async(
+                WEATHER_CACHE, (*weather_point, start_date, end_date),
+                WEATHER_LIMITER.run, get_weather_data, app.state.http_session, *weather_point, start_date, end_date,
+                deadline
+            )
+        return {'weather_data': weather_data}
+
+    async def satellite():
+        with REPORT_STAGE_SECONDS.labels('satellite').time():
+            # Sin Earth Engine aún se puede responder desde el almacén local de rásters
+            await EARTH_ENGINE.wait()
+            soil_moisture_data, ndvi_data = await get_satellite_data(
+                soil_point, ndvi_point, date_str, start_date, end_date, buffer, deadline
+            )
+        return {'soil_moisture_data': soil_moisture_data, 'ndvi_data': ndvi_data}
+
+    async def evapotranspiration():
+        with REPORT_STAGE_SECONDS.labels('evapotranspiration').time():
+            await EVAPOTRANSPIRATION.wait()
+            average_et = await ET_EXECUTOR.run(get_average_et, start_date, end_date, *weather_point)
+        return {'average_evapotranspiration': average_et}
+
+    return [
+        asyncio.ensure_future(within_deadline(coroutine, deadline, sections, label))
+        for coroutine, sections, label in (
+            (weather(), ('weather_data',), 'datos meteorológicos'),
+            (satellite(), ('soil_moisture_data', 'ndvi_data'), 'datos satelitales'),
+            (evapotranspiration(), ('average_evapotranspiration',), 'datos de evapotranspiración'),
+        )
+    ]
+
+
+async def compute_report(weather_point, soil_point, ndvi_point, date_str, start_date, end_date, buffer=1,
+                         budget=None):
+    """
+    Consulta todas las fuentes de datos en paralelo y construye el reporte.
+
+    Args:
+        budget (float): Presupuesto de latencia en segundos; por defecto `REPORT_LATENCY_BUDGET`.
+
+    Returns:
+        dict: Reporte con datos meteorológicos, humedad del suelo, NDVI y evapotranspiración,
+        y en `degraded` las secciones que no se pudieron obtener.
+    """
+    deadline = Deadline(budget or REPORT_LATENCY_BUDGET)
+    tasks = start_report_tasks(weather_point, soil_point, ndvi_point, date_str, start_date, end_date, buffer,
+                               deadline)
+
+    # Esperar a que todas las tareas completen y construir el reporte final
+    report = {}
+    for sections in await asyncio.gather(*tasks):
+        report.update(sections)
+    report['degraded'] = degraded_sections(report)
+    return report
 
 
 @app.post("/get_report")
@@ -274,6 +822,10 @@ async def get_report(location: Location):
     """
     Endpoint que genera un reporte agrícola basado en múltiples fuentes de datos.
 
+    Las solicitudes concurrentes para la misma ubicación normalizada y fecha comparten un solo cómputo.
+    El presupuesto de latencia es parte de la llave: una solicitud nunca se une a un precálculo (con
+    `PREFETCH_LATENCY_BUDGET`) ni un precálculo hereda el presupuesto corto de una solicitud.
+
     Args:
         location (Location): Objeto con latitud y longitud.
 
@@ -281,77 +833,455 @@ async def get_report(location: Location):
         dict: Reporte con datos meteorológicos, humedad del suelo, NDVI y evapotranspiración.
     """
     try:
-        lat = location.latitude
-        lon = location.longitude
-
         # Fechas actuales y rango de fechas
-        date = datetime.datetime.utcnow()
-        date_str = date.strftime('%Y-%m-%d')
-        start_date = (date - datetime.timedelta(days=5)).strftime('%Y-%m-%d')
-        end_date = (date - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-        print(f"Fecha inicial: {start_date}, Fecha final: {end_date}")
-        print(f"Fecha actual: {date_str}")
-        print(f"Fecha final: {end_date}")
-
-        # Crear tareas asíncronas para paralelizar
-        loop = asyncio.get_event_loop()
-        tasks = [
-            loop.run_in_executor(None, get_weather_data, lat, lon, start_date, end_date),
-            loop.run_in_executor(None, get_soil_moisture_data, lat, lon, date_str, 1),
-            loop.run_in_executor(None, get_closest_available_ndvi, lat, lon, start_date, end_date),
-            loop.run_in_executor(None, get_average_et, start_date, end_date)
-        ]
+        date_str, start_date, end_date = report_dates()
 
-        # Esperar a que todas las tareas completen
-        weather_data, soil_moisture_data, ndvi_data, average_et = await asyncio.gather(*tasks)
+        buffer = 1
+        weather_point, soil_point, ndvi_point = report_points(location.latitude, location.longitude, buffer)
+
+        return await REPORT_FLIGHTS.do(
+            (weather_point, soil_point, ndvi_point, date_str, REPORT_LATENCY_BUDGET),
+            compute_report, weather_point, soil_point, ndvi_point, date_str, start_date, end_date, buffer,
+            REPORT_LATENCY_BUDGET
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def warm_report(latitude, longitude):
+    """
+    Calcula el reporte de una ubicación para dejar sus fuentes de datos en caché.
+
+    Args:
+        latitude (float): Latitud.
+        longitude (float): Longitud.
+
+    Returns:
+        dict: El reporte, con las secciones que no se pudieron obtener en `degraded`.
+    """
+    date_str, start_date, end_date = report_dates()
+    buffer = 1
+    weather_point, soil_point, ndvi_point = report_points(latitude, longitude, buffer)
+    return await REPORT_FLIGHTS.do(
+        (weather_point, soil_point, ndvi_point, date_str, PREFETCH_LATENCY_BUDGET),
+        compute_report, weather_point, soil_point, ndvi_point, date_str, start_date, end_date, buffer,
+        PREFETCH_LATENCY_BUDGET
+    )
+
+
+# Precálculo de reportes de las parcelas registradas a las horas en que se esperan datos nuevos.
+# Por defecto a las 12 UTC (6 am en el centro de México): el clima precalculado se sirve durante
+# `WEATHER_CACHE_TTL` + `WEATHER_CACHE_STALE_TTL` (~70 min), así que cubre las consultas del amanecer
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_SCHEDULER = PrefetchScheduler(
+    warm_report,
+    fields_file=os.getenv("PREFETCH_FIELDS_FILE", "registered_fields.json"),
+    hours_utc=[int(hour) for hour in os.getenv("PREFETCH_HOURS_UTC", "12").split(",")],
+    batch_size=int(os.getenv("PREFETCH_BATCH_SIZE", 10)),
+    batch_interval=float(os.getenv("PREFETCH_BATCH_INTERVAL", 5)),
+    jitter=float(os.getenv("PREFETCH_JITTER", 2))
+)
+
+
+@app.post("/fields")
+async def register_field(field: Field):
+    """
+    Endpoint para registrar una parcela cuyo reporte se precalcula periódicamente.
+
+    Args:
+        field (Field): Latitud, longitud y nombre opcional de la parcela.
+
+    Returns:
+        dict: La parcela registrada con su identificador.
+    """
+    return await PREFETCH_SCHEDULER.register(field.latitude, field.longitude, field.name)
 
-        # Construir el reporte final
-        report = {
-            'weather_data': weather_data,
-            'soil_moisture_data': soil_moisture_data,
-            'ndvi_data': ndvi_data,
-            'average_evapotranspiration': average_et
-        }
 
-        return report
+@app.get("/fields")
+async def get_fields():
+    """
+    Endpoint con el progreso del precálculo y la última actualización de cada parcela.
+
+    Returns:
+        dict: Estado del planificador y parcelas registradas.
+    """
+    return await PREFETCH_SCHEDULER.status()
+
+
+@app.delete("/fields/{field_id}")
+async def unregister_field(field_id: str):
+    """
+    Endpoint para dejar de precalcular el reporte de una parcela.
+
+    Args:
+        field_id (str): Identificador de la parcela.
+
+    Returns:
+        dict: Identificador de la parcela eliminada.
+    """
+    if not await PREFETCH_SCHEDULER.unregister(field_id):
+        raise HTTPException(status_code=404, detail="Parcela no registrada.")
+    return {"id": field_id}
+
+
+@app.post("/fields/refresh")
+async def refresh_fields():
+    """
+    Endpoint para iniciar de inmediato el precálculo de todas las parcelas registradas.
+
+    Returns:
+        dict: Estado del planificador.
+    """
+    if not PREFETCH_SCHEDULER.running:
+        run_in_background(PREFETCH_SCHEDULER.run_once())
+    return await PREFETCH_SCHEDULER.status()
+
+
+@app.post("/get_report_stream")
+async def get_report_stream(location: Location):
+    """
+    Endpoint que genera el reporte agrícola como flujo NDJSON.
+
+    Cada fuente se envía como un evento en cuanto termina (`weather_data`, `soil_moisture_data`,
+    `ndvi_data`, `average_evapotranspiration`), seguido de un evento `summary` con el reporte completo.
+
+    Args:
+        location (Location): Objeto con latitud y longitud.
+
+    Returns:
+        StreamingResponse: Una línea JSON por evento.
+    """
+    date_str, start_date, end_date = report_dates()
+    buffer = 1
+    weather_point, soil_point, ndvi_point = report_points(location.latitude, location.longitude, buffer)
+
+    async def events():
+        started_at = time.perf_counter()
+        tasks = start_report_tasks(weather_point, soil_point, ndvi_point, date_str, start_date, end_date, buffer)
+        report = {}
+        timings = {}
+        try:
+            for next_task in asyncio.as_completed(tasks):
+                sections = await next_task
+                elapsed_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                for event, data in sections.items():
+                    report[event] = data
+                    timings[event] = elapsed_ms
+                    yield json.dumps({'event': event, 'data': data, 'elapsed_ms': elapsed_ms}) + '\n'
+
+            report['degraded'] = degraded_sections(report)
+            summary = {'report': report, 'elapsed_ms': timings}
+            yield json.dumps({
+                'event': 'summary',
+                'data': summary,
+                'elapsed_ms': round((time.perf_counter() - started_at) * 1000, 1)
+            }) + '\n'
+        finally:
+            # Si el cliente se desconecta, no dejar consultas huérfanas
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(events(), media_type='application/x-ndjson')
+
+
+async def cached_batch(cache, keys, points, label, deadline, func, *args):
+    """
+    Resuelve un lote consultando la caché y enviando a `func` solo las ubicaciones faltantes.
+
+    La consulta de las faltantes pasa por el circuito de Earth Engine con lo que queda de
+    `deadline`; si falla, esas ubicaciones se devuelven como degradadas.
+
+    Args:
+        cache (TTLCache): Caché de la fuente de datos.
+        keys (list): Llaves de caché, una por ubicación.
+        points (list): Ubicaciones ya ajustadas a la malla de la fuente.
+        label (str): Nombre de los datos para el mensaje de error.
+        deadline (Deadline): Presupuesto de latencia del lote.
+        func (callable): Función de lote bloqueante que recibe la lista de ubicaciones faltantes y `args`.
+
+    Returns:
+        tuple: Resultados en el mismo orden que `points` y posiciones de las entradas viejas
+        que le toca refrescar a este worker.
+    """
+    lookups = await asyncio.gather(*(cache.lookup_async(key) for key in keys))
+    results = [result for result, _ in lookups]
+    stale = [idx for idx, (_, refresh) in enumerate(lookups) if refresh]
+    missing = [idx for idx, result in enumerate(results) if result is None]
+    if not missing:
+        return results, stale
+
+    # Las ubicaciones repetidas dentro del lote se consultan una sola vez
+    unique_keys = list(dict.fromkeys(keys[idx] for idx in missing))
+    unique_points = [points[keys.index(key)] for key in unique_keys]
+    try:
+        fetched_results = await call_earth_engine(func, unique_points, *args, deadline=deadline)
+    except Exception as e:
+        fetched_results = [degraded_result(label, e)] * len(unique_points)
+    fetched = dict(zip(unique_keys, fetched_results))
+
+    for idx in missing:
+        result = fetched[keys[idx]]
+        results[idx] = result
+        if not is_error(result):
+            cache.set_async(keys[idx], result)
+    return results, stale
+
+
+async def refresh_batch(cache, keys, points, func, *args):
+    """Vuelve a consultar en un solo lote las entradas viejas y actualiza las que no tienen error."""
+    try:
+        for key, result in zip(keys, await call_earth_engine(func, points, *args)):
+            if not is_error(result):
+                cache.set_async(key, result)
+    except Exception as e:
+        print(f"Error al refrescar la caché '{cache.name}': {e}")
+
+
+@app.post("/get_reports")
+async def get_reports(locations: List[Location]):
+    """
+    Endpoint que genera reportes agrícolas para varias ubicaciones a la vez.
+
+    La humedad del suelo y el NDVI se calculan para todas las ubicaciones con un solo
+    `reduceRegions` por producto; el clima se consulta en paralelo con un límite de concurrencia.
+    Todas las consultas comparten el presupuesto `BATCH_LATENCY_BUDGET` y pasan por los circuitos
+    de sus fuentes; cada reporte indica en `degraded` las secciones que no se pudieron obtener.
+
+    Args:
+        locations (List[Location]): Lista de objetos con latitud y longitud.
+
+    Returns:
+        list: Reportes en el mismo orden que `locations`.
+    """
+    if len(locations) > BATCH_MAX_LOCATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Se permiten como máximo {BATCH_MAX_LOCATIONS} ubicaciones por solicitud."
+        )
+
+    try:
+        deadline = Deadline(BATCH_LATENCY_BUDGET)
+        date_str, start_date, end_date = report_dates()
+
+        buffer = 1
+        points = [report_points(loc.latitude, loc.longitude, buffer) for loc in locations]
+        weather_points = [weather_point for weather_point, _, _ in points]
+        soil_points = [soil_point for _, soil_point, _ in points]
+        ndvi_points = [ndvi_point for _, _, ndvi_point in points]
+
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+        async def bounded_weather(lat, lon):
+            async with semaphore:
+                return await cached_call_async(
+                    WEATHER_CACHE, (lat, lon, start_date, end_date),
+                    WEATHER_LIMITER.run, get_weather_data, app.state.http_session, lat, lon, start_date, end_date,
+                    deadline
+                )
+
+        await asyncio.gather(EARTH_ENGINE.wait(), EVAPOTRANSPIRATION.wait())
+
+        soil_keys = [(lat, lon, date_str, buffer) for lat, lon in soil_points]
+        ndvi_keys = [(lat, lon, start_date, end_date) for lat, lon in ndvi_points]
+        soil_task = cached_batch(
+            SOIL_MOISTURE_CACHE, soil_keys, soil_points, 'datos de humedad del suelo', deadline,
+            get_soil_moisture_batch, date_str, buffer
+        )
+        ndvi_task = cached_batch(
+            NDVI_CACHE, ndvi_keys, ndvi_points, 'datos de NDVI', deadline,
+            get_ndvi_batch, start_date, end_date
+        )
+        et_task = asyncio.gather(
+            *(ET_EXECUTOR.run(get_average_et, start_date, end_date, lat, lon) for lat, lon in weather_points)
+        )
+        weather_task = asyncio.gather(*(bounded_weather(lat, lon) for lat, lon in weather_points))
+
+        weather_list, (soil_list, soil_stale), (ndvi_list, ndvi_stale), et_list = await asyncio.gather(
+            weather_task, soil_task, ndvi_task, et_task
+        )
+
+        # Refrescar en segundo plano, también por lote, las entradas viejas que se sirvieron
+        for cache, keys, batch_points, func, args, stale in (
+            (SOIL_MOISTURE_CACHE, soil_keys, soil_points, get_soil_moisture_batch, (date_str, buffer), soil_stale),
+            (NDVI_CACHE, ndvi_keys, ndvi_points, get_ndvi_batch, (start_date, end_date), ndvi_stale),
+        ):
+            if stale:
+                run_in_background(refresh_batch(
+                    cache, [keys[idx] for idx in stale], [batch_points[idx] for idx in stale], func, *args
+                ))
+
+        reports = []
+        for location, weather_data, soil_moisture_data, ndvi_data, average_et in zip(
+            locations, weather_list, soil_list, ndvi_list, et_list
+        ):
+            report = {
+                'weather_data': weather_data,
+                'soil_moisture_data': soil_moisture_data,
+                'ndvi_data': ndvi_data,
+                'average_evapotranspiration': average_et
+            }
+            reports.append({
+                'latitude': location.latitude,
+                'longitude': location.longitude,
+                **report,
+                'degraded': degraded_sections(report)
+            })
+        return reports
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/classify_image")
-def classify_image(file: UploadFile = File(...)):
+@app.get("/healthz")
+async def healthz():
+    """
+    Endpoint de vida: responde en cuanto el proceso acepta conexiones.
+
+    Returns:
+        dict: Estado del proceso.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Endpoint de disponibilidad con el estado de cada componente.
+
+    Returns:
+        JSONResponse: 200 si todos los componentes están listos, 503 si no.
+    """
+    components = {component.name: component.status() for component in COMPONENTS}
+    ready = all(component.state == 'ready' for component in COMPONENTS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "components": components}
+    )
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Endpoint de métricas en formato de texto de Prometheus.
+
+    Incluye latencias por servicio externo, por intento de NDVI, por etapa de la inferencia y
+    por pregunta al LLM, además de colas de los executors, solicitudes en curso y cachés.
+
+    Returns:
+        Response: Métricas en formato de exposición de Prometheus.
+    """
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/stats")
+async def get_stats():
+    """
+    Endpoint con los contadores de las cachés, de las solicitudes deduplicadas, de los executors
+    y de los circuitos.
+
+    Returns:
+        dict: Aciertos y fallos de cada caché, cómputos de reportes compartidos,
+        profundidad de cola y tiempos de espera de cada executor y estado de cada circuito.
+    """
+    return {
+        "cache": {cache.name: cache.stats() for cache in CACHES},
+        "persistent_cache": DISK_CACHE.stats() if DISK_CACHE is not None else None,
+        "singleflight": {flight.name: flight.stats() for flight in (REPORT_FLIGHTS, CLASSIFY_FLIGHTS)},
+        "executors": {executor.name: executor.stats() for executor in EXECUTORS},
+        "breakers": {name: breaker.stats() for name, breaker in BREAKERS.items()},
+        "inference_batcher": INFERENCE_BATCHER.stats(),
+        "image_store": IMAGE_STORE.stats(),
+        "inference_pool": INFERENCE_POOL.stats() if INFERENCE_POOL is not None else None
+    }
+
+
+def predict_batch(image_batch):
+    """Pasada del modelo para un lote; el módulo de inferencia se carga en segundo plano al arrancar."""
+    if INFERENCE_POOL is not None:
+        return INFERENCE_POOL.predict_batch(image_batch)
+    return INFERENCE.value.predict_batch(image_batch)
+
+
+# Las imágenes de solicitudes concurrentes se agrupan en una sola pasada del modelo
+INFERENCE_BATCHER = InferenceBatcher(
+    "inference",
+    predict_batch,
+    INFERENCE_EXECUTOR,
+    max_batch_size=int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 32)),
+    max_wait_ms=float(os.getenv("INFERENCE_MAX_BATCH_WAIT_MS", 5)),
+    workers=INFERENCE_EXECUTOR.max_workers
+)
+
+
+# El formulario se lee a mano con `ImageUploadParser`; el esquema documenta el campo `file` en OpenAPI
+CLASSIFY_IMAGE_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {
+                    "file": {"type": "string", "format": "binary", "description": "Imagen JPEG o PNG."}
+                }
+            }
+        }
+    }
+}
+
+
+@app.post("/classify_image", openapi_extra={"requestBody": CLASSIFY_IMAGE_REQUEST_BODY})
+async def classify_image(request: Request):
     """
     Endpoint para cargar una imagen y realizar la detección de enfermedades.
 
+    La imagen (campo `file` del formulario multipart) se recibe en memoria con `ImageUploadParser`
+    y se decodifica directamente desde sus bytes en su propio executor; la pasada del modelo se
+    comparte con las demás solicitudes concurrentes a través del batcher de inferencia y la copia
+    en disco se escribe en segundo plano.
+
     Args:
-        file (UploadFile): La imagen a subir.
+        request (Request): Solicitud con el formulario multipart.
 
     Returns:
         dict: Resultado de la inferencia y detalles de la imagen.
     """
+    inference = await INFERENCE.wait_ready()
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Se esperaba un formulario multipart con la imagen.")
+    try:
+        form = await ImageUploadParser(request.headers, request.stream()).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+    file = form.get("file")
     try:
-        # Verificar que el archivo es una imagen
-        if file.content_type not in ["image/jpeg", "image/png", "image/jpg"]:
+        if not isinstance(file, FormFile):
+            raise HTTPException(status_code=400, detail="No se recibió ningún archivo en el campo 'file'.")
+        try:
+            data = await read_upload(file)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        # Verificar que el archivo es una imagen por su contenido, no por el tipo que declara el cliente
+        image_type = sniff_image_type(data)
+        if image_type is None:
             raise HTTPException(status_code=400, detail="Solo se permiten imágenes JPEG o PNG.")
 
         print(f"Recibiendo imagen: {file.filename}")  # Logging
-        # Generar un nombre único para la imagen para evitar sobrescribir archivos con el mismo nombre
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"{timestamp}_{file.filename}"
-        file_path = os.path.join(IMAGE_DIR, filename)
-        print(f"Guardando imagen en: {file_path}")  # Logging
+        try:
+            key, cached, image = await PREPROCESS_EXECUTOR.run(prepare_cached, inference, data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        # Guardar la imagen
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        print(f"Imagen guardada en: {file_path}")  # Logging
+        # Guardar la imagen sin esperar al disco
+        filename = upload_filename(file.filename, image_type[1])
+        IMAGE_STORE.save(filename, data)
 
-        # Gestionar la cola de imágenes
-        manage_image_queue()
-
-        # Realizar la inferencia
-        predicted_label, confidence = predict_image(file_path)
+        # Realizar la inferencia (si la imagen no se había clasificado ya)
+        predicted_label, confidence = cached or await classify_pixels(key, image)
 
         return {
             "filename": filename,
@@ -364,28 +1294,308 @@ def classify_image(file: UploadFile = File(...)):
     except Exception as e:
         print(f"Error en /classify_image: {e}")  # Logging
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await form.close()
+
+
+def prepare_cached(inference, data):
+    """
+    Decodifica una imagen y busca su resultado en la caché; si no está, la preprocesa para el modelo.
+
+    Args:
+        inference (module): Módulo de inferencia con el modelo cargado.
+        data (bytes): Contenido de la imagen.
 
+    Returns:
+        tuple: Llave de la caché, resultado guardado (o None) e imagen preprocesada (o None si hubo acierto).
+
+    Raises:
+        ValueError: Si los bytes no son una imagen válida.
+    """
+    pixels = inference.decode_resized(data)
+    key, cached = INFERENCE_RESULT_CACHE.lookup(pixels)
+    if cached is not None:
+        return key, cached, None
+    return key, None, inference.prepare_image(pixels)
+
+
+async def classify_pixels(key, image):
+    """
+    Clasifica una imagen preprocesada con el batcher y guarda el resultado en la caché. Las solicitudes
+    simultáneas de la misma imagen comparten una sola pasada del modelo.
+
+    Returns:
+        tuple: (etiqueta, confianza).
+    """
+    async def predict():
+        result = await INFERENCE_BATCHER.submit(image)
+        INFERENCE_RESULT_CACHE.set(key, result)
+        return result
+
+    return await CLASSIFY_FLIGHTS.do(key[0], predict)
 
-# Función para gestionar la cola de imágenes
-def manage_image_queue():
+
+def upload_filename(original_name, extension):
+    """
+    Genera un nombre único para la imagen para evitar sobrescribir archivos con el mismo nombre.
+
+    Args:
+        original_name (str): Nombre enviado por el cliente (solo se conserva la base, sin directorios).
+        extension (str): Extensión que corresponde al contenido real de la imagen.
+
+    Returns:
+        str: Nombre con marca de tiempo, sufijo aleatorio y extensión.
     """
-    Mantiene solo las últimas `MAX_IMAGES` imágenes en el directorio.
-    Si se supera el límite, elimina la imagen más antigua.
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    stem = os.path.splitext(os.path.basename(original_name or "imagen"))[0] or "imagen"
+    return f"{timestamp}_{uuid.uuid4().hex[:8]}_{stem}{extension}"
+
+
+@app.post("/classify_images")
+async def classify_images(request: Request):
     """
+    Endpoint para clasificar muchas imágenes en una sola solicitud, como flujo NDJSON.
+
+    Recibe un formulario multipart con uno o varios archivos (campo libre): imágenes JPEG/PNG
+    o archivos zip con imágenes. Las imágenes se decodifican y preprocesan en paralelo y pasan
+    por el batcher de inferencia; cada resultado se envía como evento `result` (o `error`) en
+    cuanto termina su lote, y al final un evento `summary` con el conteo por clase. Solo hay
+    `CLASSIFY_BATCH_MAX_IN_FLIGHT` imágenes en proceso a la vez, sin importar el tamaño del zip.
+
+    Args:
+        request (Request): Solicitud con el formulario multipart.
+
+    Returns:
+        StreamingResponse: Una línea JSON por imagen y el resumen final.
+    """
+    inference = await INFERENCE.wait_ready()
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Se esperaba un formulario multipart con imágenes o archivos zip.")
     try:
-        # Obtener la lista de imágenes en el directorio con rutas completas
-        images = sorted(
-            [os.path.join(IMAGE_DIR, img) for img in os.listdir(IMAGE_DIR)],
-            key=lambda x: os.path.getctime(x)
+        form = await BatchUploadParser(request.headers, request.stream(), max_files=CLASSIFY_BATCH_MAX_FILES).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+    uploads = [value for _, value in form.multi_items() if isinstance(value, FormFile)]
+    if not uploads:
+        await form.close()
+        raise HTTPException(status_code=400, detail="No se recibió ningún archivo.")
+
+    async def classify(index, name, data, error):
+        result = {"index": index, "filename": name}
+        if error is None and sniff_image_type(data) is None:
+            error = "Solo se permiten imágenes JPEG o PNG."
+        if error is None:
+            try:
+                key, cached, image = await PREPROCESS_EXECUTOR.run(prepare_cached, inference, data)
+                predicted_label, confidence = cached or await classify_pixels(key, image)
+                result.update({"disease": predicted_label, "confidence": f"{confidence * 100:.2f}%"})
+                return "result", result, confidence
+            except Exception as e:
+                print(f"Error en /classify_images con {name}: {e}")  # Logging
+                error = str(e)
+        result["detail"] = error
+        return "error", result, None
+
+    async def events():
+        started_at = time.perf_counter()
+        sources = iter_upload_images(uploads)
+        pending = set()
+        classes = {}
+        errors = 0
+        submitted = 0
+        exhausted = False
+        try:
+            while True:
+                # Mantener a lo más `CLASSIFY_BATCH_MAX_IN_FLIGHT` imágenes leídas en memoria
+                while not exhausted and len(pending) < CLASSIFY_BATCH_MAX_IN_FLIGHT:
+                    item = await PREPROCESS_EXECUTOR.run(next, sources, None)
+                    if item is None or submitted >= CLASSIFY_BATCH_MAX_IMAGES:
+                        exhausted = True
+                        if item is not None:
+                            errors += 1
+                            yield json.dumps({
+                                "event": "error",
+                                "data": {"index": submitted, "filename": item[0],
+                                         "detail": f"Se permiten como máximo {CLASSIFY_BATCH_MAX_IMAGES} imágenes."},
+                                "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 1)
+                            }) + "\n"
+                        break
+                    pending.add(asyncio.ensure_future(classify(submitted, *item)))
+                    submitted += 1
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                elapsed_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                for task in sorted(done, key=lambda task: task.result()[1]["index"]):
+                    event, result, confidence = task.result()
+                    if event == "result":
+                        totals = classes.setdefault(result["disease"], [0, 0.0])
+                        totals[0] += 1
+                        totals[1] += confidence
+                    else:
+                        errors += 1
+                    yield json.dumps({"event": event, "data": result, "elapsed_ms": elapsed_ms}) + "\n"
+
+            classified = sum(count for count, _ in classes.values())
+            summary = {
+                "images": classified + errors,
+                "classified": classified,
+                "errors": errors,
+                "classes": {
+                    label: {
+                        "count": count,
+                        "share": f"{count / classified * 100:.2f}%",
+                        "mean_confidence": f"{total / count * 100:.2f}%"
+                    }
+                    for label, (count, total) in sorted(classes.items(), key=lambda item: -item[1][0])
+                }
+            }
+            yield json.dumps({
+                "event": "summary",
+                "data": summary,
+                "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 1)
+            }) + "\n"
+        finally:
+            # Si el cliente se desconecta, no seguir clasificando
+            for task in pending:
+                task.cancel()
+            try:
+                sources.close()
+            except ValueError:
+                # El executor todavía está leyendo el siguiente archivo; se cierra al recolectarse
+                pass
+            await form.close()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.post("/classify_field")
+async def classify_field(file: UploadFile = File(...), stride: int = 256, scale: float = 1.0, overlay: bool = True):
+    """
+    Endpoint que clasifica una foto de alta resolución (p. ej. de dron o de toda la parcela)
+    por mosaicos de 256x256 en lugar de reducirla completa a 256x256, como flujo NDJSON.
+
+    Envía un evento `row` por cada fila de mosaicos en cuanto se clasifica, y al final un
+    evento `summary` con la rejilla de clases y confianzas, el conteo por clase y los mosaicos
+    por segundo; si `overlay` es verdadero, el resumen incluye el mapa de calor como JPEG en base64.
+
+    Args:
+        file (UploadFile): La imagen a subir (JPEG o PNG).
+        stride (int): Paso entre mosaicos en pixeles (menor que 256 para que se traslapen).
+        scale (float): Factor para reducir la imagen antes de dividirla (entre 0 y 1).
+        overlay (bool): Incluir el mapa de calor renderizado.
+
+    Returns:
+        StreamingResponse: Una línea JSON por fila de mosaicos y el resumen final.
+    """
+    inference = await INFERENCE.wait_ready()
+    if not FIELD_MIN_STRIDE <= stride <= inference.TILE_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"El paso debe estar entre {FIELD_MIN_STRIDE} y {inference.TILE_SIZE} pixeles."
         )
+    if not 0 < scale <= 1:
+        raise HTTPException(status_code=400, detail="La escala debe estar entre 0 y 1.")
 
-        # Si hay más de `MAX_IMAGES`, eliminar las más antiguas
-        if len(images) > MAX_IMAGES:
-            for image_path in images[:-MAX_IMAGES]:
-                os.remove(image_path)
-                print(f"Imagen eliminada: {image_path}")  # Logging
-    except Exception as e:
-        print(f"Error en manage_image_queue: {e}")  # Logging
+    try:
+        data = await read_upload(file, FIELD_MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    image_type = sniff_image_type(data)
+    if image_type is None:
+        raise HTTPException(status_code=400, detail="Solo se permiten imágenes JPEG o PNG.")
+    size = image_size(data)
+    if size is None:
+        raise HTTPException(status_code=400, detail="No se pudo leer el tamaño de la imagen.")
+    # Solo JPEG se reduce al decodificar; PNG se decodifica completo y luego se reduce
+    factor = inference.decode_factor(scale) if image_type[0] == 'image/jpeg' else 1.0
+    if size[0] * size[1] * factor ** 2 > FIELD_MAX_MEGAPIXELS * 1e6:
+        raise HTTPException(
+            status_code=413,
+            detail=f"La imagen ({size[0]}x{size[1]}) supera el límite de {FIELD_MAX_MEGAPIXELS:g} megapixeles "
+                   f"al decodificarla; use una escala menor o una imagen JPEG."
+        )
+    try:
+        image = await PREPROCESS_EXECUTOR.run(inference.decode_scaled, data, scale)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    del data
+
+    async def events():
+        started_at = time.perf_counter()
+        rows = inference.iter_tile_rows(
+            image, stride, FIELD_TILE_BATCH_SIZE,
+            predict=INFERENCE_POOL.predict_probabilities if INFERENCE_POOL is not None else None
+        )
+        ys, xs, class_rows, confidence_rows = [], [], [], []
+        try:
+            while True:
+                # Una fila por tarea, para que las clasificaciones de otras solicitudes se intercalen
+                row = await INFERENCE_EXECUTOR.run(next, rows, None)
+                if row is None:
+                    break
+                y, xs, classes, confidences = row
+                ys.append(y)
+                class_rows.append(classes)
+                confidence_rows.append(confidences)
+                yield json.dumps({
+                    "event": "row",
+                    "data": {
+                        "row": len(ys) - 1,
+                        "y": y,
+                        "tiles": [
+                            {"x": x, "disease": inference.CLASS_LABELS[label], "confidence": round(float(confidence), 4)}
+                            for x, label, confidence in zip(xs, classes.tolist(), confidences.tolist())
+                        ]
+                    },
+                    "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 1)
+                }) + "\n"
+        finally:
+            rows.close()
+
+        inference_seconds = time.perf_counter() - started_at
+        classes = np.stack(class_rows)
+        confidences = np.stack(confidence_rows)
+        tiles = classes.size
+        counts = np.bincount(classes.ravel(), minlength=len(inference.CLASS_LABELS))
+        summary = {
+            "image": {"width": image.shape[1], "height": image.shape[0], "scale": scale},
+            "tile": inference.TILE_SIZE,
+            "stride": stride,
+            "grid": {
+                "rows": len(ys),
+                "columns": len(xs),
+                "y": ys,
+                "x": xs,
+                "labels": inference.CLASS_LABELS,
+                "classes": classes.tolist(),
+                "confidence": np.round(confidences, 4).tolist()
+            },
+            "classes": {
+                label: {
+                    "tiles": int(count),
+                    "share": f"{count / tiles * 100:.2f}%",
+                    "mean_confidence": f"{confidences[classes == index].mean() * 100:.2f}%"
+                }
+                for index, (label, count) in enumerate(zip(inference.CLASS_LABELS, counts)) if count
+            },
+            "tiles": tiles,
+            "tiles_per_second": round(tiles / inference_seconds, 1)
+        }
+        if overlay:
+            rendered = await PREPROCESS_EXECUTOR.run(
+                render_overlay, image, ys, xs, classes, confidences, inference.CLASS_LABELS, inference.TILE_SIZE
+            )
+            jpeg = await PREPROCESS_EXECUTOR.run(encode_jpeg, rendered)
+            summary["overlay_jpeg_base64"] = base64.b64encode(jpeg).decode()
+        yield json.dumps({
+            "event": "summary",
+            "data": summary,
+            "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 1)
+        }) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 
 @app.post("/get_recommendations")
@@ -404,7 +1614,8 @@ async def get_recommendations(location: Location):
         report_data = await get_report(location)
 
         # Generar las recomendaciones
-        recommendations = generate_recommendations(report_data)
+        llm = await LLM.wait_ready()
+        recommendations = await LLM_EXECUTOR.run(llm.generate_recommendations, report_data)
 
         # Formatear la respuesta para el frontend
         action_list = [{"description": rec} for rec in recommendations]
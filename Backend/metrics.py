@@ -0,0 +1,198 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Cubetas de latencia: desde lecturas de caché (ms) hasta Earth Engine y el LLM (decenas de segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Duración de las solicitudes HTTP por endpoint y código de estado',
+    ['handler', 'status'], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'Solicitudes HTTP en curso')
+
+UPSTREAM_SECONDS = Histogram(
+    'upstream_request_duration_seconds', 'Duración de cada llamada a un servicio externo',
+    ['source', 'operation'], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_ERRORS = Counter(
+    'upstream_request_errors_total', 'Llamadas a servicios externos que fallaron',
+    ['source', 'operation']
+)
+NDVI_ATTEMPT_SECONDS = Histogram(
+    'ndvi_attempt_duration_seconds', 'Duración de cada intento de la búsqueda de NDVI hacia atrás',
+    ['attempt'], buckets=LATENCY_BUCKETS
+)
+REPORT_STAGE_SECONDS = Histogram(
+    'report_stage_duration_seconds', 'Duración de cada sección del reporte, incluyendo cachés y colas',
+    ['stage'], buckets=LATENCY_BUCKETS
+)
+INFERENCE_STAGE_SECONDS = Histogram(
+    'inference_stage_duration_seconds', 'Duración de las etapas de la clasificación de imágenes',
+    ['stage'], buckets=LATENCY_BUCKETS
+)
+LLM_QUESTION_SECONDS = Histogram(
+    'llm_question_duration_seconds', 'Duración de cada pregunta al LLM',
+    ['outcome'], buckets=LATENCY_BUCKETS
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    'inference_batch_size', 'Imágenes por pasada del modelo',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+INFERENCE_QUEUE_SECONDS = Histogram(
+    'inference_queue_wait_seconds', 'Espera de una imagen en el batcher antes de su pasada del modelo',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+EXECUTOR_WAIT_SECONDS = Histogram(
+    'executor_queue_wait_seconds', 'Tiempo de espera en cola antes de ejecutar una tarea',
+    ['executor'], buckets=LATENCY_BUCKETS
+)
+
+
+@contextmanager
+def upstream_timer(source, operation):
+    """
+    Mide un bloque en el histograma de servicios externos; si lanza una excepción, también cuenta el error.
+
+    Args:
+        source (str): Servicio externo ('open_meteo', 'openweather', 'earth_engine', 'openai').
+        operation (str): Consulta dentro del servicio.
+    """
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.labels(source, operation).inc()
+        raise
+    finally:
+        UPSTREAM_SECONDS.labels(source, operation).observe(time.perf_counter() - started_at)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada solicitud HTTP.
+
+    Se etiqueta con el nombre de la función del endpoint (no con la ruta) para que
+    rutas con parámetros no generen series nuevas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        started_at = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            endpoint = scope.get('endpoint')
+            handler = getattr(endpoint, '__name__', 'unmatched')
+            HTTP_REQUEST_SECONDS.labels(handler, str(status)).observe(time.perf_counter() - started_at)
+
+
+class StatsCollector:
+    """
+    Expone como métricas los contadores que ya llevan las cachés, los executors, la deduplicación
+    de reportes, los componentes y los circuitos. Se leen solo al momento del scrape.
+    """
+
+    # Valor numérico del estado de los circuitos
+    BREAKER_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+    def __init__(self, caches, executors, flights, components, breakers=()):
+        self.caches = caches
+        self.executors = executors
+        self.flights = flights
+        self.components = components
+        self.breakers = list(breakers)
+
+    def collect(self):
+        lookups = CounterMetricFamily('cache_lookups', 'Búsquedas en caché por resultado', labels=['cache', 'result'])
+        entries = GaugeMetricFamily('cache_entries', 'Entradas en la caché en memoria', labels=['cache'])
+        hit_ratio = GaugeMetricFamily('cache_hit_ratio', 'Proporción de búsquedas resueltas por la caché', labels=['cache'])
+        for cache in self.caches:
+            stats = cache.stats()
+            for result in ('hits', 'disk_hits', 'stale_hits', 'perceptual_hits', 'misses'):
+                if result in stats:
+                    lookups.add_metric([cache.name, result], stats[result])
+            entries.add_metric([cache.name], stats['size'])
+            if stats['hit_ratio'] is not None:
+                hit_ratio.add_metric([cache.name], stats['hit_ratio'])
+        yield lookups
+        yield entries
+        yield hit_ratio
+
+        queued = GaugeMetricFamily('executor_queued_tasks', 'Tareas en espera', labels=['executor'])
+        running = GaugeMetricFamily('executor_running_tasks', 'Tareas en ejecución', labels=['executor'])
+        completed = CounterMetricFamily('executor_completed_tasks', 'Tareas terminadas', labels=['executor'])
+        cancelled = CounterMetricFamily('executor_cancelled_tasks', 'Tareas descartadas antes de empezar',
+                                        labels=['executor'])
+        for executor in self.executors:
+            stats = executor.stats()
+            queued.add_metric([executor.name], stats['queued'])
+            running.add_metric([executor.name], stats['running'])
+            completed.add_metric([executor.name], stats['completed'])
+            cancelled.add_metric([executor.name], stats.get('cancelled', 0))
+        yield queued
+        yield running
+        yield completed
+        yield cancelled
+
+        in_flight = GaugeMetricFamily('singleflight_in_flight', 'Cómputos compartidos en curso', labels=['flight'])
+        calls = CounterMetricFamily('singleflight_calls', 'Cómputos iniciados', labels=['flight'])
+        coalesced = CounterMetricFamily('singleflight_coalesced', 'Solicitudes deduplicadas', labels=['flight'])
+        for flight in self.flights:
+            stats = flight.stats()
+            in_flight.add_metric([flight.name], stats['in_flight'])
+            calls.add_metric([flight.name], stats['calls'])
+            coalesced.add_metric([flight.name], stats['coalesced'])
+        yield in_flight
+        yield calls
+        yield coalesced
+
+        ready = GaugeMetricFamily('component_ready', '1 si el componente terminó de cargar', labels=['component'])
+        for component in self.components:
+            ready.add_metric([component.name], 1 if component.state == 'ready' else 0)
+        yield ready
+
+        state = GaugeMetricFamily('circuit_breaker_state', 'Estado del circuito (0 cerrado, 1 semiabierto, 2 abierto)',
+                                  labels=['breaker'])
+        opened = CounterMetricFamily('circuit_breaker_opened', 'Veces que se abrió el circuito', labels=['breaker'])
+        rejected = CounterMetricFamily('circuit_breaker_rejected', 'Llamadas rechazadas con el circuito abierto',
+                                       labels=['breaker'])
+        for breaker in self.breakers:
+            stats = breaker.stats()
+            state.add_metric([breaker.name], self.BREAKER_STATES[stats['state']])
+            opened.add_metric([breaker.name], stats['times_opened'])
+            rejected.add_metric([breaker.name], stats['rejected'])
+        yield state
+        yield opened
+        yield rejected
+
+
+def register_stats(caches, executors, flights, components, breakers=()):
+    """Registra el colector de contadores de la aplicación en el registro global."""
+    REGISTRY.register(StatsCollector(caches, executors, flights, components, breakers))
+
+
+def render():
+    """
+    Returns:
+        tuple: Cuerpo en formato de texto de Prometheus y su tipo de contenido.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
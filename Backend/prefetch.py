@@ -0,0 +1,246 @@
+import asyncio
+import contextlib
+import datetime
+import fcntl
+import json
+import os
+import random
+
+
+class PrefetchScheduler:
+    """
+    Planificador que precalcula los reportes de las parcelas registradas.
+
+    Corre dentro del event loop de la aplicación. En cada hora programada (UTC) recorre las
+    parcelas en lotes con espera aleatoria entre lotes, para no saturar las APIs externas,
+    y deja los resultados en las cachés de las fuentes de datos.
+
+    Con varios workers, el archivo de parcelas es la única fuente de verdad: cada cambio se
+    hace leyendo y escribiendo el archivo bajo un candado (`flock`), y solo el worker que
+    obtiene el candado de corrida precalcula cada hora programada; los demás la omiten.
+    El archivo se lee y escribe en el executor por defecto, fuera del event loop, y el estado
+    de las parcelas de una corrida se guarda una vez por lote.
+    """
+
+    def __init__(self, refresh, fields_file, hours_utc=(12,), batch_size=10, batch_interval=5.0, jitter=2.0):
+        """
+        Args:
+            refresh (callable): Corrutina `refresh(latitude, longitude)` que calcula el reporte.
+            fields_file (str): Archivo JSON donde se guardan las parcelas registradas.
+            hours_utc (tuple): Horas (UTC) en que se espera que haya datos nuevos.
+            batch_size (int): Parcelas que se calculan en paralelo por lote.
+            batch_interval (float): Segundos de espera entre lotes.
+            jitter (float): Segundos aleatorios adicionales (máximo) entre lotes.
+        """
+        self.refresh = refresh
+        self.fields_file = fields_file
+        self.hours_utc = sorted(hours_utc)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.jitter = jitter
+        self.running = False
+        self.completed = 0
+        self.total = 0
+        self.last_run_started = None
+        self.last_run_finished = None
+        self._task = None
+        self._run_lock = asyncio.Lock()
+
+    @contextlib.contextmanager
+    def _file_lock(self, suffix, blocking=True):
+        """
+        Candado entre procesos sobre `fields_file + suffix`.
+
+        Yields:
+            bool: Si se obtuvo el candado (siempre True si `blocking`).
+        """
+        with open(self.fields_file + suffix, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_fields(self):
+        if not os.path.exists(self.fields_file):
+            return {}
+        with open(self.fields_file, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def _save_fields(self, fields):
+        tmp_path = self.fields_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(fields, file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.fields_file)
+
+    @contextlib.contextmanager
+    def _editing_fields(self):
+        """Lee las parcelas bajo el candado y guarda los cambios al salir."""
+        with self._file_lock('.lock'):
+            fields = self._load_fields()
+            yield fields
+            self._save_fields(fields)
+
+    async def _in_executor(self, func, *args):
+        """Corre en el executor por defecto una función que bloquea (candado y archivo)."""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _read_fields(self):
+        with self._file_lock('.lock'):
+            return self._load_fields()
+
+    async def fields(self):
+        """Parcelas registradas, leídas del archivo compartido por los workers."""
+        return await self._in_executor(self._read_fields)
+
+    def _register(self, field_id, latitude, longitude, name):
+        with self._editing_fields() as fields:
+            field = fields.get(field_id, {'last_refresh': None, 'last_error': None})
+            field.update({'id': field_id, 'latitude': latitude, 'longitude': longitude, 'name': name})
+            fields[field_id] = field
+        return field
+
+    async def register(self, latitude, longitude, name=None):
+        """
+        Registra una parcela para precalcular su reporte. Registrar la misma ubicación dos veces
+        actualiza el nombre sin duplicarla.
+
+        Returns:
+            dict: La parcela registrada con su identificador.
+        """
+        field_id = f"{latitude:.5f},{longitude:.5f}"
+        return await self._in_executor(self._register, field_id, latitude, longitude, name)
+
+    def _unregister(self, field_id):
+        with self._editing_fields() as fields:
+            return fields.pop(field_id, None) is not None
+
+    async def unregister(self, field_id):
+        """Elimina una parcela registrada. Devuelve False si no existía."""
+        return await self._in_executor(self._unregister, field_id)
+
+    def _update_fields(self, updates):
+        """Guarda de una vez el estado de varias parcelas (las que sigan registradas)."""
+        with self._editing_fields() as fields:
+            for field_id, changes in updates:
+                if field_id in fields:
+                    fields[field_id].update(changes)
+
+    async def _refresh_field(self, field):
+        """
+        Calcula el reporte de una parcela.
+
+        Returns:
+            tuple: Identificador de la parcela y los cambios de su estado.
+        """
+        try:
+            report = await self.refresh(field['latitude'], field['longitude'])
+            # El reporte no falla: las fuentes que no respondieron vienen en `degraded`
+            degraded = (report or {}).get('degraded') or {}
+            return field['id'], {
+                'last_refresh': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+                'last_error': ', '.join(f"{section}: {reason}" for section, reason in degraded.items()) or None
+            }
+        except Exception as e:
+            print(f"Error al precalcular la parcela {field['id']}: {e}")
+            return field['id'], {'last_error': str(e)}
+        finally:
+            self.completed += 1
+
+    async def run_once(self, slot=None):
+        """
+        Precalcula el reporte de todas las parcelas registradas, por lotes.
+
+        Args:
+            slot (str): Hora programada de la corrida; si otro worker ya la hizo, no se repite.
+
+        Returns:
+            bool: Si este worker hizo la corrida (False si otro worker la está haciendo o ya la hizo).
+        """
+        async with self._run_lock:
+            with self._file_lock('.run.lock', blocking=False) as acquired:
+                if not acquired:
+                    return False
+                if slot is not None and await self._in_executor(self._last_slot) >= slot:
+                    return False
+                await self._run(list((await self.fields()).values()))
+                if slot is not None:
+                    await self._in_executor(self._save_last_slot, slot)
+                return True
+
+    def _last_slot(self):
+        try:
+            with open(self.fields_file + '.last_slot', 'r', encoding='utf-8') as file:
+                return file.read().strip()
+        except OSError:
+            return ''
+
+    def _save_last_slot(self, slot):
+        with open(self.fields_file + '.last_slot', 'w', encoding='utf-8') as file:
+            file.write(slot)
+
+    async def _run(self, fields):
+        self.running = True
+        self.completed = 0
+        self.total = len(fields)
+        self.last_run_started = datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+        try:
+            for start in range(0, len(fields), self.batch_size):
+                if start:
+                    await asyncio.sleep(self.batch_interval + random.uniform(0, self.jitter))
+                batch = fields[start:start + self.batch_size]
+                updates = await asyncio.gather(*(self._refresh_field(field) for field in batch))
+                await self._in_executor(self._update_fields, updates)
+        finally:
+            self.running = False
+            self.last_run_finished = datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+
+    def seconds_until_next_run(self, now=None):
+        """Segundos hasta la siguiente hora programada."""
+        now = now or datetime.datetime.utcnow()
+        for day in range(2):
+            for hour in self.hours_utc:
+                candidate = (now + datetime.timedelta(days=day)).replace(hour=hour, minute=0, second=0, microsecond=0)
+                if candidate > now:
+                    return (candidate - now).total_seconds()
+        return 24 * 3600
+
+    async def _loop(self):
+        while True:
+            delay = self.seconds_until_next_run()
+            slot = (datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)).strftime('%Y-%m-%dT%H')
+            # Espera aleatoria para que varios workers no salgan al mismo tiempo
+            await asyncio.sleep(delay + random.uniform(0, self.jitter * 30))
+            try:
+                await self.run_once(slot)
+            except Exception as e:
+                print(f"Error en el precálculo de reportes: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def status(self):
+        """Progreso de la corrida de este worker y última actualización de cada parcela."""
+        fields = await self.fields()
+        return {
+            'running': self.running,
+            'progress': {'completed': self.completed, 'total': self.total},
+            'last_run_started': self.last_run_started,
+            'last_run_finished': self.last_run_finished,
+            'next_run_in_seconds': round(self.seconds_until_next_run()),
+            'fields': list(fields.values())
+        }
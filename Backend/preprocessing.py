@@ -0,0 +1,120 @@
+"""
+Preprocesamiento de imágenes del clasificador de enfermedades del maíz, compartido por la API
+(`inference.py`) y el entrenamiento (`ComputerVision/ReconocimientoMaiz.py`).
+
+La mejora de imagen es un enfoque 3x3 seguido de un aumento del brillo (el canal V de HSV,
+que es el máximo de R, G y B) por `BRIGHTNESS_GAIN`. En lugar de convertir a HSV y regresar,
+cada pixel se escala por V'/V, con V' = min(V * 1.25, 255) truncado como antes; el factor sale
+de una tabla de 256 valores indexada por V. El escalado y la normalización a [0, 1] se hacen
+en la misma pasada y todo trabaja en uint8 o float32, con imágenes sueltas o lotes N×H×W×3.
+"""
+import cv2
+import numpy as np
+
+# Tamaño de entrada del modelo (ancho, alto)
+IMAGE_SIZE = (256, 256)
+
+# Filtro de enfoque
+SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+
+# Aumento del brillo (canal V)
+BRIGHTNESS_GAIN = 1.25
+
+
+def _brightness_scale_lut(gain):
+    """Factor V'/V por cada valor posible de V (0 para V = 0, donde el pixel es negro)."""
+    value = np.arange(256, dtype=np.float32)
+    boosted = np.floor(np.minimum(value * gain, 255))
+    return np.divide(boosted, value, out=np.zeros_like(value), where=value > 0).astype(np.float32)
+
+
+# Factor de brillo, y el mismo factor ya dividido entre 255 para normalizar en la misma pasada
+BRIGHTNESS_SCALE_LUT = _brightness_scale_lut(BRIGHTNESS_GAIN)
+NORMALIZED_SCALE_LUT = BRIGHTNESS_SCALE_LUT / np.float32(255)
+
+
+def _as_uint8_batch(images):
+    """
+    Convierte una imagen o un lote a un lote uint8 N×H×W×3. Una lista de imágenes uint8
+    (p. ej. vistas de mosaicos de una imagen grande) se deja como está para no copiarlas.
+
+    Raises:
+        TypeError: Si el tipo no es uint8 ni float32 (en escala 0-255).
+    """
+    if isinstance(images, (list, tuple)) and all(image.dtype == np.uint8 for image in images):
+        return images
+    images = np.asarray(images)
+    if images.dtype == np.float32:
+        images = np.clip(images, 0, 255).astype(np.uint8)
+    elif images.dtype != np.uint8:
+        raise TypeError(f"Se esperaba una imagen uint8 o float32, no {images.dtype}")
+    return images[np.newaxis] if images.ndim == 3 else images
+
+
+def sharpen(batch):
+    """
+    Aplica el filtro de enfoque a cada imagen de un lote uint8 (con saturación a [0, 255]).
+
+    Returns:
+        np.ndarray: Lote contiguo N×H×W×3, aunque la entrada sea una lista de vistas.
+    """
+    output = np.empty((len(batch), *batch[0].shape), dtype=np.uint8)
+    for index, image in enumerate(batch):
+        cv2.filter2D(image, -1, SHARPEN_KERNEL, dst=output[index])
+    return output
+
+
+def _scale_by_value(batch, lut):
+    """Multiplica cada pixel por `lut[V]`, con V = max(R, G, B), y devuelve float32."""
+    value = np.maximum(np.maximum(batch[..., 0], batch[..., 1]), batch[..., 2])
+    # cv2.LUT trabaja con matrices 2D: se aplanan las imágenes del lote en filas
+    scale = cv2.LUT(value.reshape(-1, value.shape[-1]), lut).reshape(value.shape)
+    return np.multiply(batch, scale[..., np.newaxis], dtype=np.float32)
+
+
+def resize(image):
+    """Redimensiona una imagen RGB al tamaño de entrada del modelo."""
+    return cv2.resize(image, IMAGE_SIZE)
+
+
+def enhance_batch(images):
+    """
+    Enfoca y aumenta el brillo de una imagen o de un lote.
+
+    Args:
+        images (np.ndarray): Imagen H×W×3 o lote N×H×W×3 RGB en uint8 (o float32 en escala 0-255).
+
+    Returns:
+        np.ndarray: Lote N×H×W×3 en uint8.
+    """
+    scaled = _scale_by_value(sharpen(_as_uint8_batch(images)), BRIGHTNESS_SCALE_LUT)
+    return np.rint(scaled, out=scaled).astype(np.uint8)
+
+
+def preprocess_batch(images):
+    """
+    Enfoca, aumenta el brillo y normaliza a [0, 1] en una sola pasada.
+
+    Args:
+        images (np.ndarray): Imagen H×W×3, lote N×H×W×3 o lista de imágenes RGB en uint8, ya del
+            tamaño del modelo.
+
+    Returns:
+        np.ndarray: Lote N×H×W×3 en float32 listo para el modelo.
+    """
+    return _scale_by_value(sharpen(_as_uint8_batch(images)), NORMALIZED_SCALE_LUT)
+
+
+def enhance_image(image):
+    """
+    Mejora una sola imagen conservando su tipo; sirve como `preprocessing_function` de Keras,
+    que entrega imágenes float32 en escala 0-255.
+
+    Args:
+        image (np.ndarray): Imagen H×W×3 RGB en uint8 o float32.
+
+    Returns:
+        np.ndarray: Imagen mejorada con el mismo tipo que la entrada.
+    """
+    enhanced = enhance_batch(image)[0]
+    return enhanced if image.dtype == np.uint8 else enhanced.astype(np.float32)
@@ -0,0 +1,305 @@
+import argparse
+import datetime
+import json
+import os
+import warnings
+
+import numpy as np
+import ee  # Earth Engine
+
+# Directorio del almacén local de rásters
+RASTER_DIR = os.getenv("RASTER_DIR", "raster_data")
+
+# Región de servicio (oeste, sur, este, norte). Por defecto cubre el Estado de México
+# con margen para el área de ±1° de la humedad del suelo.
+RASTER_BBOX = [float(value) for value in os.getenv("RASTER_BBOX", "-101.6,17.4,-97.6,21.3").split(",")]
+
+# Productos que se pueden sincronizar y su resolución en grados
+PRODUCTS = {
+    'smap': {'collection': 'NASA/SMAP/SPL3SMP_E/006', 'band': 'soil_moisture_am', 'resolution': 0.09},
+    'ndvi': {'collection': 'MODIS/061/MYD13A1', 'band': 'NDVI', 'resolution': 0.0045},
+}
+
+NODATA = -9999
+
+
+class RasterLayer:
+    """
+    Serie de rásters diarios de un producto, un arreglo `.npy` por fecha.
+
+    Los arreglos se abren con `mmap_mode='r'`, de modo que cada consulta solo lee
+    los píxeles de la ventana pedida.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+        self.west, self.south, self.east, self.north = meta['bbox']
+        self.resolution = meta['resolution']
+        self.dates = sorted(meta['dates'])
+        self._arrays = {}
+
+    def array(self, date_str):
+        """Devuelve el arreglo (memory-mapped) de la fecha dada."""
+        array = self._arrays.get(date_str)
+        if array is None:
+            array = np.load(os.path.join(self.path, f'{date_str}.npy'), mmap_mode='r')
+            self._arrays[date_str] = array
+        return array
+
+    def dates_between(self, start_date, end_date):
+        """Fechas disponibles en el rango [start_date, end_date) en formato 'YYYY-MM-DD'."""
+        return [date for date in self.dates if start_date <= date < end_date]
+
+    def covers(self, west, south, east, north):
+        return west >= self.west and east <= self.east and south >= self.south and north <= self.north
+
+    def window(self, west, south, east, north):
+        """Convierte una caja en coordenadas a rebanadas de filas y columnas."""
+        row_start = int((self.north - north) // self.resolution)
+        row_end = int(np.ceil((self.north - south) / self.resolution))
+        col_start = int((west - self.west) // self.resolution)
+        col_end = int(np.ceil((east - self.west) / self.resolution))
+        return slice(row_start, row_end), slice(col_start, col_end)
+
+    def pixel(self, lat, lng, shape):
+        """
+        Fila y columna del píxel que contiene al punto. Un punto justo en el borde sur o este
+        de la capa cae en la última fila o columna.
+
+        Args:
+            shape (tuple): Forma (filas, columnas) de los arreglos de la capa.
+        """
+        row = int((self.north - lat) // self.resolution)
+        col = int((lng - self.west) // self.resolution)
+        return min(row, shape[0] - 1), min(col, shape[1] - 1)
+
+
+# Capas abiertas por (raíz, producto): (versión de meta.json, capa)
+_layers = {}
+
+
+def get_layer(product, root=None):
+    """
+    Abre la capa local de un producto y la vuelve a abrir cuando cambia su `meta.json`.
+
+    La sincronización corre en otro proceso y reemplaza `meta.json` con cada fecha nueva, así
+    que la versión (fecha de modificación e inodo) se revisa en cada consulta. Una capa que aún
+    no existe no se recuerda: aparece en cuanto se sincroniza, sin reiniciar la API.
+
+    Returns:
+        RasterLayer: La capa, o None si no se ha sincronizado.
+    """
+    root = root or RASTER_DIR
+    key = (root, product)
+    path = os.path.join(root, product)
+    try:
+        meta_stat = os.stat(os.path.join(path, 'meta.json'))
+    except FileNotFoundError:
+        _layers.pop(key, None)
+        return None
+
+    version = (meta_stat.st_mtime_ns, meta_stat.st_ino)
+    cached = _layers.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, RasterLayer(path))
+        _layers[key] = cached
+    return cached[1]
+
+
+def array_stats(values):
+    """Promedio, mínimo, máximo, desviación estándar y píxeles válidos de un arreglo con NaN."""
+    valid = values[~np.isnan(values)]
+    if valid.size == 0:
+        return None
+    return {
+        'mean': float(valid.mean()),
+        'min': float(valid.min()),
+        'max': float(valid.max()),
+        'std_dev': float(valid.std()),
+        'valid_pixels': int(valid.size)
+    }
+
+
+def local_soil_moisture(lat, lng, date_str, buffer=1, root=None):
+    """
+    Calcula la humedad del suelo promedio alrededor de un punto con el almacén local.
+
+    Usa las mismas fechas que la consulta a Earth Engine (de 6 a 2 días antes de `date_str`).
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        date_str (str): Fecha en formato 'YYYY-MM-DD'.
+        buffer (float): Tamaño del área alrededor del punto (en grados).
+
+    Returns:
+        dict: Humedad del suelo y estadísticas, o None si el almacén no cubre la consulta.
+    """
+    layer = get_layer('smap', root)
+    box = (lng - buffer, lat - buffer, lng + buffer, lat + buffer)
+    if layer is None or not layer.covers(*box):
+        return None
+
+    date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    start_date = (date - datetime.timedelta(days=6)).strftime('%Y-%m-%d')
+    end_date = (date - datetime.timedelta(days=2)).strftime('%Y-%m-%d')
+    dates = layer.dates_between(start_date, end_date)
+    if not dates:
+        return None
+
+    rows, cols = layer.window(*box)
+    # Promedio temporal por píxel (como `ImageCollection.mean()`) y luego promedio espacial
+    stack = np.stack([layer.array(date)[rows, cols] for date in dates])
+    # Los píxeles sin ningún dato quedan en NaN (NumPy avisa del promedio vacío)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        composite = np.nanmean(stack, axis=0, dtype=np.float64)
+    stats = array_stats(composite)
+    if stats is None:
+        return {
+            'mean_soil_moisture': None,
+            'stats': {'min': None, 'max': None, 'std_dev': None, 'valid_pixels': 0}
+        }
+
+    return {'mean_soil_moisture': stats.pop('mean'), 'stats': stats}
+
+
+def local_latest_ndvi(lat, lng, widened_start, current_end, root=None):
+    """
+    Busca en el almacén local la imagen MODIS más reciente con NDVI válido en el punto.
+
+    Args:
+        lat (float): Latitud.
+        lng (float): Longitud.
+        widened_start (datetime): Inicio del rango ampliado.
+        current_end (datetime): Fin del rango.
+
+    Returns:
+        dict: Con 'NDVI', 'time_start' y 'stats' como la consulta a Earth Engine,
+        vacío si no hay valor válido, o None si el almacén no cubre la consulta.
+    """
+    layer = get_layer('ndvi', root)
+    if layer is None or not layer.covers(lng, lat, lng, lat):
+        return None
+
+    dates = layer.dates_between(widened_start.strftime('%Y-%m-%d'), current_end.strftime('%Y-%m-%d'))
+    if not dates:
+        return None
+
+    row, col = layer.pixel(lat, lng, layer.array(dates[-1]).shape)
+    for date in reversed(dates):
+        value = float(layer.array(date)[row, col])
+        if not np.isnan(value):
+            time_start = datetime.datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc)
+            return {
+                'NDVI': value,
+                'time_start': time_start.timestamp() * 1000,
+                'stats': {'NDVI_min': value, 'NDVI_max': value, 'NDVI_stdDev': 0.0, 'NDVI_count': 1}
+            }
+    return {}
+
+
+def write_raster(product, date_str, array, bbox, resolution, root=None):
+    """
+    Guarda el ráster de una fecha y actualiza los metadatos de la capa.
+
+    También sirve para construir almacenes sintéticos de prueba.
+
+    Args:
+        product (str): Nombre del producto ('smap' o 'ndvi').
+        date_str (str): Fecha en formato 'YYYY-MM-DD'.
+        array (np.ndarray): Arreglo 2D con NaN donde no hay datos; la fila 0 es el borde norte.
+        bbox (list): Caja (oeste, sur, este, norte) cubierta por el arreglo.
+        resolution (float): Tamaño del píxel en grados.
+    """
+    root = root or RASTER_DIR
+    path = os.path.join(root, product)
+    os.makedirs(path, exist_ok=True)
+
+    # Escritura atómica para no exponer archivos a medio escribir a los lectores
+    tmp_path = os.path.join(path, f'.{date_str}.npy')
+    np.save(tmp_path, np.asarray(array, dtype=np.float32))
+    os.replace(tmp_path, os.path.join(path, f'{date_str}.npy'))
+
+    meta_path = os.path.join(path, 'meta.json')
+    dates = []
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as meta_file:
+            dates = json.load(meta_file)['dates']
+    meta = {'bbox': list(bbox), 'resolution': resolution, 'dates': sorted(set(dates) | {date_str})}
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as meta_file:
+        json.dump(meta, meta_file)
+    os.replace(meta_path + '.tmp', meta_path)
+
+    _layers.pop((root, product), None)
+
+
+def sync_product(product, start_date, end_date, bbox=None, root=None):
+    """
+    Exporta desde Earth Engine los rásters de un producto para la región de servicio.
+
+    Args:
+        product (str): Nombre del producto ('smap' o 'ndvi').
+        start_date (str): Fecha de inicio en formato 'YYYY-MM-DD'.
+        end_date (str): Fecha de fin en formato 'YYYY-MM-DD'.
+        bbox (list): Caja (oeste, sur, este, norte); por defecto `RASTER_BBOX`.
+
+    Returns:
+        list: Fechas sincronizadas.
+    """
+    config = PRODUCTS[product]
+    west, south, east, north = bbox or RASTER_BBOX
+    resolution = config['resolution']
+    width = int(np.ceil((east - west) / resolution))
+    height = int(np.ceil((north - south) / resolution))
+    # Ajustar la caja a un número entero de píxeles
+    east = west + width * resolution
+    south = north - height * resolution
+
+    collection = ee.ImageCollection(config['collection']) \
+        .filter(ee.Filter.date(start_date, end_date)) \
+        .filterBounds(ee.Geometry.Rectangle([west, south, east, north])) \
+        .select(config['band'])
+    time_starts = collection.aggregate_array('system:time_start').getInfo()
+
+    synced = []
+    for time_start in sorted(set(time_starts)):
+        date = datetime.datetime.utcfromtimestamp(time_start / 1000)
+        date_str = date.strftime('%Y-%m-%d')
+        next_day = (date + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        image = collection.filter(ee.Filter.date(date_str, next_day)).mean().unmask(NODATA)
+
+        pixels = ee.data.computePixels({
+            'expression': image,
+            'fileFormat': 'NUMPY_NDARRAY',
+            'grid': {
+                'dimensions': {'width': width, 'height': height},
+                'affineTransform': {
+                    'scaleX': resolution, 'shearX': 0, 'translateX': west,
+                    'shearY': 0, 'scaleY': -resolution, 'translateY': north
+                },
+                'crsCode': 'EPSG:4326'
+            }
+        })
+        array = np.asarray(pixels[config['band']], dtype=np.float32)
+        array[array == NODATA] = np.nan
+
+        write_raster(product, date_str, array, [west, south, east, north], resolution, root)
+        synced.append(date_str)
+        print(f"{product}: ráster {date_str} sincronizado ({width}x{height})")
+
+    return synced
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza los rásters de SMAP y MODIS al almacén local.")
+    parser.add_argument('--product', choices=list(PRODUCTS) + ['all'], default='all')
+    parser.add_argument('--start', required=True, help="Fecha de inicio 'YYYY-MM-DD'")
+    parser.add_argument('--end', required=True, help="Fecha de fin 'YYYY-MM-DD'")
+    args = parser.parse_args()
+
+    ee.Initialize(project=os.getenv("EE_PROJECT", 'ee-luisfernandordzdmz'))
+    for name in (PRODUCTS if args.product == 'all' else [args.product]):
+        sync_product(name, args.start, args.end)
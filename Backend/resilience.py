@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """El circuito de la fuente está abierto: se falla de inmediato sin llamarla."""
+
+
+class Deadline:
+    """Presupuesto de latencia de una solicitud, compartido por todas sus consultas."""
+
+    def __init__(self, budget):
+        """
+        Args:
+            budget (float): Segundos disponibles desde ahora.
+        """
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self):
+        """Segundos que quedan (nunca negativos)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, cap=None):
+        """
+        Tiempo máximo para una consulta: lo que queda del presupuesto, acotado por `cap`.
+
+        Raises:
+            asyncio.TimeoutError: Si el presupuesto ya se agotó (sin llegar a consultar la fuente,
+                así que no cuenta como fallo para su circuito).
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise asyncio.TimeoutError("se agotó el presupuesto de latencia")
+        return remaining if cap is None else min(cap, remaining)
+
+
+class CircuitBreaker:
+    """
+    Circuito por fuente de datos.
+
+    Después de `failure_threshold` fallos seguidos se abre y las llamadas fallan de inmediato
+    con `CircuitOpenError`. Pasados `reset_timeout` segundos deja pasar una sola llamada de
+    prueba (semiabierto): si tiene éxito se cierra; si falla, se vuelve a abrir.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Reserva el permiso para llamar a la fuente.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto o ya hay una llamada de prueba en curso.
+        """
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'closed':
+                return
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"circuito abierto para '{self.name}'")
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Libera la llamada de prueba sin registrar resultado (p. ej. si se canceló la solicitud)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    async def call(self, func, *args, timeout=None, is_failure=None):
+        """
+        Ejecuta la corrutina `func(*args)` a través del circuito.
+
+        Args:
+            func (callable): Corrutina que consulta la fuente.
+            timeout (float): Segundos máximos de espera; un tiempo agotado cuenta como fallo.
+            is_failure (callable): Decide si un resultado devuelto (sin excepción) es un fallo,
+                para fuentes que reportan errores en el valor de retorno.
+
+        Returns:
+            Resultado de `func`.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto.
+            asyncio.TimeoutError: Si se agotó `timeout`.
+        """
+        self.before_call()
+        try:
+            result = await asyncio.wait_for(func(*args), timeout)
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+        if is_failure is not None and is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+
+async def hedged(func, *args, delay, attempts=2):
+    """
+    Ejecuta la corrutina `func(*args)` y, si no termina en `delay` segundos (o falla),
+    lanza otra copia; se usa la primera respuesta exitosa y se cancelan las demás.
+
+    Solo debe usarse con llamadas idempotentes (p. ej. GET).
+
+    Args:
+        func (callable): Corrutina que realiza la llamada.
+        delay (float): Segundos de espera antes de lanzar la siguiente copia.
+        attempts (int): Número máximo de copias.
+
+    Returns:
+        Resultado de la primera copia exitosa.
+
+    Raises:
+        Exception: La excepción de la última copia si todas fallaron.
+    """
+    pending = set()
+    launched = 0
+    last_error = None
+    try:
+        while True:
+            if launched < attempts:
+                pending.add(asyncio.ensure_future(func(*args)))
+                launched += 1
+            if not pending:
+                raise last_error
+
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=delay if launched < attempts else None,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
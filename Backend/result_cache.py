@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def perceptual_hash(image):
+    """
+    Huella perceptual (dHash de 64 bits): compara el brillo de pixeles vecinos en una versión
+    de 9x8 en escala de grises, así que sobrevive a recompresiones y cambios leves de calidad.
+
+    Args:
+        image (np.ndarray): Imagen RGB en uint8.
+
+    Returns:
+        int: Huella de 64 bits.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), 'big')
+
+
+class InferenceResultCache:
+    """
+    Caché LRU de resultados de clasificación, con la huella de los pixeles de entrada del modelo
+    como llave.
+
+    En modo perceptual, si no hay coincidencia exacta se acepta la entrada cuya huella dHash
+    esté a lo más a `max_distance` bits de distancia, para que la misma foto recomprimida
+    también acierte. La caché se vacía sola cuando cambia la huella del modelo cargado, es decir,
+    cuando se recarga tras reemplazar su archivo (se revisa a lo más cada `check_interval` segundos).
+
+    Es segura para usarse desde los hilos del executor.
+    """
+
+    def __init__(self, name, maxsize, fingerprint, perceptual=False, max_distance=4, check_interval=5.0):
+        """
+        Args:
+            name (str): Nombre de la caché.
+            maxsize (int): Resultados máximos.
+            fingerprint (callable): Devuelve la huella del modelo cargado.
+            perceptual (bool): Aceptar imágenes casi idénticas.
+            max_distance (int): Bits distintos máximos entre huellas perceptuales (de 64).
+            check_interval (float): Segundos entre revisiones del archivo del modelo.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.fingerprint = fingerprint
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        self.check_interval = check_interval
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._model = None
+        self._checked_at = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_model(self):
+        """Vacía la caché si el archivo del modelo cambió desde la última revisión."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        model = self.fingerprint()
+        if model != self._model:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._model = model
+
+    def key(self, image):
+        """
+        Args:
+            image (np.ndarray): Pixeles de entrada del modelo (RGB en uint8).
+
+        Returns:
+            tuple: Resumen exacto de los pixeles y huella perceptual (o None si el modo está desactivado).
+        """
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+        digest.update(repr(image.shape).encode())
+        return digest.hexdigest(), perceptual_hash(image) if self.perceptual else None
+
+    def _nearest(self, phash):
+        """Llave de la entrada con la huella perceptual más cercana dentro de `max_distance`, o None."""
+        if not self._data:
+            return None
+        keys = list(self._data)
+        hashes = np.fromiter((self._data[key][0] for key in keys), dtype=np.uint64, count=len(keys))
+        different = np.bitwise_xor(hashes, np.uint64(phash)).view(np.uint8).reshape(-1, 8)
+        distances = np.unpackbits(different, axis=1).sum(axis=1)
+        best = int(np.argmin(distances))
+        return keys[best] if distances[best] <= self.max_distance else None
+
+    def lookup(self, image):
+        """
+        Busca el resultado de una imagen.
+
+        Args:
+            image (np.ndarray): Pixeles de entrada del modelo (RGB en uint8).
+
+        Returns:
+            tuple: Llave de la imagen (para `set`) y resultado guardado, o None si no está.
+        """
+        key = self.key(image)
+        digest, phash = key
+        with self._lock:
+            self._check_model()
+            entry = self._data.get(digest)
+            if entry is not None:
+                self.hits += 1
+                self._data.move_to_end(digest)
+                return key, entry[1]
+            if phash is not None:
+                nearest = self._nearest(phash)
+                if nearest is not None:
+                    self.perceptual_hits += 1
+                    self._data.move_to_end(nearest)
+                    return key, self._data[nearest][1]
+            self.misses += 1
+            return key, None
+
+    def set(self, key, result):
+        digest, phash = key
+        with self._lock:
+            self._data[digest] = (phash or 0, result)
+            self._data.move_to_end(digest)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        """Devuelve los contadores de aciertos y fallos de la caché."""
+        with self._lock:
+            total = self.hits + self.perceptual_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "perceptual": self.perceptual,
+                "max_distance": self.max_distance if self.perceptual else None,
+                "hits": self.hits,
+                "perceptual_hits": self.perceptual_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round((total - self.misses) / total, 4) if total else None
+            }
@@ -0,0 +1,47 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Deduplica cómputos asíncronos concurrentes con la misma llave.
+
+    Mientras un cómputo está en curso, las solicitudes con la misma llave esperan
+    el mismo futuro en lugar de iniciar uno nuevo.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def do(self, key, func, *args):
+        """
+        Ejecuta `func(*args)` una sola vez por llave entre las solicitudes concurrentes.
+
+        Args:
+            key (tuple): Llave normalizada del cómputo.
+            func (callable): Corrutina que realiza el cómputo.
+
+        Returns:
+            Resultado compartido del cómputo.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(func(*args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # `shield` evita que una solicitud cancelada cancele el cómputo compartido
+        return await asyncio.shield(future)
+
+    def stats(self):
+        """Devuelve los contadores de cómputos iniciados y solicitudes deduplicadas."""
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,232 @@
+import json
+import os
+import struct
+import zipfile
+
+# Tamaño máximo de una imagen subida
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", 10)) * 1024 * 1024
+
+# Firmas (magic bytes) de los formatos aceptados: (desplazamiento, bytes, tipo, extensión)
+IMAGE_SIGNATURES = (
+    (0, b'\xff\xd8\xff', 'image/jpeg', '.jpg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png', '.png'),
+)
+
+# Firma de los archivos zip (encabezado local del primer miembro)
+ZIP_SIGNATURE = b'PK\x03\x04'
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """El cuerpo de la solicitud supera el límite permitido."""
+
+
+def sniff_image_type(data):
+    """
+    Identifica el formato de la imagen por sus primeros bytes, sin confiar en el `content_type` del cliente.
+
+    Args:
+        data (bytes): Contenido (o inicio) del archivo.
+
+    Returns:
+        tuple: (tipo MIME, extensión), o None si no es JPEG ni PNG.
+    """
+    for offset, signature, mime_type, extension in IMAGE_SIGNATURES:
+        if data[offset:offset + len(signature)] == signature:
+            return mime_type, extension
+    return None
+
+
+# Marcadores JPEG de inicio de cuadro (SOF), que llevan el alto y el ancho
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def image_size(data):
+    """
+    Lee el ancho y el alto de una imagen JPEG o PNG de su encabezado, sin decodificarla.
+
+    Args:
+        data (bytes): Contenido del archivo.
+
+    Returns:
+        tuple: (ancho, alto), o None si el encabezado no se pudo leer.
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        # El primer bloque es IHDR: ancho y alto como enteros de 4 bytes
+        if len(data) < 24 or data[12:16] != b'IHDR':
+            return None
+        return struct.unpack('>II', data[16:24])
+
+    if data[:2] != b'\xff\xd8':
+        return None
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Relleno entre segmentos
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+
+async def read_upload(file, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Lee un archivo subido por bloques y se detiene en cuanto supera el límite.
+
+    Args:
+        file (UploadFile): Archivo de la solicitud.
+        max_bytes (int): Bytes máximos permitidos.
+
+    Returns:
+        bytes: Contenido del archivo.
+
+    Raises:
+        UploadTooLarge: Si el archivo supera `max_bytes`.
+    """
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return b''.join(chunks)
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"La imagen supera el límite de {max_bytes // (1024 * 1024)} MB.")
+        chunks.append(chunk)
+
+
+def _read_limited(file, max_bytes):
+    """Lee a lo más `max_bytes` + 1 bytes, suficientes para saber si el archivo supera el límite."""
+    data = file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        return None, f"La imagen supera el límite de {max_bytes // (1024 * 1024)} MB."
+    return data, None
+
+
+def iter_upload_images(uploads, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Recorre las imágenes de varios archivos subidos; los zip se leen miembro por miembro,
+    así que en memoria solo está la imagen actual y no el archivo descomprimido.
+
+    Es bloqueante (los archivos grandes están en disco), así que se avanza desde un executor.
+
+    Args:
+        uploads (list): Archivos subidos (`UploadFile`): imágenes o archivos zip con imágenes.
+        max_bytes (int): Bytes máximos por imagen (también descomprimida).
+
+    Yields:
+        tuple: (nombre, bytes de la imagen o None, mensaje de error o None).
+    """
+    for upload in uploads:
+        file = upload.file
+        file.seek(0)
+        is_zip = file.read(len(ZIP_SIGNATURE)) == ZIP_SIGNATURE
+        file.seek(0)
+        if not is_zip:
+            data, error = _read_limited(file, max_bytes)
+            yield upload.filename, data, error
+            continue
+
+        try:
+            archive = zipfile.ZipFile(file)
+        except zipfile.BadZipFile:
+            yield upload.filename, None, "El archivo zip está dañado."
+            continue
+        with archive:
+            for info in archive.infolist():
+                # Directorios y metadatos que agrega macOS al comprimir
+                if info.is_dir() or info.filename.startswith('__MACOSX/'):
+                    continue
+                name = f"{upload.filename}/{info.filename}"
+                if info.file_size > max_bytes:
+                    yield name, None, f"La imagen supera el límite de {max_bytes // (1024 * 1024)} MB."
+                    continue
+                try:
+                    with archive.open(info) as member:
+                        data, error = _read_limited(member, max_bytes)
+                except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+                    data, error = None, f"No se pudo extraer del zip: {e}"
+                yield name, data, error
+
+
+class UploadLimitMiddleware:
+    """
+    Middleware ASGI que limita el tamaño del cuerpo de las rutas de subida mientras llega.
+
+    Rechaza de inmediato con 413 si el `Content-Length` declarado supera el límite y, si no hay
+    `Content-Length` (o es falso), corta la lectura en cuanto los bytes recibidos lo superan, sin
+    esperar a que el cuerpo completo se procese como formulario.
+    """
+
+    def __init__(self, app, limits):
+        """
+        Args:
+            app: Aplicación ASGI.
+            limits (dict): Bytes máximos del cuerpo (incluye la codificación multipart) por ruta.
+        """
+        self.app = app
+        self.limits = dict(limits)
+
+    async def _reject(self, send, max_bytes):
+        body = json.dumps({'detail': f"La solicitud supera el límite de {max_bytes // (1024 * 1024)} MB."}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope['path']) if scope['type'] == 'http' else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope['headers']:
+            if name == b'content-length' and value.isdigit() and int(value) > max_bytes:
+                await self._reject(send, max_bytes)
+                return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # El error de lectura se convierte en otra respuesta dentro de la aplicación: se reemplaza por el 413
+            if exceeded:
+                if not response_started:
+                    response_started = True
+                    await self._reject(send, max_bytes)
+                return
+            response_started = response_started or message['type'] == 'http.response.start'
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            if not response_started:
+                await self._reject(send, max_bytes)
@@ -5,7 +5,7 @@ import os
 import cv2
 from sklearn.model_selection import train_test_split
 import tensorflow as tf
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from tensorflow.keras.utils import Sequence
 from tensorflow.keras.applications import EfficientNetB0
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Dense, BatchNormalization, Dropout
@@ -13,6 +13,11 @@ from tensorflow.keras.optimizers import Adamax
 from sklearn.metrics import confusion_matrix
 import seaborn as sns
 import json
+import sys
+
+# Same preprocessing module used by the API (Backend/preprocessing.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Backend'))
+from preprocessing import preprocess_batch, resize
 
 # ---- 1. Data Preparation ----
 
@@ -49,45 +54,40 @@ train_df, val_df = train_test_split(train_df, test_size=0.15, random_state=42, s
 
 # ---- 2. Image Data Generators ----
 
-# Enhance image function
-def enhance_image(image):
-    image = cv2.addWeighted(image, 1.5, image, -0.5, 0)
-    kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-    image = cv2.filter2D(image, -1, kernel)
-    
-    # HSV adjustment
-    hue = image[:, :, 0]
-    saturation = image[:, :, 1]
-    value = image[:, :, 2]
-    value = np.clip(value * 1.25, 0, 255)
-    
-    image[:, :, 2] = value
-    return image
-
-# ImageDataGenerator for data augmentation and preprocessing
-image_gen = ImageDataGenerator(
-    rescale=1./255,
-    preprocessing_function=lambda image: enhance_image(image)
-)
+class CornImageSequence(Sequence):
+    """
+    Batches of (images, one-hot labels) prepared exactly like the API does (Backend/inference.py):
+    decoded with OpenCV at full size, resized with preprocessing.resize (cv2 INTER_LINEAR) and
+    sharpened, brightened and normalized with preprocessing.preprocess_batch. Keras' own loaders
+    resize with PIL while reading the file, which gives different pixels when downscaling.
+    """
+
+    def __init__(self, dataframe, batch_size=32):
+        super().__init__()
+        self.filepaths = dataframe["filepaths"].tolist()
+        # Same attributes as flow_from_dataframe (classes sorted by name)
+        self.class_indices = {label: index for index, label in enumerate(sorted(class_labels))}
+        self.classes = np.array([self.class_indices[label] for label in dataframe["labels"]])
+        self.batch_size = batch_size
+
+    def __len__(self):
+        return int(np.ceil(len(self.filepaths) / self.batch_size))
+
+    def load(self, path):
+        image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return resize(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+    def __getitem__(self, index):
+        batch = slice(index * self.batch_size, (index + 1) * self.batch_size)
+        images = preprocess_batch(np.stack([self.load(path) for path in self.filepaths[batch]]))
+        labels = np.eye(len(self.class_indices), dtype=np.float32)[self.classes[batch]]
+        return images, labels
+
 
 # Creating train, validation, and test generators
-train = image_gen.flow_from_dataframe(
-    dataframe=train_df, x_col="filepaths", y_col="labels",
-    target_size=(256, 256), color_mode='rgb',
-    class_mode="categorical", batch_size=32, shuffle=False
-)
-
-val = image_gen.flow_from_dataframe(
-    dataframe=val_df, x_col="filepaths", y_col="labels",
-    target_size=(256, 256), color_mode='rgb',
-    class_mode="categorical", batch_size=32, shuffle=False
-)
-
-test = image_gen.flow_from_dataframe(
-    dataframe=test_df, x_col="filepaths", y_col="labels",
-    target_size=(256, 256), color_mode='rgb',
-    class_mode="categorical", batch_size=32, shuffle=False
-)
+train = CornImageSequence(train_df, batch_size=32)
+val = CornImageSequence(val_df, batch_size=32)
+test = CornImageSequence(test_df, batch_size=32)
 
 # ---- 3. Model Creation ----
 